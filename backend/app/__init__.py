@@ -1,8 +1,11 @@
 import os
 from flask import Flask
 from .config import settings
-from .extensions import db, migrate, bcrypt
+from .extensions import db, migrate
 from .core.error_handlers import register_error_handlers
+from .core.compression import register_compression
+from .core.db_routing import register_db_routing
+from .cli import register_cli_commands
 
 # blueprint
 from .api.auth_routes import auth_bp
@@ -10,6 +13,7 @@ from .api.book_routes import book_bp
 from .api.loan_routes import loan_bp
 from .api.admin_routes import admin_bp
 from .api.category_routes import category_bp
+from .api.upload_routes import uploads_bp
 
 
 from . import models
@@ -19,6 +23,7 @@ def create_app():
     app.config['SECRET_KEY'] = settings.SECRET_KEY
     app.config['SQLALCHEMY_DATABASE_URI'] = settings.DATABASE_URL
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['USE_X_SENDFILE'] = settings.UPLOADS_X_SENDFILE
 
     # Ensure the instance and upload folders exist
     try:
@@ -33,10 +38,12 @@ def create_app():
     # Store the absolute path in the app's config for later use
     app.config['UPLOAD_FOLDER'] = upload_path
 
+    # Reads are routed to the read replica, if one is configured
+    register_db_routing(app)
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
-    bcrypt.init_app(app)
 
     # Register the blueprint with the app
     app.register_blueprint(auth_bp)
@@ -44,7 +51,10 @@ def create_app():
     app.register_blueprint(loan_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(category_bp)
+    app.register_blueprint(uploads_bp)
 
     register_error_handlers(app)
+    register_compression(app)
+    register_cli_commands(app)
 
     return app
\ No newline at end of file
@@ -1,12 +1,18 @@
 """
 Defines the admin-only API endpoints for managing books, copies, and loans.
 """
-from flask import Blueprint, request, jsonify
-from app.core.security import admin_required
-from app.services import admin_service, loan_service
-from app.schemas.admin_schemas import BookCreate, BookUpdate
+import time
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
+from app.core.security import admin_required, principal_cache
+from app.services import admin_service, loan_service, import_service, outbox_service
+from app.schemas.admin_schemas import BookCreate, BookUpdate, CopyBatchCreate, CopyBatchDelete, CopyStatusUpdate
 from app.schemas.book_schemas import BookPublic
-from app.schemas.loan_schemas import AdminLoanView
+from app.core import serialization
+from app.core.cache import book_cache
+from app.core.denylist import revocation_list
+from app.core.hashing import password_hasher
+from app.core.delay_queue import loan_event_queue
+from app.core.notifications import notification_queue
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -19,6 +25,29 @@ def handle_create_book():
     new_book = admin_service.create_book(book_data, image_file)
     return jsonify(BookPublic.model_validate(new_book).model_dump()), 201
 
+@admin_bp.route('/books/import', methods=['POST'])
+@admin_required
+def handle_import_books():
+    """
+    Bulk-imports books from a CSV or JSON Lines upload (the `file` form field)
+    or request body. The format is taken from `?format=`, or else inferred from
+    the file name or content type.
+    """
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        import_format = request.args.get('format') or import_service.detect_format(upload.filename, upload.mimetype)
+    else:
+        stream = request.stream
+        import_format = request.args.get('format') or import_service.detect_format(None, request.mimetype)
+
+    if import_format not in import_service.IMPORT_FORMATS:
+        return jsonify({"error": "Unsupported import format. Use 'csv' or 'jsonl'."}), 400
+
+    batch_size = request.args.get('batch_size', import_service.DEFAULT_BATCH_SIZE, type=int)
+    report = import_service.import_catalog(stream, import_format, batch_size=max(batch_size, 1))
+    return jsonify(report), 200
+
 @admin_bp.route('/books/<int:book_id>', methods=['PUT'])
 @admin_required
 def handle_update_book(book_id):
@@ -49,6 +78,34 @@ def handle_add_book_copy(book_id):
         return jsonify({"error": "Book not found"}), 404
     return jsonify({"message": "Book copy added successfully", "copy_id": new_copy.id}), 201
 
+@admin_bp.route('/books/<int:book_id>/copies/batch', methods=['POST'])
+@admin_required
+def handle_add_book_copies(book_id):
+    """Adds a batch of new copies for a specific book."""
+    batch = CopyBatchCreate(**request.get_json())
+    copy_ids = admin_service.add_book_copies(book_id, batch)
+    if copy_ids is None:
+        return jsonify({"error": "Book not found"}), 404
+    return jsonify({"message": f"{len(copy_ids)} book copies added successfully", "copy_ids": copy_ids}), 201
+
+@admin_bp.route('/copies/batch-delete', methods=['POST'])
+@admin_required
+def handle_delete_book_copies():
+    """Handles soft-deleting a batch of book copies."""
+    batch = CopyBatchDelete(**request.get_json())
+    deleted_ids = admin_service.delete_book_copies(batch)
+    skipped_ids = sorted(set(batch.copy_ids) - set(deleted_ids))
+    return jsonify({"deleted_ids": deleted_ids, "skipped_ids": skipped_ids}), 200
+
+@admin_bp.route('/copies/status', methods=['PATCH'])
+@admin_required
+def handle_update_copy_status():
+    """Moves a batch of book copies to a new status, e.g. into maintenance."""
+    batch = CopyStatusUpdate(**request.get_json())
+    updated_ids = admin_service.update_copy_status(batch)
+    skipped_ids = sorted(set(batch.copy_ids) - set(updated_ids))
+    return jsonify({"updated_ids": updated_ids, "skipped_ids": skipped_ids}), 200
+
 @admin_bp.route('/copies/<int:copy_id>', methods=['DELETE'])
 @admin_required
 def handle_delete_book_copy(copy_id):
@@ -61,7 +118,39 @@ def handle_delete_book_copy(copy_id):
 @admin_bp.route('/loans', methods=['GET'])
 @admin_required
 def handle_get_active_loans():
-    """Retrieves a list of all currently active loans."""
+    """
+    Retrieves the currently active loans, soonest due first.
+    `?format=ndjson` streams every loan as one JSON object per line; passing a
+    `cursor` (an empty string for the first page) returns one page of at most
+    500 loans at a time and the `next_cursor` to follow. Otherwise the full
+    list is returned.
+    """
+    if request.args.get('format') == 'ndjson':
+        # The request context is kept alive until the stream has been consumed.
+        return current_app.response_class(
+            stream_with_context(loan_service.stream_active_loans()),
+            mimetype='application/x-ndjson'
+        )
+
+    cursor = request.args.get('cursor', type=str)
+    if cursor is not None:
+        per_page = request.args.get('per_page', 100, type=int)
+        page = loan_service.get_active_loans_page(cursor, per_page)
+        return current_app.response_class(serialization.dumps(page), mimetype='application/json')
+
     active_loans = loan_service.get_all_active_loans()
-    loans_data = [AdminLoanView.model_validate(loan).model_dump() for loan in active_loans]
-    return jsonify(loans_data)
\ No newline at end of file
+    return current_app.response_class(serialization.dumps(active_loans), mimetype='application/json')
+
+@admin_bp.route('/metrics', methods=['GET'])
+@admin_required
+def handle_get_metrics():
+    """Reports runtime metrics for the worker process that serves the request."""
+    return jsonify({
+        "cache": book_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "denylist": revocation_list.stats(),
+        "password_hashing": password_hasher.stats(),
+        "loan_events": {"scheduled": loan_event_queue.size(), "lag": loan_event_queue.lag(time.time())},
+        "notifications": notification_queue.stats(),
+        "outbox": outbox_service.get_backlog()
+    })
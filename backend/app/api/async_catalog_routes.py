@@ -0,0 +1,113 @@
+"""
+Defines the async (ASGI) variants of the public catalog endpoints.
+
+They answer exactly like `book_routes` and `category_routes`, including
+conditional GETs and compressed variants, but never hold a thread while
+waiting on Redis or the database. See `asgi.py` for how they are served.
+"""
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+from app.core import compression, serialization
+from app.core.exceptions import InvalidCursorException
+from app.services import async_catalog_service
+
+
+def _int_arg(params, name, default):
+    # Mirrors `request.args.get(name, default, type=int)`.
+    try:
+        return int(params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def _json_error(message: str, status_code: int):
+    return Response(serialization.dumps({"error": message}), status_code=status_code, media_type='application/json')
+
+
+async def _conditional_json(request, etag: str, load_body):
+    """The async counterpart of `http_cache.conditional_json`."""
+    accepted = parse_accept_header(request.headers.get('accept-encoding'))
+    headers = {
+        'Cache-Control': 'public, no-cache',
+        'ETag': quote_etag(etag, weak=compression.negotiate_encoding(accepted) is not None),
+        'Vary': 'Accept-Encoding',
+    }
+    if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+        return Response(status_code=304, headers=headers)
+
+    body = await load_body()
+    if body is None:
+        return None
+
+    body, encoding = compression.select_variant(body, accepted)
+    if encoding is None:
+        # Bodies that are not packed are compressed on the fly, as the sync hook does.
+        body, encoding = compression.encode_body(body, accepted)
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return Response(body, media_type='application/json', headers=headers)
+
+
+async def list_books(request):
+    """Retrieves a paginated and filterable list of books."""
+    params = request.query_params
+    listing = dict(
+        page=_int_arg(params, 'page', 1),
+        per_page=_int_arg(params, 'per_page', 10),
+        search_query=params.get('q'),
+        category_name=params.get('category'),
+        cursor=params.get('cursor'),
+        include_total=params.get('include_total', 'false').lower() == 'true'
+    )
+    return await _conditional_json(
+        request,
+        await async_catalog_service.get_books_etag(**listing),
+        lambda: async_catalog_service.get_all_books(**listing)
+    )
+
+
+async def get_book(request):
+    """Retrieves details for a single book by its ID."""
+    book_id = request.path_params['book_id']
+    # Looked up before any 304, as in `book_routes.get_book`.
+    body = await async_catalog_service.get_book_by_id(book_id)
+    if body is None:
+        return _json_error("Book not found", 404)
+
+    async def load_book():
+        return body
+
+    return await _conditional_json(request, await async_catalog_service.get_book_etag(book_id), load_book)
+
+
+async def get_categories(request):
+    """Retrieves a list of all public categories."""
+
+    async def load_categories():
+        return serialization.dumps(await async_catalog_service.get_all_categories())
+
+    return await _conditional_json(request, await async_catalog_service.get_categories_etag(), load_categories)
+
+
+async def handle_invalid_cursor(request, error):
+    # Handles malformed pagination cursors (400 Bad Request).
+    return _json_error(str(error), 400)
+
+
+async def handle_generic_exception(request, error):
+    # Catch-all for unexpected errors (500 Internal Server Error), shaped like the Flask one.
+    # Starlette re-raises the error after responding, so the server still logs it.
+    return _json_error("An internal server error occurred.", 500)
+
+
+async_catalog_routes = [
+    Route('/api/books/', list_books, methods=['GET']),
+    Route('/api/books/{book_id:int}', get_book, methods=['GET']),
+    Route('/api/categories', get_categories, methods=['GET']),
+]
+
+exception_handlers = {
+    InvalidCursorException: handle_invalid_cursor,
+    Exception: handle_generic_exception,
+}
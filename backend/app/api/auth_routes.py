@@ -6,7 +6,7 @@ import datetime
 import jwt
 import uuid
 from app.core.security import jwt_required
-from app.core.redis_client import redis_client
+from app.core.denylist import revocation_list
 from app.schemas.auth_schemas import UserCreate, UserLogin
 from app.services import auth_service
 from app.config import settings
@@ -50,8 +50,7 @@ def logout():
     jti = payload['jti']
     exp = payload['exp']
 
-    # Add the token's unique ID (jti) to the Redis denylist until it expires.
-    time_to_expire = datetime.datetime.fromtimestamp(exp) - datetime.datetime.utcnow()
-    redis_client.set(f"denylist:{jti}", "true", ex=time_to_expire)
+    # Add the token's unique ID (jti) to the denylist until it expires.
+    revocation_list.revoke(jti, exp)
 
     return jsonify({"message": "Successfully logged out."}), 200
\ No newline at end of file
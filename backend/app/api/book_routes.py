@@ -3,28 +3,49 @@ Defines the public API endpoints for browsing and viewing books.
 """
 from flask import Blueprint, request, jsonify
 from app.services import book_service
+from app.core.http_cache import conditional_json
 
 book_bp = Blueprint('books', __name__, url_prefix='/api/books')
 
 @book_bp.route('/', methods=['GET'])
 def list_books():
-    """Retrieves a paginated and filterable list of books."""
+    """
+    Retrieves a paginated and filterable list of books.
+    Offset pagination uses `page`; keyset pagination starts with an empty
+    `cursor` and follows the returned `next_cursor`.
+    """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     search_query = request.args.get('q', type=str)
     category_name = request.args.get('category', type=str)
+    cursor = request.args.get('cursor', type=str)
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
 
-    # The service layer handles caching and returns the final dictionary.
-    response_data = book_service.get_all_books(
-        page=page, per_page=per_page, search_query=search_query, category_name=category_name
+    # A matching If-None-Match is answered before the listing is loaded. Otherwise the
+    # service layer handles caching and returns the already-serialized JSON body.
+    listing = dict(
+        page=page, per_page=per_page, search_query=search_query, category_name=category_name,
+        cursor=cursor, include_total=include_total
     )
-    return jsonify(response_data)
+    return conditional_json(book_service.get_books_etag(**listing), lambda: book_service.get_all_books(**listing))
 
 @book_bp.route('/<int:book_id>', methods=['GET'])
 def get_book(book_id):
     """Retrieves details for a single book by its ID."""
-    # The service layer handles caching and returns the final dictionary.
-    book = book_service.get_book_by_id(book_id)
-    if not book:
+    # The service layer handles caching and returns the already-serialized JSON body.
+    # It is looked up (usually an L1 hit) before any 304, so a removed book is never "not modified".
+    body = book_service.get_book_by_id(book_id)
+    if body is None:
         return jsonify({"error": "Book not found"}), 404
-    return jsonify(book)
\ No newline at end of file
+    return conditional_json(book_service.get_book_etag(book_id), lambda: body)
+
+@book_bp.route('/<int:book_id>/copies', methods=['GET'])
+def get_book_copies(book_id):
+    """Retrieves a paginated list of the copies of a single book."""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+
+    copies_data = book_service.get_book_copies(book_id, page=page, per_page=per_page)
+    if copies_data is None:
+        return jsonify({"error": "Book not found"}), 404
+    return jsonify(copies_data)
@@ -2,6 +2,8 @@
 Defines the API endpoints for managing and viewing book categories.
 """
 from flask import Blueprint, jsonify, request
+from app.core import serialization
+from app.core.http_cache import conditional_json
 from app.services import category_service
 from app.schemas.category_schemas import CategoryPublic, CategoryCreate, CategoryUpdate
 from app.core.security import admin_required
@@ -12,9 +14,10 @@ category_bp = Blueprint('categories', __name__)
 @category_bp.route('/api/categories', methods=['GET'])
 def handle_get_categories():
     """Retrieves a list of all public categories."""
-    categories = category_service.get_all_categories()
-    categories_data = [CategoryPublic.model_validate(cat).model_dump() for cat in categories]
-    return jsonify(categories_data)
+    return conditional_json(
+        category_service.get_categories_etag(),
+        lambda: serialization.dumps(category_service.get_all_categories())
+    )
 
 # --- Admin Routes ---
 @category_bp.route('/api/admin/categories', methods=['POST'])
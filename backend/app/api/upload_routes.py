@@ -0,0 +1,63 @@
+"""
+Serves uploaded files, such as book cover images.
+
+Stored files never change (image names are content hashes or UUIDs), so
+responses carry a strong ETag and are cacheable for a year as immutable.
+Bodies are sent with `wsgi.file_wrapper` (sendfile) where the server offers
+it, or handed off to a fronting proxy when configured.
+"""
+import mimetypes
+import os
+from flask import Blueprint, current_app, send_from_directory, abort
+from werkzeug.security import safe_join
+from app.config import settings
+
+uploads_bp = Blueprint('uploads', __name__)
+
+# A SHA-256 hex digest, as used for content-addressed image names.
+CONTENT_HASH_LENGTH = 64
+
+
+def _is_partial(filename):
+    # Uploads and variants are written to '.upload-*' and '*.tmp' files, then renamed into place.
+    name = os.path.basename(filename)
+    return name.startswith('.') or name.endswith('.tmp')
+
+
+def _content_etag(filename):
+    # Content-addressed names already are a strong validator for their bytes.
+    stem = filename.rsplit('.', 1)[0].split('-', 1)[0]
+    if len(stem) == CONTENT_HASH_LENGTH and all(c in '0123456789abcdef' for c in stem):
+        return filename.rsplit('.', 1)[0]
+    return True
+
+
+def _make_immutable(response):
+    response.cache_control.public = True
+    response.cache_control.max_age = settings.UPLOADS_CACHE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+@uploads_bp.route('/uploads/<path:filename>', methods=['GET', 'HEAD'])
+def serve_upload(filename):
+    """Serves an uploaded file, honoring If-None-Match and Range requests."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    path = safe_join(upload_folder, filename)
+    if path is None or _is_partial(filename) or not os.path.isfile(path):
+        abort(404)
+
+    if settings.UPLOADS_X_ACCEL_PREFIX:
+        # nginx serves the body (with ranges and conditionals) from its internal location.
+        response = current_app.response_class()
+        response.headers['X-Accel-Redirect'] = f"{settings.UPLOADS_X_ACCEL_PREFIX.rstrip('/')}/{filename}"
+        response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        return _make_immutable(response)
+
+    response = send_from_directory(
+        upload_folder, filename,
+        conditional=True,
+        etag=_content_etag(filename),
+        max_age=settings.UPLOADS_CACHE_MAX_AGE
+    )
+    return _make_immutable(response)
@@ -6,5 +6,27 @@ from app.config import settings
 celery_app = Celery(
     'tasks',
     broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL
-)
\ No newline at end of file
+    backend=settings.REDIS_URL,
+    # Workers import the task modules at startup, so beat and outbox task names resolve.
+    include=['app.tasks']
+)
+
+# Periodic tasks run by `celery beat`.
+celery_app.conf.beat_schedule = {
+    'reconcile-book-copy-counts': {
+        'task': 'app.tasks.reconcile_book_copy_counts',
+        'schedule': 3600.0,
+    },
+    'dispatch-due-loan-events': {
+        'task': 'app.tasks.dispatch_due_loan_events',
+        'schedule': settings.DUE_EVENT_POLL_INTERVAL,
+    },
+    'relay-outbox': {
+        'task': 'app.tasks.relay_outbox',
+        'schedule': settings.OUTBOX_RELAY_INTERVAL,
+    },
+    'flush-notifications': {
+        'task': 'app.tasks.flush_notifications',
+        'schedule': settings.NOTIFICATION_FLUSH_INTERVAL,
+    },
+}
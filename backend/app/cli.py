@@ -0,0 +1,49 @@
+"""
+Registers the application's Flask CLI commands.
+"""
+import json
+import time
+import click
+from flask.cli import with_appcontext
+from app.config import settings
+from app.extensions import db
+from app.services import import_service, outbox_service
+
+
+@click.command('import-catalog')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'import_format', type=click.Choice(import_service.IMPORT_FORMATS),
+              help="Input format; inferred from the file extension by default.")
+@click.option('--batch-size', default=import_service.DEFAULT_BATCH_SIZE, show_default=True,
+              type=click.IntRange(min=1), help="Rows inserted per transaction.")
+@with_appcontext
+def import_catalog_command(path, import_format, batch_size):
+    """Bulk-imports books from a CSV or JSON Lines file."""
+    import_format = import_format or import_service.detect_format(path)
+    if import_format is None:
+        raise click.UsageError("Cannot infer the format from the file name; pass --format.")
+
+    with open(path, 'rb') as stream:
+        report = import_service.import_catalog(stream, import_format, batch_size=batch_size)
+    click.echo(json.dumps(report, indent=2))
+
+
+@click.command('relay-outbox')
+@click.option('--loop', is_flag=True, help="Keep relaying, polling at OUTBOX_RELAY_INTERVAL.")
+@with_appcontext
+def relay_outbox_command(loop):
+    """Hands pending outbox messages to Celery, once or continuously."""
+    while True:
+        relayed = outbox_service.relay_outbox()
+        if not loop:
+            click.echo(f"Relayed {relayed} outbox messages")
+            return
+        db.session.remove()
+        if relayed < settings.OUTBOX_BATCH_SIZE:
+            time.sleep(settings.OUTBOX_RELAY_INTERVAL)
+
+
+def register_cli_commands(app):
+    """Attaches the custom CLI commands to the Flask app instance."""
+    app.cli.add_command(import_catalog_command)
+    app.cli.add_command(relay_outbox_command)
@@ -1,10 +1,58 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     SECRET_KEY: str
     DATABASE_URL: str
+    # The async read path derives its URL from DATABASE_URL (using asyncpg) unless this is set.
+    ASYNC_DATABASE_URL: Optional[str] = None
+    ASYNC_DB_POOL_SIZE: int = 20
+    # Optional read replica (see app/core/db_routing.py); a second local database works for testing.
+    READ_REPLICA_URL: Optional[str] = None
+    READ_REPLICA_STICKY_SECONDS: int = 5
     REDIS_URL: str = "redis://localhost:6379"
     UPLOAD_FOLDER: str = 'uploads'
+    UPLOADS_CACHE_MAX_AGE: int = 31536000
+    # Behind a proxy, hand file bodies off to it: Apache/lighttpd via X-Sendfile, or
+    # nginx via X-Accel-Redirect to an internal location aliased to the upload folder.
+    UPLOADS_X_SENDFILE: bool = False
+    UPLOADS_X_ACCEL_PREFIX: Optional[str] = None
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    SEARCH_INDEX_MAX_AGE: int = 300
+    L1_CACHE_MAX_ENTRIES: int = 2048
+    L1_CACHE_TTL: int = 5
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 30
+    DENYLIST_BLOOM_CAPACITY: int = 100000
+    DENYLIST_BLOOM_ERROR_RATE: float = 0.001
+    DENYLIST_REBUILD_INTERVAL: int = 3600
+    BCRYPT_LOG_ROUNDS: int = 12
+    HASH_POOL_WORKERS: int = 2
+    HASH_POOL_QUEUE_LIMIT: int = 16
+    HASH_POOL_TIMEOUT: float = 10.0
+    HASH_POOL_RETRY_AFTER: int = 1
+    LOAN_REMINDER_LEAD_TIME: int = 86400
+    DUE_EVENT_BATCH_SIZE: int = 500
+    DUE_EVENT_MAX_BATCHES: int = 20
+    DUE_EVENT_POLL_INTERVAL: float = 30.0
+    # Point these at a local stand-in (e.g. `python -m aiosmtpd -n -l localhost:1025`) in development.
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_USE_TLS: bool = False
+    SMTP_TIMEOUT: float = 10.0
+    SMTP_POOL_SIZE: int = 4
+    MAIL_SENDER: str = "library@localhost"
+    NOTIFICATION_BATCH_SIZE: int = 200
+    NOTIFICATION_MAX_BATCHES: int = 10
+    NOTIFICATION_FLUSH_INTERVAL: float = 5.0
+    NOTIFICATION_MAX_ATTEMPTS: int = 3
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_MAX_BATCHES: int = 20
+    OUTBOX_RELAY_INTERVAL: float = 1.0
 
     class Config:
         env_file = ".env"
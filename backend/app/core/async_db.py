@@ -0,0 +1,76 @@
+"""
+Provides the async SQLAlchemy engine and sessions used by the async read path.
+
+Engines are created on first use, so the sync application never needs an
+async driver installed. Reads may use the read replica (`READ_REPLICA_URL`)
+when one is configured. Read-model and repository statement builders run
+unchanged on these sessions. `run_sync` runs sync code that needs the Flask
+application context (e.g. the in-process search index) in a worker thread.
+"""
+import asyncio
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.config import settings
+
+# Async drivers substituted for the sync ones, by backend.
+ASYNC_DRIVERS = {'postgresql': 'asyncpg', 'sqlite': 'aiosqlite'}
+
+# Engines and their session factories, keyed by whether they connect to the replica.
+_engines = {}
+_session_factories = {}
+_flask_app = None
+
+
+def async_database_url(url: str) -> str:
+    """Converts a sync database URL to use the async driver of its backend."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver is configured for '{url.get_backend_name()}' databases.")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _uses_replica(replica: bool) -> bool:
+    return replica and settings.READ_REPLICA_URL is not None
+
+
+def get_async_engine(replica: bool = False):
+    """Returns the primary's engine, or the replica's if `replica` is set and one is configured."""
+    replica = _uses_replica(replica)
+    if replica not in _engines:
+        if replica:
+            url = async_database_url(settings.READ_REPLICA_URL)
+        else:
+            url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+        engine = create_async_engine(url, pool_size=settings.ASYNC_DB_POOL_SIZE, pool_pre_ping=True)
+        _engines[replica] = engine
+        _session_factories[replica] = async_sessionmaker(engine, expire_on_commit=False)
+    return _engines[replica]
+
+
+def async_session(replica: bool = False):
+    """Returns a new `AsyncSession`, to be used as an async context manager."""
+    get_async_engine(replica)
+    return _session_factories[_uses_replica(replica)]()
+
+
+def init_async_db(flask_app):
+    """Binds the Flask app whose context `run_sync` provides."""
+    global _flask_app
+    _flask_app = flask_app
+
+
+async def run_sync(function, *args):
+    """Calls a sync function in a worker thread, inside the Flask application context."""
+    def call():
+        with _flask_app.app_context():
+            return function(*args)
+
+    return await asyncio.to_thread(call)
+
+
+async def dispose_async_engines():
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _session_factories.clear()
@@ -0,0 +1,481 @@
+"""
+Provides the two-tier cache used by the book catalog.
+
+Reads are served from a bounded in-process LRU (L1) in front of Redis (L2).
+Writes broadcast the keys they invalidate over Redis pub/sub so that every
+worker drops its L1 copies; the short L1 TTL bounds staleness should a
+message ever be missed. Rebuilds are single-flight and refreshed early.
+
+Cached book listings also embed the current catalog generation (or, for
+listings filtered by category, that category's generation) in their keys.
+A write bumps only the affected generations, which orphans every stale
+listing in O(1) without scanning Redis; orphaned keys simply expire.
+Each book and the category list have version counters of their own, which
+HTTP validators (ETags) are derived from.
+
+`AsyncTwoTierCache` serves the same entries to the asyncio read path, so the
+sync and async processes share L2 entries, keys and invalidations.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import struct
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from redis.exceptions import LockError
+from app.config import settings
+from app.core.redis_client import async_redis_client, redis_client
+from app.core.db_routing import mark_written
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATEGORIES_VERSION_KEY = "catalog:categories:version"
+# Read-your-writes scope (see `app.core.db_routing`) of the category list.
+CATEGORIES_SCOPE = "catalog:categories"
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Seconds Redis keeps an entry past its logical expiry, to be served while it is rebuilt.
+STALE_GRACE_SECONDS = 60
+# Upper bound on how long a single rebuild may hold the recomputation lock.
+REBUILD_LOCK_TIMEOUT = 10
+# How long a request with nothing to serve waits for another request's rebuild.
+REBUILD_WAIT_TIMEOUT = 2.0
+REBUILD_POLL_INTERVAL = 0.05
+# How long "no value" (compute returned None) is cached, so misses on absent keys are not rebuilt each time.
+NEGATIVE_CACHE_TTL = 5
+
+_MISSING = object()
+
+# `delta` is how long the value took to compute; `expires_at` is a Unix timestamp.
+CacheEntry = namedtuple('CacheEntry', ['value', 'delta', 'expires_at'])
+
+# In Redis an entry is stored as this fixed-size header followed by the payload bytes.
+# The magic prefix lets entries written in any other format be treated as misses;
+# negative entries (a cached None) use their own prefix and carry no payload.
+ENTRY_HEADER = struct.Struct('!4sdd')
+ENTRY_MAGIC = b'BC1\x00'
+NEGATIVE_ENTRY_MAGIC = b'BC0\x00'
+
+logger = logging.getLogger(__name__)
+
+
+def _pack_entry(entry) -> bytes:
+    if entry.value is None:
+        return ENTRY_HEADER.pack(NEGATIVE_ENTRY_MAGIC, entry.delta, entry.expires_at)
+    return ENTRY_HEADER.pack(ENTRY_MAGIC, entry.delta, entry.expires_at) + entry.value
+
+
+def _unpack_entry(payload):
+    """Returns the entry stored in a Redis value, or None if it was written in another format."""
+    if payload is None:
+        return None
+    if payload.startswith(NEGATIVE_ENTRY_MAGIC):
+        _, delta, expires_at = ENTRY_HEADER.unpack_from(payload)
+        return CacheEntry(None, delta, expires_at)
+    if not payload.startswith(ENTRY_MAGIC):
+        return None
+    _, delta, expires_at = ENTRY_HEADER.unpack_from(payload)
+    return CacheEntry(payload[ENTRY_HEADER.size:], delta, expires_at)
+
+
+class LocalCache:
+    """A thread-safe LRU cache bounded by entry count, with a per-entry TTL."""
+
+    def __init__(self, max_entries, ttl):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value, or `_MISSING` if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TwoTierCache:
+    """
+    Caches pre-serialized payloads (bytes) in an in-process L1 in front of Redis (L2).
+
+    Payloads are stored exactly as they are sent to clients, so a hit in either
+    tier costs no decode or re-encode, and an L1 hit no network round trip.
+
+    Recomputation is protected against stampedes: a short Redis lock lets a
+    single request rebuild an entry while the others keep serving the stale
+    value (or briefly wait for the rebuild when there is none), and entries are
+    refreshed probabilistically ahead of expiry (XFetch) so that hot keys are
+    rebuilt before they ever expire.
+    """
+
+    def __init__(self, redis, local, channel=INVALIDATION_CHANNEL, beta=1.0):
+        self._redis = redis
+        self._local = local
+        self._channel = channel
+        self._beta = beta
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'l1_hits': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 0,
+            'recomputes': 0, 'stale_served': 0
+        }
+
+    def record(self, name):
+        """Increments one of this worker's statistics counters (see `stats`)."""
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def ensure_listener(self):
+        """Starts this process's invalidation listener, if it is not running yet."""
+        # A forked worker inherits the parent's L1 entries but not its listener thread, so it would
+        # miss every invalidation published since the fork; it drops those entries and subscribes anew.
+        if self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._local.clear()
+            thread = threading.Thread(target=self._listen, name='cache-invalidation', daemon=True)
+            thread.start()
+            self._listener_pid = os.getpid()
+
+    def _listen(self):
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self._channel)
+                for message in pubsub.listen():
+                    self._local.delete(*json.loads(message['data']))
+            except Exception as error:
+                # Invalidations may have been missed while disconnected.
+                self._local.clear()
+                logger.warning(f"Cache invalidation listener disconnected: {error}")
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+    def read_local(self, key, count=True):
+        """Returns the L1 copy of an entry or counter, or `_MISSING`."""
+        value = self._local.get(key)
+        if count:
+            self.record('l1_misses' if value is _MISSING else 'l1_hits')
+        return value
+
+    def store_local(self, key, value):
+        """Keeps an entry or counter read from (or written to) Redis in L1."""
+        self._local.set(key, value)
+
+    def read_remote(self, key, payload, count=True):
+        """Returns the entry held in a Redis value read for the key, keeping it in L1, or None."""
+        entry = _unpack_entry(payload)
+        if count:
+            self.record('l2_misses' if entry is None else 'l2_hits')
+        if entry is not None:
+            self.store_local(key, entry)
+        return entry
+
+    def _read(self, key, count=True):
+        """Returns the cached entry for the key from L1 or L2, or None on a miss in both tiers."""
+        entry = self.read_local(key, count)
+        if entry is not _MISSING:
+            return entry
+        return self.read_remote(key, self._redis.get(key), count)
+
+    def _write(self, key, entry, ttl):
+        # Redis keeps the entry past its logical expiry so it can be served stale during a rebuild.
+        self._redis.set(key, _pack_entry(entry), ex=ttl + STALE_GRACE_SECONDS)
+        self.store_local(key, entry)
+
+    def needs_refresh(self, entry):
+        """Returns whether an entry is expired or due for an early refresh."""
+        # XFetch: the closer to expiry and the costlier the rebuild, the likelier an early refresh.
+        jitter = entry.delta * self._beta * -math.log(1.0 - random.random())
+        return time.time() + jitter >= entry.expires_at
+
+    def _recompute(self, key, compute, ttl):
+        started = time.time()
+        value = compute()
+        if value is None:
+            # Published briefly so that concurrent misses on an absent key return at once.
+            ttl = NEGATIVE_CACHE_TTL
+        finished = time.time()
+        self._write(key, CacheEntry(value, finished - started, finished + ttl), ttl)
+        self.record('recomputes')
+        return value
+
+    def get_or_compute(self, key, compute, ttl):
+        """
+        Returns the cached payload for the key, calling `compute` to rebuild it on a
+        miss or early refresh. `compute` must return bytes, or None for "no value",
+        which is cached for `NEGATIVE_CACHE_TTL` seconds.
+        """
+        self.ensure_listener()
+        entry = self._read(key)
+        if entry is not None and not self.needs_refresh(entry):
+            return entry.value
+
+        lock = self._redis.lock(f"lock:{key}", timeout=REBUILD_LOCK_TIMEOUT)
+        if lock.acquire(blocking=False):
+            try:
+                return self._recompute(key, compute, ttl)
+            finally:
+                try:
+                    lock.release()
+                except LockError:
+                    # The lock expired during a slow rebuild; another request may now hold it.
+                    pass
+
+        if entry is not None:
+            # Another request is rebuilding this entry; serve what we have meanwhile.
+            self.record('stale_served')
+            return entry.value
+
+        # Nothing to serve yet: wait briefly for the rebuilding request to publish its result.
+        deadline = time.monotonic() + REBUILD_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(REBUILD_POLL_INTERVAL)
+            entry = self._read(key, count=False)
+            if entry is not None:
+                return entry.value
+
+        return self._recompute(key, compute, ttl)
+
+    def get_counter(self, key):
+        """Returns an integer counter maintained in Redis with INCR, cached in L1."""
+        self.ensure_listener()
+        value = self._local.get(key)
+        if value is _MISSING:
+            value = int(self._redis.get(key) or 0)
+            self.store_local(key, value)
+        return value
+
+    def invalidate(self, delete_keys=(), incr_keys=()):
+        """
+        Deletes keys and increments counters in Redis in a single round trip,
+        then tells every worker to drop its L1 copies of them.
+        """
+        keys = list(delete_keys) + list(incr_keys)
+        if not keys:
+            return
+
+        pipe = self._redis.pipeline(transaction=False)
+        for key in incr_keys:
+            pipe.incr(key)
+        if delete_keys:
+            pipe.delete(*delete_keys)
+        pipe.publish(self._channel, json.dumps(keys))
+        pipe.execute()
+
+        self._local.delete(*keys)
+
+    def stats(self):
+        """Returns this worker's hit and miss counters for each tier."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            'l1': {'hits': stats['l1_hits'], 'misses': stats['l1_misses'], 'entries': len(self._local)},
+            'l2': {'hits': stats['l2_hits'], 'misses': stats['l2_misses']},
+            'recomputes': stats['recomputes'],
+            'stale_served': stats['stale_served'],
+        }
+
+
+class AsyncTwoTierCache:
+    """
+    The asyncio counterpart of a `TwoTierCache`, reading and writing the same
+    entries through an async Redis client.
+
+    It shares the L1, invalidation listener and statistics of the cache it
+    wraps, and protects rebuilds the same way. Writes and invalidations stay
+    on the sync path.
+    """
+
+    def __init__(self, redis, cache):
+        self._redis = redis
+        self._cache = cache
+
+    async def _read(self, key, count=True):
+        entry = self._cache.read_local(key, count)
+        if entry is not _MISSING:
+            return entry
+        return self._cache.read_remote(key, await self._redis.get(key), count)
+
+    async def _recompute(self, key, compute, ttl):
+        started = time.time()
+        value = await compute()
+        if value is None:
+            ttl = NEGATIVE_CACHE_TTL
+        finished = time.time()
+        entry = CacheEntry(value, finished - started, finished + ttl)
+        await self._redis.set(key, _pack_entry(entry), ex=ttl + STALE_GRACE_SECONDS)
+        self._cache.store_local(key, entry)
+        self._cache.record('recomputes')
+        return value
+
+    async def get_or_compute(self, key, compute, ttl):
+        """
+        Returns the cached payload for the key, awaiting `compute()` to rebuild it on
+        a miss or early refresh. `compute` must return bytes, or None for "no value",
+        which is cached for `NEGATIVE_CACHE_TTL` seconds.
+        """
+        self._cache.ensure_listener()
+        entry = await self._read(key)
+        if entry is not None and not self._cache.needs_refresh(entry):
+            return entry.value
+
+        lock = self._redis.lock(f"lock:{key}", timeout=REBUILD_LOCK_TIMEOUT)
+        if await lock.acquire(blocking=False):
+            try:
+                return await self._recompute(key, compute, ttl)
+            finally:
+                try:
+                    await lock.release()
+                except LockError:
+                    pass
+
+        if entry is not None:
+            self._cache.record('stale_served')
+            return entry.value
+
+        deadline = time.monotonic() + REBUILD_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(REBUILD_POLL_INTERVAL)
+            entry = await self._read(key, count=False)
+            if entry is not None:
+                return entry.value
+
+        return await self._recompute(key, compute, ttl)
+
+    async def get_counter(self, key):
+        """Returns an integer counter maintained in Redis with INCR, cached in L1."""
+        self._cache.ensure_listener()
+        value = self._cache.read_local(key, count=False)
+        if value is _MISSING:
+            value = int(await self._redis.get(key) or 0)
+            self._cache.store_local(key, value)
+        return value
+
+
+book_cache = TwoTierCache(
+    redis_client,
+    LocalCache(max_entries=settings.L1_CACHE_MAX_ENTRIES, ttl=settings.L1_CACHE_TTL)
+)
+async_book_cache = AsyncTwoTierCache(async_redis_client, book_cache)
+
+
+def _category_version_key(category_name: str) -> str:
+    return f"catalog:category:{category_name}:version"
+
+
+def _book_version_key(book_id: int) -> str:
+    return f"catalog:book:{book_id}:version"
+
+
+def book_version(book_id: int) -> int:
+    """Returns a counter that changes whenever the book's details may have changed."""
+    return book_cache.get_counter(_book_version_key(book_id))
+
+
+async def async_book_version(book_id: int) -> int:
+    return await async_book_cache.get_counter(_book_version_key(book_id))
+
+
+def categories_version() -> int:
+    """Returns a counter that changes whenever the category list may have changed."""
+    return book_cache.get_counter(CATEGORIES_VERSION_KEY)
+
+
+async def async_categories_version() -> int:
+    return await async_book_cache.get_counter(CATEGORIES_VERSION_KEY)
+
+
+def book_key(book_id: int) -> str:
+    """Returns the cache key of a single book's details."""
+    return f"book:{book_id}"
+
+
+def book_scope(book_id: int) -> str:
+    """Returns the read-your-writes scope of a book's details."""
+    return f"catalog:book:{book_id}"
+
+
+def listing_scope(category_name: str | None = None) -> str:
+    """Returns the read-your-writes scope of the book listings of a category, or of the whole catalog."""
+    return f"catalog:category:{category_name}" if category_name else "catalog:books"
+
+
+def _namespace_version_key(category_name: str | None) -> str:
+    return _category_version_key(category_name) if category_name else CATALOG_VERSION_KEY
+
+
+def _namespace(category_name: str | None, version: int) -> str:
+    if category_name:
+        return f"books:cat={category_name}:v{version}"
+    return f"books:v{version}"
+
+
+def catalog_namespace(category_name: str | None = None) -> str:
+    """Returns the key prefix for book listings under the current generation."""
+    return _namespace(category_name, book_cache.get_counter(_namespace_version_key(category_name)))
+
+
+async def async_catalog_namespace(category_name: str | None = None) -> str:
+    return _namespace(category_name, await async_book_cache.get_counter(_namespace_version_key(category_name)))
+
+
+def invalidate_catalog(book_ids=(), category_names=(), bump_catalog=True, bump_categories=False):
+    """
+    Invalidates cached data after a catalog write.
+
+    Deletes the detail entries and bumps the versions of the given books, and
+    bumps the generations of the given categories and, unless `bump_catalog`
+    is False, of the unfiltered catalog listings. `bump_categories` marks a
+    change to the category list itself.
+    """
+    book_ids, category_names = set(book_ids), set(category_names)
+    scopes = [listing_scope(category_name) for category_name in category_names]
+    scopes.extend(book_scope(book_id) for book_id in book_ids)
+    incr_keys = [_category_version_key(category_name) for category_name in category_names]
+    incr_keys.extend(_book_version_key(book_id) for book_id in book_ids)
+    if bump_catalog:
+        scopes.append(listing_scope())
+        incr_keys.append(CATALOG_VERSION_KEY)
+    if bump_categories:
+        scopes.append(CATEGORIES_SCOPE)
+        incr_keys.append(CATEGORIES_VERSION_KEY)
+
+    # Rebuilds of what this write invalidates read from the primary until the replica has caught up.
+    mark_written(*scopes)
+    book_cache.invalidate(
+        delete_keys=[book_key(book_id) for book_id in book_ids],
+        incr_keys=incr_keys
+    )
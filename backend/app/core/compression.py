@@ -0,0 +1,158 @@
+"""
+Provides response compression negotiated on Accept-Encoding.
+
+Cached payloads are compressed once, when they are computed, and stored
+together with their raw bytes as a packed entry; a cache hit then serves the
+variant the client accepts by copying a slice of the entry, without
+recompressing.
+Other responses are compressed on the fly by an `after_request` hook.
+Brotli is used when it is installed and accepted, gzip otherwise.
+"""
+import gzip
+import struct
+import zlib
+from flask import request
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+# A packed entry is this header (raw, gzip and brotli lengths) followed by the three bodies.
+# A variant's length is 0 when it was not produced.
+VARIANTS_HEADER = struct.Struct('!4sIII')
+VARIANTS_MAGIC = b'CV1\x00'
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/html', 'text/csv'}
+
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accepted=None):
+    """
+    Returns the preferred encoding in `accepted` (the parsed Accept-Encoding,
+    by default the current request's), or None.
+    """
+    if accepted is None:
+        accepted = request.accept_encodings
+    best = None
+    for encoding in supported_encodings():
+        quality = accepted[encoding]
+        if quality > 0 and (best is None or quality > accepted[best]):
+            best = encoding
+    return best
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(bytes(data), quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def pack_variants(payload: bytes) -> bytes:
+    """Packs a payload with its gzip and (if available) brotli variants, when it is large enough."""
+    if len(payload) < settings.COMPRESSION_MIN_SIZE:
+        gzipped = brotlied = b''
+    else:
+        gzipped = compress(payload, 'gzip')
+        brotlied = compress(payload, 'br') if brotli is not None else b''
+    return b''.join((
+        VARIANTS_HEADER.pack(VARIANTS_MAGIC, len(payload), len(gzipped), len(brotlied)),
+        payload, gzipped, brotlied
+    ))
+
+
+def select_variant(packed: bytes, accepted=None):
+    """
+    Returns the body to send for a packed entry and its encoding (None for the
+    raw payload), as accepted by the current request or `accepted`. Entries
+    that are not packed are returned as they are.
+    """
+    if packed[:len(VARIANTS_MAGIC)] != VARIANTS_MAGIC:
+        return packed, None
+
+    _, raw_length, gzip_length, brotli_length = VARIANTS_HEADER.unpack_from(packed)
+    raw_start = VARIANTS_HEADER.size
+    gzip_start = raw_start + raw_length
+    brotli_start = gzip_start + gzip_length
+
+    if gzip_length:
+        if accepted is None:
+            accepted = request.accept_encodings
+        encoding = negotiate_encoding(accepted)
+        if encoding == 'br' and brotli_length:
+            return packed[brotli_start:brotli_start + brotli_length], 'br'
+        if encoding is not None and accepted['gzip'] > 0:
+            return packed[gzip_start:brotli_start], 'gzip'
+    return packed[raw_start:gzip_start], None
+
+
+def encode_body(data: bytes, accepted=None):
+    """
+    Compresses a body that is not packed, if it is large enough and an encoding
+    is accepted. Returns the body and its encoding (None if left as is).
+    """
+    if len(data) < settings.COMPRESSION_MIN_SIZE:
+        return data, None
+    encoding = negotiate_encoding(accepted)
+    if encoding is None:
+        return data, None
+    return compress(data, encoding), encoding
+
+
+def _stream_compressed(chunks, encoding):
+    # Each chunk is flushed as it is produced, so streaming clients are not held back.
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+def mark_encoded(response, encoding):
+    """Labels a response whose body has been encoded, weakening its ETag as the bytes differ."""
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response):
+    """Compresses an eligible response on the fly, if the client accepts it."""
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough):
+        return response
+
+    if response.is_streamed:
+        encoding = negotiate_encoding()
+        response.vary.add('Accept-Encoding')
+        if encoding is not None:
+            response.response = _stream_compressed(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+            mark_encoded(response, encoding)
+        return response
+
+    data = response.get_data()
+    if len(data) < settings.COMPRESSION_MIN_SIZE:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body, encoding = encode_body(data)
+    if encoding is not None:
+        response.set_data(body)
+        mark_encoded(response, encoding)
+    return response
+
+
+def register_compression(app):
+    """Attaches on-the-fly response compression to the Flask app instance."""
+    app.after_request(compress_response)
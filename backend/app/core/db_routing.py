@@ -0,0 +1,110 @@
+"""
+Provides read/write routing between the primary database and the optional
+read replica (`READ_REPLICA_URL`).
+
+GET requests and read-only repository methods read from the replica, through
+`RoutingSession`. Because the replica lags behind, writes are followed by a
+short read-your-writes window (`READ_REPLICA_STICKY_SECONDS`), recorded in
+Redis under `db:sticky:<scope>`:
+
+- a user's own writes make their authenticated requests read from the
+  primary (checked when the JWT is resolved);
+- catalog writes make cache rebuilds of the payloads they invalidated (a
+  book's details, the listings of its categories and of the whole catalog,
+  the category list) read from the primary, so stale rows are never cached
+  past the write. Scopes are named by `app.core.cache`.
+
+Without a replica every helper here is a no-op and all reads use the primary.
+"""
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, request
+from app.config import settings
+from app.core.redis_client import async_redis_client, redis_client
+from app.core.routing_session import PRIMARY_READ_DEPTH, REPLICA_BIND_KEY, REPLICA_READ_DEPTH
+from app.extensions import db
+
+def replica_enabled() -> bool:
+    return settings.READ_REPLICA_URL is not None
+
+
+def _sticky_key(scope) -> str:
+    return f"db:sticky:{scope}"
+
+
+def mark_written(*scopes):
+    """Starts the read-your-writes window of the given scopes (user ids, or catalog scopes)."""
+    if replica_enabled() and scopes:
+        pipe = redis_client.pipeline(transaction=False)
+        for scope in scopes:
+            pipe.set(_sticky_key(scope), 1, ex=settings.READ_REPLICA_STICKY_SECONDS)
+        pipe.execute()
+
+
+def written_recently(scope) -> bool:
+    return replica_enabled() and bool(redis_client.exists(_sticky_key(scope)))
+
+
+async def async_written_recently(scope) -> bool:
+    return replica_enabled() and bool(await async_redis_client.exists(_sticky_key(scope)))
+
+
+def use_primary():
+    """Sends the rest of the current request's reads to the primary."""
+    g.db_use_primary = True
+
+
+def use_primary_if_written(scope):
+    """Reads from the primary for the rest of the request if the scope was written recently."""
+    if written_recently(scope):
+        use_primary()
+
+
+@contextmanager
+def _session_depth(key):
+    info = db.session.info
+    info[key] = info.get(key, 0) + 1
+    try:
+        yield
+    finally:
+        info[key] -= 1
+
+
+def replica_reads():
+    """Lets the reads of the block use the replica, unless the session has written or locked rows."""
+    return _session_depth(REPLICA_READ_DEPTH)
+
+
+def primary_reads():
+    """Sends the reads of the block to the primary, even in a GET request or read-only method."""
+    return _session_depth(PRIMARY_READ_DEPTH)
+
+
+def read_only(method):
+    """Marks a repository method whose reads may be served by the replica."""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def _route_request():
+    g.db_replica_reads = request.method in ('GET', 'HEAD')
+
+
+def _mark_request_writes(response):
+    # Writes by an authenticated user start their read-your-writes window.
+    payload = g.get('jwt_payload')
+    if g.get('db_wrote') and payload is not None:
+        mark_written(payload['sub'])
+    return response
+
+
+def register_db_routing(app):
+    """Attaches replica routing to the Flask app instance, if a replica is configured."""
+    if not replica_enabled():
+        return
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND_KEY: settings.READ_REPLICA_URL}
+    app.before_request(_route_request)
+    app.after_request(_mark_request_writes)
@@ -0,0 +1,74 @@
+"""
+Provides a Redis sorted-set delay queue for events that fire at a point in time.
+
+Each event is a member of the sorted set scored by the Unix timestamp it is
+due at. Consumers pop the events that have come due in batches; popping is
+a single Lua script, so concurrent consumers never receive the same event.
+The cost of a poll depends on the number of events due, not on how many are
+scheduled.
+"""
+from app.config import settings
+from app.core.redis_client import redis_client
+
+LOAN_EVENTS_KEY = "delay:loan_events"
+
+# Returns and removes up to ARGV[2] members scored at or before ARGV[1], with their scores.
+POP_DUE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+for i = 1, #items, 2 do
+    redis.call('ZREM', KEYS[1], items[i])
+end
+return items
+"""
+
+
+class DelayQueue:
+    """A delay queue of string events, each due at a Unix timestamp."""
+
+    def __init__(self, redis, key):
+        self._redis = redis
+        self._key = key
+        self._pop_due = redis.register_script(POP_DUE_SCRIPT)
+
+    def schedule(self, events: dict):
+        """Schedules `event -> due timestamp` entries; rescheduling an event moves it."""
+        if events:
+            self._redis.zadd(self._key, events)
+
+    def cancel(self, *events):
+        if events:
+            self._redis.zrem(self._key, *events)
+
+    def pop_due(self, now: float, limit: int):
+        """Atomically removes and returns up to `limit` `(event, due timestamp)` pairs due by `now`."""
+        items = self._pop_due(keys=[self._key], args=[now, limit])
+        return [(items[i].decode('utf-8'), float(items[i + 1])) for i in range(0, len(items), 2)]
+
+    def size(self) -> int:
+        return self._redis.zcard(self._key)
+
+    def lag(self, now: float) -> float:
+        """Returns how many seconds the oldest due event has been waiting, or 0."""
+        oldest = self._redis.zrange(self._key, 0, 0, withscores=True)
+        return max(now - oldest[0][1], 0.0) if oldest else 0.0
+
+
+loan_event_queue = DelayQueue(redis_client, LOAN_EVENTS_KEY)
+
+
+def loan_event(kind: str, loan_id: int) -> str:
+    return f"{kind}:{loan_id}"
+
+
+def parse_loan_event(event: str):
+    """Splits an event back into its kind and loan id."""
+    kind, loan_id = event.split(':', 1)
+    return kind, int(loan_id)
+
+
+def schedule_loan_due_events(loan_id: int, due_timestamp: float):
+    """Schedules a loan's due-date reminder and its overdue notice."""
+    loan_event_queue.schedule({
+        loan_event('reminder', loan_id): due_timestamp - settings.LOAN_REMINDER_LEAD_TIME,
+        loan_event('overdue', loan_id): due_timestamp,
+    })
@@ -0,0 +1,172 @@
+"""
+Maintains the JWT denylist and an in-process Bloom filter mirror of it.
+
+Revoked tokens are recorded in Redis as `denylist:{jti}` keys that expire with
+the token, in a sorted set scored by expiry (used to rebuild the mirror), and
+on a Redis stream that every worker tails to keep its Bloom filter current.
+Since almost no token is revoked, a Bloom filter miss proves a token is valid
+without contacting Redis; only a (possibly false) positive is checked there.
+"""
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from app.config import settings
+from app.core.redis_client import redis_client
+
+DENYLIST_KEY_PREFIX = "denylist:"
+DENYLIST_INDEX_KEY = "denylist:index"
+DENYLIST_STREAM_KEY = "denylist:events"
+
+# The stream only needs to cover the time between two rebuilds.
+STREAM_MAX_LENGTH = 100000
+STREAM_BLOCK_MS = 5000
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings, using double hashing."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self._size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self._hash_count = max(int(round(self._size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self._size + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self._size for i in range(self._hash_count)]
+
+    def add(self, item):
+        with self._lock:
+            for position in self._positions(item):
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    The JWT denylist with a local Bloom filter mirror kept in sync over a Redis stream.
+
+    Until a worker's mirror has been built (and whenever its sync is broken),
+    every check falls back to Redis.
+    """
+
+    def __init__(self, redis, capacity, error_rate, rebuild_interval):
+        self._redis = redis
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._rebuild_interval = rebuild_interval
+        self._filter = None
+        self._healthy = False
+        self._sync_pid = None
+        self._sync_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'filter_negatives': 0, 'redis_checks': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _ensure_sync(self):
+        # A forked worker inherits the parent's filter but not the thread tailing new revocations, so
+        # until its own sync thread has rebuilt the filter every check falls through to Redis.
+        if self._sync_pid == os.getpid():
+            return
+        with self._sync_lock:
+            if self._sync_pid == os.getpid():
+                return
+            self._healthy = False
+            thread = threading.Thread(target=self._sync, name='denylist-sync', daemon=True)
+            thread.start()
+            self._sync_pid = os.getpid()
+
+    def _rebuild(self):
+        """Builds a fresh filter from the unexpired entries; returns the stream id to tail from."""
+        now = time.time()
+        self._redis.zremrangebyscore(DENYLIST_INDEX_KEY, '-inf', now)
+
+        # Read the stream position first, so no revocation can fall between the snapshot and the tail.
+        latest = self._redis.xrevrange(DENYLIST_STREAM_KEY, count=1)
+        last_id = latest[0][0] if latest else b'0-0'
+
+        jtis = self._redis.zrangebyscore(DENYLIST_INDEX_KEY, now, '+inf')
+        bloom = BloomFilter(max(self._capacity, 2 * len(jtis)), self._error_rate)
+        for jti in jtis:
+            bloom.add(jti.decode('utf-8'))
+
+        self._filter = bloom
+        return last_id
+
+    def _sync(self):
+        while True:
+            try:
+                last_id = self._rebuild()
+                rebuilt_at = time.monotonic()
+                self._healthy = True
+
+                # Rebuild periodically to shed expired entries, or once the filter fills up.
+                while (time.monotonic() - rebuilt_at < self._rebuild_interval
+                       and self._filter.count < self._filter.capacity):
+                    response = self._redis.xread({DENYLIST_STREAM_KEY: last_id}, block=STREAM_BLOCK_MS)
+                    for _, events in response or ():
+                        for event_id, fields in events:
+                            self._filter.add(fields[b'jti'].decode('utf-8'))
+                            last_id = event_id
+            except Exception as error:
+                self._healthy = False
+                logger.warning(f"Denylist sync disconnected: {error}")
+                time.sleep(1)
+
+    def revoke(self, jti: str, expires_at: float):
+        """Revokes a token until its expiry time (a Unix timestamp)."""
+        time_to_expire = int(math.ceil(expires_at - time.time()))
+        if time_to_expire <= 0:
+            return
+
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.set(f"{DENYLIST_KEY_PREFIX}{jti}", "true", ex=time_to_expire)
+        pipe.zadd(DENYLIST_INDEX_KEY, {jti: expires_at})
+        pipe.xadd(DENYLIST_STREAM_KEY, {'jti': jti}, maxlen=STREAM_MAX_LENGTH, approximate=True)
+        pipe.execute()
+
+        bloom = self._filter
+        if bloom is not None:
+            bloom.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        """Checks whether a token has been revoked, consulting Redis only on a filter hit."""
+        self._ensure_sync()
+        bloom = self._filter
+        if self._healthy and bloom is not None and jti not in bloom:
+            self._count('filter_negatives')
+            return False
+
+        self._count('redis_checks')
+        return bool(self._redis.exists(f"{DENYLIST_KEY_PREFIX}{jti}"))
+
+    def stats(self):
+        """Returns this worker's filter state and lookup counters."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        bloom = self._filter
+        stats.update({'healthy': self._healthy, 'entries': bloom.count if bloom is not None else 0})
+        return stats
+
+
+revocation_list = RevocationList(
+    redis_client,
+    capacity=settings.DENYLIST_BLOOM_CAPACITY,
+    error_rate=settings.DENYLIST_BLOOM_ERROR_RATE,
+    rebuild_interval=settings.DENYLIST_REBUILD_INTERVAL
+)
@@ -8,8 +8,10 @@ from werkzeug.exceptions import NotFound, MethodNotAllowed
 from .exceptions import (
     ConcurrencyException, BookNotAvailableException,
     MissingTokenException, InvalidTokenException, ExpiredTokenException,
-    AdminAccessRequiredException
+    AdminAccessRequiredException, InvalidCursorException, HashingPoolSaturatedException,
+    InvalidImportException
 )
+from app.config import settings
 
 def register_error_handlers(app):
     """Attaches all custom error handlers to the Flask app instance."""
@@ -27,6 +29,16 @@ def register_error_handlers(app):
         # Handles database race conditions (409 Conflict).
         return jsonify({"error": str(error)}), 409
 
+    @app.errorhandler(InvalidCursorException)
+    def handle_invalid_cursor(error):
+        # Handles malformed pagination cursors (400 Bad Request).
+        return jsonify({"error": str(error)}), 400
+
+    @app.errorhandler(InvalidImportException)
+    def handle_invalid_import(error):
+        # Handles unreadable import uploads (400 Bad Request).
+        return jsonify({"error": str(error)}), 400
+
     @app.errorhandler(BookNotAvailableException)
     def handle_book_not_available(error):
         return jsonify({"error": str(error)}), 404
@@ -43,6 +55,13 @@ def register_error_handlers(app):
         # Handles authorization errors for admin routes (403 Forbidden).
         return jsonify({"error": str(error)}), 403
 
+    @app.errorhandler(HashingPoolSaturatedException)
+    def handle_hashing_pool_saturated(error):
+        # Sheds load when password hashing is at capacity (503 Service Unavailable).
+        response = jsonify({"error": str(error)})
+        response.headers['Retry-After'] = str(settings.HASH_POOL_RETRY_AFTER)
+        return response, 503
+
     @app.errorhandler(ValueError)
     def handle_value_error(error):
         # Catches custom ValueErrors, e.g., for duplicate items (409 Conflict).
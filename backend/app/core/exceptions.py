@@ -27,4 +27,17 @@ class ExpiredTokenException(AuthException):
 
 class AdminAccessRequiredException(AuthException):
     """Raised when a non-admin user tries to access an admin-only resource."""
-    pass
\ No newline at end of file
+    pass
+
+
+class InvalidCursorException(Exception):
+    """Raised when a pagination cursor is malformed or has been tampered with."""
+    pass
+
+class HashingPoolSaturatedException(Exception):
+    """Raised when the password hashing pool is at capacity and cannot accept more work."""
+    pass
+
+class InvalidImportException(Exception):
+    """Raised when a catalog import stream cannot be read, e.g. because it is not valid UTF-8."""
+    pass
@@ -1,35 +1,117 @@
 """
 Provides utility functions for handling file uploads, such as book images.
+
+Uploads are streamed to disk in chunks and stored under the SHA-256 hash of
+their content, so re-uploading an image reuses the stored file and a stored
+file never changes. Resized and WebP variants are generated later, off the
+request path.
 """
+import hashlib
+import logging
 import os
-import uuid
+import tempfile
 from werkzeug.utils import secure_filename
 from flask import current_app
 
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on the deployment
+    Image = None
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+# Uploads are copied to disk this many bytes at a time.
+CHUNK_SIZE = 64 * 1024
+
+# Image variants, by name: the bounding box they are resized into (None keeps the
+# original size). All variants are encoded as WebP.
+IMAGE_VARIANTS = {
+    'thumbnail': (200, 300),
+    'medium': (600, 900),
+    'webp': None,
+}
+WEBP_QUALITY = 80
+
+logger = logging.getLogger(__name__)
+
 def allowed_file(filename):
     """Checks if a file's extension is in the list of allowed types."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _fsync_directory(path):
+    # Makes a rename within the directory durable.
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+def upload_url(filename):
+    return f"/uploads/{filename}"
+
 def save_book_image(file):
     """
-    Saves an uploaded book image with a secure, unique filename.
+    Streams an uploaded book image to disk under its content hash and makes it durable.
     Returns the public URL path to the saved image.
     """
     if not file or not allowed_file(file.filename):
         raise ValueError("Invalid file type or no file selected.")
 
-    # Create a secure and unique filename to prevent conflicts and path traversal attacks.
+    # The extension is taken from a sanitized name; the content hash makes the name unique.
     filename = secure_filename(file.filename)
     extension = filename.rsplit('.', 1)[1].lower()
-    unique_filename = f"{uuid.uuid4()}.{extension}"
-
-    # Save the file to the configured upload folder.
     upload_folder = current_app.config['UPLOAD_FOLDER']
-    save_path = os.path.join(upload_folder, unique_filename)
-    file.save(save_path)
 
-    # Return the public-facing URL path.
-    return f"/uploads/{unique_filename}"
\ No newline at end of file
+    digest = hashlib.sha256()
+    descriptor, temp_path = tempfile.mkstemp(dir=upload_folder, prefix='.upload-')
+    try:
+        with os.fdopen(descriptor, 'wb') as temp_file:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                temp_file.write(chunk)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        # Temporary files are private; stored images are readable by a fronting web server.
+        os.chmod(temp_path, 0o644)
+
+        content_filename = f"{digest.hexdigest()}.{extension}"
+        save_path = os.path.join(upload_folder, content_filename)
+        if os.path.exists(save_path):
+            # The same image was uploaded before; keep the stored copy.
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, save_path)
+            _fsync_directory(upload_folder)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return upload_url(content_filename)
+
+def generate_image_variants(upload_folder, filename):
+    """
+    Writes the resized WebP variants of a stored image, skipping those that already exist.
+    Returns their public URL paths by variant name, or None if Pillow is not installed.
+    """
+    if Image is None:
+        logger.warning("Pillow is not installed; image variants are not generated.")
+        return None
+
+    stem = filename.rsplit('.', 1)[0]
+    variant_urls = {}
+    with Image.open(os.path.join(upload_folder, filename)) as original:
+        for name, size in IMAGE_VARIANTS.items():
+            variant_filename = f"{stem}-{name}.webp"
+            variant_path = os.path.join(upload_folder, variant_filename)
+            if not os.path.exists(variant_path):
+                variant = original.convert('RGBA' if original.mode in ('RGBA', 'LA', 'P') else 'RGB')
+                if size is not None:
+                    variant.thumbnail(size)
+                # Written under a temporary name so a variant is never served half-written.
+                temp_path = f"{variant_path}.tmp"
+                variant.save(temp_path, 'WEBP', quality=WEBP_QUALITY)
+                os.replace(temp_path, variant_path)
+            variant_urls[name] = upload_url(variant_filename)
+    return variant_urls
@@ -0,0 +1,121 @@
+"""
+Runs bcrypt password hashing in a bounded process pool.
+
+Hashing is CPU-bound and holds the GIL for hundreds of milliseconds, so it is
+moved off the request threads into worker processes. Admission is bounded:
+once every worker is busy and the queue is full, callers are rejected at once
+with `HashingPoolSaturatedException` rather than piling up behind the pool.
+A slot is only freed once its job has actually left the pool, so requests
+that time out never let more work in than the bound allows.
+
+Workers are started by a fork server rather than forked from the web worker,
+which runs background threads and holds open sockets.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+from app.config import settings
+from app.core.exceptions import HashingPoolSaturatedException
+
+
+class PasswordHasher:
+    """Hashes and verifies bcrypt passwords in a shared process pool with admission control."""
+
+    def __init__(self, workers, queue_limit, timeout, rounds):
+        self._workers = workers
+        self._queue_limit = queue_limit
+        self._timeout = timeout
+        self._rounds = rounds
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._rejected = 0
+
+    def _get_executor(self):
+        # A pool inherited through fork is unusable, so each worker process creates its own.
+        if self._executor_pid != os.getpid():
+            with self._executor_lock:
+                if self._executor_pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self._workers, mp_context=multiprocessing.get_context('forkserver')
+                    )
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def _release(self, future):
+        # Runs once the job has finished, failed or been cancelled, and so has left the pool.
+        with self._stats_lock:
+            self._in_flight -= 1
+            if not future.cancelled():
+                if future.exception() is None:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+        self._slots.release()
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._rejected += 1
+            raise HashingPoolSaturatedException('The server is busy. Please try again shortly.')
+
+        with self._stats_lock:
+            self._in_flight += 1
+        try:
+            future = self._get_executor().submit(function, *args)
+        except BaseException:
+            with self._stats_lock:
+                self._in_flight -= 1
+                self._failed += 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout=self._timeout)
+        except FutureTimeoutError:
+            # A job still queued is dropped; a running one keeps its slot until it finishes.
+            future.cancel()
+            with self._stats_lock:
+                self._timed_out += 1
+            raise HashingPoolSaturatedException('The server is busy. Please try again shortly.')
+
+    def generate_password_hash(self, password: str) -> str:
+        """Returns the bcrypt hash of a password, using the configured cost."""
+        salt = bcrypt.gensalt(self._rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check_password_hash(self, password_hash: str, password: str) -> bool:
+        """Checks a password against a bcrypt hash."""
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def stats(self):
+        """Returns this worker's pool occupancy and admission counters."""
+        with self._stats_lock:
+            return {
+                'workers': self._workers,
+                'queue_limit': self._queue_limit,
+                'in_flight': self._in_flight,
+                'occupancy': min(self._in_flight, self._workers) / self._workers,
+                'queued': max(self._in_flight - self._workers, 0),
+                'completed': self._completed,
+                'failed': self._failed,
+                'timed_out': self._timed_out,
+                'rejected': self._rejected,
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.HASH_POOL_WORKERS,
+    queue_limit=settings.HASH_POOL_QUEUE_LIMIT,
+    timeout=settings.HASH_POOL_TIMEOUT,
+    rounds=settings.BCRYPT_LOG_ROUNDS
+)
@@ -0,0 +1,44 @@
+"""
+Provides HTTP conditional GET (ETag / If-None-Match) for JSON endpoints.
+
+ETags are derived from cheap version counters rather than from the response
+body, so a request whose validator still matches is answered with 304 before
+the body is loaded or serialized.
+"""
+import hashlib
+from flask import current_app, request
+from app.core.compression import mark_encoded, negotiate_encoding, select_variant
+
+
+def make_etag(*parts) -> str:
+    """Derives an opaque ETag from the values that determine a response."""
+    return hashlib.blake2b(':'.join(map(str, parts)).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def conditional_json(etag: str, load_body):
+    """
+    Answers with 304 Not Modified if the request's If-None-Match matches `etag`.
+    Otherwise sends the JSON bytes returned by `load_body`, or returns None if
+    it returns None; packed entries are sent in the variant the client accepts.
+    Clients are asked to revalidate before reusing a response.
+    """
+    # The ETag is weak whenever the client accepts a compressed variant, whether or not this
+    # body ends up compressed, so that a 304 carries the same validator as the 200 would.
+    weak = negotiate_encoding() is not None
+    # Clients send weak ETags back as they received them.
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        body = load_body()
+        if body is None:
+            return None
+        body, encoding = select_variant(body)
+        response = current_app.response_class(body, mimetype='application/json')
+        if encoding is not None:
+            mark_encoded(response, encoding)
+
+    response.set_etag(etag, weak=weak)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,127 @@
+"""
+Sends email over a pool of reused SMTP connections.
+
+Opening an SMTP session (TCP connect, EHLO, STARTTLS, AUTH) costs several
+round trips, so connections are kept open and reused across messages and
+batches. A batch is sent by a thread pool with one connection per thread in
+use. A connection the server has dropped is reopened once before a message
+is given up on.
+"""
+import logging
+import os
+import queue
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """A fixed-size pool of persistent SMTP connections with a matching sender thread pool."""
+
+    def __init__(self, host, port, username=None, password=None, use_tls=False, size=4, timeout=10.0):
+        self._host = host
+        self._port = port
+        self._username = username
+        self._password = password
+        self._use_tls = use_tls
+        self._size = size
+        self._timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # A forked worker inherits the parent's open SMTP sockets, which two processes cannot share
+        # mid-session, and an executor without threads; both are replaced on first use in the child.
+        if self._executor_pid != os.getpid():
+            with self._executor_lock:
+                if self._executor_pid != os.getpid():
+                    self._idle = queue.LifoQueue()
+                    self._executor = ThreadPoolExecutor(max_workers=self._size, thread_name_prefix='smtp-sender')
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def _connect(self):
+        connection = smtplib.SMTP(self._host, self._port, timeout=self._timeout)
+        if self._use_tls:
+            connection.starttls()
+        if self._username:
+            connection.login(self._username, self._password)
+        return connection
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    def _send(self, message: EmailMessage):
+        connection = self._acquire()
+        try:
+            try:
+                connection.send_message(message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # The server closed an idle connection; retry once on a fresh one.
+                connection.close()
+                connection = self._connect()
+                connection.send_message(message)
+        except Exception:
+            self._discard(connection)
+            raise
+        self._idle.put(connection)
+
+    def send_batch(self, messages: list):
+        """
+        Sends the messages concurrently over pooled connections.
+        Returns the indexes of the messages that could not be sent.
+        """
+        futures = [self._get_executor().submit(self._send, message) for message in messages]
+        failed = []
+        for index, future in enumerate(futures):
+            try:
+                future.result()
+            except Exception as error:
+                # The caller requeues failed messages, so no error may escape and lose the batch.
+                logger.warning(f"Failed to send email to {messages[index]['To']}: {error}")
+                failed.append(index)
+        return failed
+
+    def close(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+mail_pool = SMTPConnectionPool(
+    settings.SMTP_HOST,
+    settings.SMTP_PORT,
+    username=settings.SMTP_USERNAME,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_USE_TLS,
+    size=settings.SMTP_POOL_SIZE,
+    timeout=settings.SMTP_TIMEOUT
+)
+
+
+def build_message(recipient: str, subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message['From'] = settings.MAIL_SENDER
+    message['To'] = recipient
+    message['Subject'] = subject
+    message.set_content(body)
+    return message
@@ -0,0 +1,84 @@
+"""
+Provides the Redis queue that coalesces pending loan notifications into batches.
+
+Producers push small JSON records; the notification flusher drains them in
+batches and records its delivery counters in a Redis hash, so that any
+process can report throughput and queue lag.
+"""
+import time
+from app.core import serialization
+from app.core.redis_client import redis_client
+
+NOTIFICATION_QUEUE_KEY = "notifications:pending"
+NOTIFICATION_STATS_KEY = "notifications:stats"
+COUNTER_STATS = ('sent_total', 'failed_total', 'last_batch_size')
+
+
+class NotificationQueue:
+    """A FIFO of `(kind, loan_id)` notifications with delivery statistics."""
+
+    def __init__(self, redis, key, stats_key):
+        self._redis = redis
+        self._key = key
+        self._stats_key = stats_key
+
+    def enqueue(self, kind: str, loan_id: int):
+        self.enqueue_many([(kind, loan_id)])
+
+    def enqueue_many(self, notifications):
+        """Queues `(kind, loan_id)` pairs in a single round trip."""
+        now = time.time()
+        records = [
+            serialization.dumps({"kind": kind, "loan_id": loan_id, "enqueued_at": now, "attempts": 0})
+            for kind, loan_id in notifications
+        ]
+        if records:
+            self._redis.rpush(self._key, *records)
+
+    def requeue(self, records: list):
+        """Puts failed records back at the tail, counting the attempt but keeping their age."""
+        if records:
+            self._redis.rpush(self._key, *(
+                serialization.dumps({**record, "attempts": record["attempts"] + 1}) for record in records
+            ))
+
+    def take(self, limit: int) -> list:
+        """Atomically removes and returns up to `limit` records from the head of the queue."""
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.lrange(self._key, 0, limit - 1)
+        pipe.ltrim(self._key, limit, -1)
+        payloads, _ = pipe.execute()
+        return [serialization.loads(payload) for payload in payloads]
+
+    def record_batch(self, sent: int, failed: int, elapsed: float):
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hincrby(self._stats_key, 'sent_total', sent)
+        pipe.hincrby(self._stats_key, 'failed_total', failed)
+        pipe.hset(self._stats_key, mapping={
+            'last_batch_size': sent + failed,
+            'last_batch_seconds': elapsed,
+            'last_sent_per_second': sent / elapsed if elapsed > 0 else 0.0,
+            'last_flushed_at': time.time(),
+        })
+        pipe.execute()
+
+    def stats(self):
+        """Returns the queue depth and lag (age of the oldest pending record) with the delivery counters."""
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.llen(self._key)
+        pipe.lindex(self._key, 0)
+        pipe.hgetall(self._stats_key)
+        pending, head, counters = pipe.execute()
+
+        stats = {}
+        for key, value in counters.items():
+            key = key.decode('utf-8')
+            stats[key] = int(value) if key in COUNTER_STATS else float(value)
+        stats.update({
+            'pending': pending,
+            'lag': max(time.time() - serialization.loads(head)['enqueued_at'], 0.0) if head else 0.0,
+        })
+        return stats
+
+
+notification_queue = NotificationQueue(redis_client, NOTIFICATION_QUEUE_KEY, NOTIFICATION_STATS_KEY)
@@ -0,0 +1,34 @@
+"""
+Provides helpers for keyset (cursor) pagination.
+
+Cursors are opaque to clients: they carry the sort key of the last row
+of a page, encoded as URL-safe base64 JSON.
+"""
+import base64
+import binascii
+import json
+from app.core.exceptions import InvalidCursorException
+
+
+def encode_cursor(position: dict) -> str:
+    """Encodes the sort key of the last row on a page into an opaque token."""
+    raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> dict:
+    """
+    Decodes a token produced by `encode_cursor`.
+    An empty token denotes the first page and decodes to an empty dict.
+    """
+    if not token:
+        return {}
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursorException('Invalid pagination cursor.')
+
+    if not isinstance(position, dict):
+        raise InvalidCursorException('Invalid pagination cursor.')
+    return position
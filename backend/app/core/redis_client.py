@@ -1,5 +1,10 @@
 import redis
+import redis.asyncio
 from app.config import settings
 
 # Create a Redis client instance that can be imported and used by other parts of the app
-redis_client = redis.from_url(settings.REDIS_URL)
\ No newline at end of file
+redis_client = redis.from_url(settings.REDIS_URL)
+
+# The asyncio counterpart, used by the async read path (see `asgi.py`). It connects lazily,
+# on the event loop that first uses it.
+async_redis_client = redis.asyncio.from_url(settings.REDIS_URL)
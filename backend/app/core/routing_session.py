@@ -0,0 +1,57 @@
+"""
+Provides the SQLAlchemy session that routes reads to a read replica.
+
+When a `replica` bind is configured, plain SELECTs go to the replica if they
+run in a GET request or inside a read-only repository method (see
+`app.core.db_routing`). Everything else stays on the primary: flushes,
+INSERT/UPDATE/DELETE and other statements, and `SELECT ... FOR UPDATE`.
+Once a session has written or locked rows, its later reads stay on the
+primary as well, so a transaction always sees its own writes.
+"""
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, event
+
+REPLICA_BIND_KEY = 'replica'
+
+# `Session.info` keys.
+PINNED_TO_PRIMARY = 'db_pinned_to_primary'
+REPLICA_READ_DEPTH = 'db_replica_read_depth'
+PRIMARY_READ_DEPTH = 'db_primary_read_depth'
+
+
+class RoutingSession(Session):
+    """A Flask-SQLAlchemy session that sends eligible reads to the `replica` bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engines = self._db.engines
+        if bind is None and REPLICA_BIND_KEY in engines:
+            if self._flushing or not isinstance(clause, Select) or clause._for_update_arg is not None:
+                self.pin_to_primary()
+            elif not self.info.get(PINNED_TO_PRIMARY) and self._reads_from_replica():
+                return engines[REPLICA_BIND_KEY]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self):
+        if self.info.get(PRIMARY_READ_DEPTH, 0) > 0:
+            return False
+        if has_request_context():
+            if g.get('db_use_primary'):
+                return False
+            if g.get('db_replica_reads'):
+                return True
+        return self.info.get(REPLICA_READ_DEPTH, 0) > 0
+
+    def pin_to_primary(self):
+        """Sends this session's statements to the primary until its transaction (or request) ends."""
+        self.info[PINNED_TO_PRIMARY] = True
+        if has_request_context():
+            g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _unpin_after_transaction(session, transaction):
+    # Outside requests (workers, CLI) a session outlives its transactions. Within a request the
+    # pin is kept, so objects committed by the request are never refreshed from the replica.
+    if transaction.parent is None and not has_request_context():
+        session.info.pop(PINNED_TO_PRIMARY, None)
@@ -0,0 +1,144 @@
+"""
+Provides a pure-Python inverted index for catalog search.
+
+It backs `BookRepository.search_and_filter` on databases without a native
+full-text search engine (e.g. SQLite), replacing leading-wildcard ILIKE scans.
+"""
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Matches in the title count for more than matches in the author name.
+FIELD_WEIGHTS = {'title': 2.0, 'author': 1.0}
+
+# A query term that only matches the beginning of a token scores less than an exact match.
+PREFIX_MATCH_WEIGHT = 0.5
+
+
+def tokenize(text):
+    """Splits text into lowercase word tokens."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    A thread-safe, in-memory inverted index mapping tokens to weighted postings.
+
+    The index is rebuilt from its loader once it is older than `max_age` seconds,
+    so that every worker process converges on the catalog's current state.
+    """
+
+    def __init__(self, loader, max_age=300):
+        self._loader = loader
+        self._max_age = max_age
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)  # token -> {doc_id: weight}
+        self._documents = {}  # doc_id -> set of tokens
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+        self._built_at = None
+
+    def _ensure_fresh(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self._max_age:
+            self.rebuild()
+
+    def rebuild(self):
+        """Replaces the index contents with the documents yielded by the loader."""
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._documents = {}
+            for doc_id, fields in self._loader():
+                self._add(doc_id, fields)
+            self._vocabulary_dirty = True
+            self._built_at = time.monotonic()
+
+    def _add(self, doc_id, fields):
+        tokens = set()
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for token in tokenize(text):
+                postings = self._postings[token]
+                postings[doc_id] = postings.get(doc_id, 0.0) + weight
+                tokens.add(token)
+        self._documents[doc_id] = tokens
+
+    def _remove(self, doc_id):
+        for token in self._documents.pop(doc_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+        self._vocabulary_dirty = True
+
+    def upsert(self, doc_id, fields):
+        """Adds a document to the index, replacing any previous version of it."""
+        with self._lock:
+            if self._built_at is None:
+                # Nothing to update yet; the first search builds the full index.
+                return
+            self._remove(doc_id)
+            self._add(doc_id, fields)
+            self._vocabulary_dirty = True
+
+    def remove(self, doc_id):
+        """Removes a document from the index."""
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(doc_id)
+
+    def _matching_tokens(self, term):
+        """Returns (token, weight) pairs for tokens equal to or starting with the term."""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+
+        start = bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            yield token, 1.0 if token == term else PREFIX_MATCH_WEIGHT
+
+    def search(self, query):
+        """
+        Returns the ids of documents matching every term in the query,
+        ordered by descending TF-IDF relevance and then by id.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            self._ensure_fresh()
+            total_documents = max(len(self._documents), 1)
+            scores = None
+
+            for term in dict.fromkeys(terms):
+                term_scores = {}
+                for token, match_weight in self._matching_tokens(term):
+                    postings = self._postings[token]
+                    idf = math.log(1 + total_documents / len(postings))
+                    for doc_id, weight in postings.items():
+                        score = weight * idf * match_weight
+                        if score > term_scores.get(doc_id, 0.0):
+                            term_scores[doc_id] = score
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        doc_id: score + term_scores[doc_id]
+                        for doc_id, score in scores.items() if doc_id in term_scores
+                    }
+                if not scores:
+                    return []
+
+        return [doc_id for doc_id, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))]
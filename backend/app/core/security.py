@@ -5,17 +5,82 @@ from functools import wraps
 from flask import request, g
 import jwt
 from app.config import settings
-from app.models import User
+from app.core import serialization
+from app.core.cache import LocalCache, TwoTierCache
 from app.core.exceptions import (
     MissingTokenException, InvalidTokenException, ExpiredTokenException,
     AdminAccessRequiredException
 )
 from app.core.redis_client import redis_client
+from app.core.denylist import revocation_list
+from app.core.db_routing import primary_reads, use_primary_if_written
+from app.repositories.user_repository import UserRepository
+
+user_repo = UserRepository()
+
+# Resolved principals are cached per worker and in Redis, so most requests
+# authenticate without touching the database.
+principal_cache = TwoTierCache(
+    redis_client,
+    LocalCache(max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES, ttl=settings.PRINCIPAL_CACHE_TTL),
+    channel="principal:invalidate"
+)
+
+
+def _principal_key(user_id) -> str:
+    return f"principal:{user_id}"
+
+
+class Principal:
+    """
+    The authenticated user, resolved from the principal cache.
+
+    Exposes `id`, `username`, `email` and `role` directly; any other attribute
+    lazily loads the full `User` row on first access.
+    """
+
+    def __init__(self, data: dict):
+        self._record = None
+        self.id = data['id']
+        self.username = data['username']
+        self.email = data['email']
+        self.role = data['role']
+
+    def __getattr__(self, name):
+        if self._record is None:
+            self._record = user_repo.get_by_id(self.id)
+        return getattr(self._record, name)
+
+
+def _load_principal(user_id):
+    """Returns the cached principal for a user id, or None if the user does not exist."""
+
+    def load_user():
+        # A lagging replica could re-cache a principal from before a write (e.g. a revoked role)
+        # for the whole cache TTL, so principals are always loaded from the primary.
+        with primary_reads():
+            user = user_repo.get_by_id(user_id)
+        if user is None:
+            return None
+        return serialization.dumps(
+            {'id': user.id, 'username': user.username, 'email': user.email, 'role': user.role}
+        )
+
+    payload = principal_cache.get_or_compute(
+        _principal_key(user_id), load_user, ttl=settings.PRINCIPAL_CACHE_TTL
+    )
+    return Principal(serialization.loads(payload)) if payload else None
+
+
+def invalidate_principal(user_id):
+    """Drops a user's cached principal from every worker; call this after changing the user."""
+    principal_cache.invalidate(delete_keys=[_principal_key(user_id)])
+
 
 def _get_current_user_from_token():
     """
     Decodes the JWT from the Authorization header, validates it,
-    and retrieves the corresponding user from the database.
+    and resolves the corresponding user through the principal cache.
     """
     auth_header = request.headers.get('Authorization')
     if not auth_header:
@@ -31,10 +96,13 @@ def _get_current_user_from_token():
         jti = payload.get('jti')
 
         # Check if the token has been revoked (logged out).
-        if not jti or redis_client.get(f"denylist:{jti}"):
+        if not jti or revocation_list.is_revoked(jti):
             raise InvalidTokenException('Token has been revoked.')
 
-        user = User.query.get(payload['sub'])
+        # A user's requests read their own recent writes from the primary, not the lagging replica.
+        use_primary_if_written(payload['sub'])
+
+        user = _load_principal(payload['sub'])
         if user is None:
             raise InvalidTokenException('User not found.')
 
@@ -0,0 +1,17 @@
+"""
+Provides the JSON codec used for cached payloads and pre-serialized responses.
+
+Uses orjson, which produces compact UTF-8 bytes, so cached payloads can be
+sent as-is.
+"""
+import orjson
+
+
+def dumps(data) -> bytes:
+    """Serializes data to compact JSON bytes."""
+    return orjson.dumps(data)
+
+
+def loads(payload):
+    """Deserializes JSON bytes or text."""
+    return orjson.loads(payload)
@@ -1,8 +1,7 @@
 # app/extensions.py
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from flask_bcrypt import Bcrypt
+from app.core.routing_session import RoutingSession
 
-db = SQLAlchemy()
-migrate = Migrate()
-bcrypt = Bcrypt()
\ No newline at end of file
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = Migrate()
\ No newline at end of file
@@ -2,4 +2,5 @@
 from .user import User
 from .category import Category
 from .book import Book, BookCopy
-from .loan import Loan
\ No newline at end of file
+from .loan import Loan
+from .outbox import OutboxMessage
\ No newline at end of file
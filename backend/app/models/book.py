@@ -15,10 +15,17 @@ class Book(db.Model):
     isbn = db.Column(db.String(13), unique=True, nullable=False)
     publication_year = db.Column(db.Integer)
     image_url = db.Column(db.String(255), nullable=True)
+    # URLs of the resized/WebP variants of `image_url`, by variant name; filled in asynchronously.
+    image_variants = db.Column(db.JSON, nullable=True)
     deleted_at = db.Column(db.DateTime, nullable=True, index=True)
 
+    # Denormalized counts of non-deleted copies, maintained by the loan and inventory paths.
+    total_copies = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    available_copies = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     # Many-to-Many relationship to Category
-    categories = db.relationship('Category', secondary=book_category_link, lazy='subquery',
+    # Lazy by default; public read paths select categories through the book read model.
+    categories = db.relationship('Category', secondary=book_category_link, lazy='select',
                                  backref=db.backref('books', lazy=True))
 
     # One-to-Many relationship to BookCopy
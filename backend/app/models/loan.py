@@ -10,5 +10,12 @@ class Loan(db.Model):
     due_date = db.Column(db.DateTime, nullable=False)
     return_date = db.Column(db.DateTime, nullable=True)
 
+    # Active loans are listed, and keyset-paginated, by (due_date, id).
+    __table_args__ = (
+        db.Index('ix_loans_active_due_date', 'due_date', 'id',
+                 postgresql_where=db.text('return_date IS NULL'),
+                 sqlite_where=db.text('return_date IS NULL')),
+    )
+
     user = db.relationship('User', backref=db.backref('loans', lazy=True))
     book_copy = db.relationship('BookCopy', backref=db.backref('loans', lazy=True))
\ No newline at end of file
@@ -0,0 +1,11 @@
+from app.extensions import db
+import datetime
+
+# A Celery task enqueue, recorded in the same transaction as the write that triggers it
+# and handed to the broker afterwards by the outbox relay.
+class OutboxMessage(db.Model):
+    __tablename__ = 'outbox_messages'
+    id = db.Column(db.Integer, primary_key=True)
+    task_name = db.Column(db.String(200), nullable=False)
+    args = db.Column(db.JSON, nullable=False, default=list)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
@@ -0,0 +1,8 @@
+"""
+ORM-free read models for the hot list endpoints.
+
+Each module builds SQLAlchemy Core statements that select only the columns a
+response needs, and maps the resulting rows straight to the response dicts.
+Statement builders are kept separate from their execution so they can be run
+on any connection. Writes keep using the repositories and ORM models.
+"""
@@ -0,0 +1,92 @@
+"""
+Reads public book payloads (the `BookPublic` shape) without hydrating ORM objects.
+
+A book's categories are aggregated into a JSON array by the database, so a
+whole page is fetched in one statement.
+"""
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from app.core import serialization
+from app.extensions import db
+from app.models import Book, Category
+from app.models.book import book_category_link
+
+
+def _categories_json(dialect_name: str):
+    # Keys are inlined as literals, since drivers that prepare statements cannot type bound keys.
+    fields = (literal_column("'id'"), Category.id, literal_column("'name'"), Category.name)
+    if dialect_name == 'postgresql':
+        category = func.json_build_object(*fields)
+        aggregate = func.json_agg(aggregate_order_by(category, Category.id))
+    else:
+        category = func.json_object(*fields)
+        aggregate = func.json_group_array(category)
+
+    return (
+        select(aggregate)
+        .select_from(book_category_link.join(Category, Category.id == book_category_link.c.category_id))
+        .where(book_category_link.c.book_id == Book.id)
+        .correlate(Book)
+        .scalar_subquery()
+    )
+
+
+def select_books(book_ids: list, dialect_name: str):
+    """Builds the statement selecting the public columns of the given active books."""
+    return select(
+        Book.id,
+        Book.title,
+        Book.author,
+        Book.isbn,
+        Book.publication_year,
+        Book.description,
+        Book.image_url,
+        Book.image_variants,
+        _categories_json(dialect_name).label('categories'),
+        Book.total_copies,
+        Book.available_copies
+    ).where(Book.id.in_(book_ids), Book.deleted_at.is_(None))
+
+
+def map_book_row(row) -> dict:
+    """Maps a row of `select_books` to a `BookPublic`-shaped dict."""
+    categories = row.categories
+    if categories is None:
+        categories = []
+    elif isinstance(categories, (str, bytes)):
+        # Databases without a native JSON type return the aggregate as text.
+        categories = serialization.loads(categories)
+
+    return {
+        "id": row.id,
+        "title": row.title,
+        "author": row.author,
+        "isbn": row.isbn,
+        "publication_year": row.publication_year,
+        "description": row.description,
+        "image_url": row.image_url,
+        "image_variants": row.image_variants,
+        "categories": categories,
+        "total_copies": row.total_copies,
+        "available_copies": row.available_copies
+    }
+
+
+def order_books(rows, book_ids: list) -> list:
+    """Maps rows to dicts in the order of `book_ids`, skipping books that no longer exist."""
+    books_by_id = {row.id: map_book_row(row) for row in rows}
+    return [books_by_id[book_id] for book_id in book_ids if book_id in books_by_id]
+
+
+def fetch_books(book_ids: list) -> list:
+    """Returns the public payloads of the given active books, in the given order."""
+    if not book_ids:
+        return []
+    rows = db.session.execute(select_books(book_ids, db.engine.dialect.name))
+    return order_books(rows, book_ids)
+
+
+def fetch_book(book_id: int):
+    """Returns the public payload of an active book, or None."""
+    books = fetch_books([book_id])
+    return books[0] if books else None
@@ -0,0 +1,25 @@
+"""
+Reads public category payloads (the `CategoryPublic` shape) without hydrating ORM objects.
+"""
+from sqlalchemy import select
+from app.extensions import db
+from app.models import Category
+
+
+def select_active_categories():
+    """Builds the statement selecting the public columns of all active categories."""
+    return select(
+        Category.id,
+        Category.name,
+        Category.description
+    ).where(Category.deleted_at.is_(None)).order_by(Category.id)
+
+
+def map_category_row(row) -> dict:
+    """Maps a row of `select_active_categories` to a `CategoryPublic`-shaped dict."""
+    return {"id": row.id, "name": row.name, "description": row.description}
+
+
+def fetch_active_categories() -> list:
+    """Returns the public payloads of all active categories."""
+    return [map_category_row(row) for row in db.session.execute(select_active_categories())]
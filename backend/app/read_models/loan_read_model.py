@@ -0,0 +1,108 @@
+"""
+Reads the admin view of active loans (the `AdminLoanView` shape) without hydrating ORM objects.
+"""
+from sqlalchemy import and_, or_, select
+from werkzeug.http import http_date
+from app.extensions import db
+from app.models import Book, BookCopy, Loan, User
+
+
+def select_active_loans(after=None, limit=None):
+    """
+    Builds the statement selecting active loans with their borrowers and books,
+    soonest due first. `after` is the `(due_date, id)` of the last loan already
+    seen, for keyset pagination.
+    """
+    statement = (
+        select(
+            Loan.id,
+            Loan.loan_date,
+            Loan.due_date,
+            User.id.label('user_id'),
+            User.username,
+            User.email,
+            BookCopy.id.label('book_copy_id'),
+            Book.id.label('book_id'),
+            Book.title,
+            Book.author
+        )
+        .join(User, User.id == Loan.user_id)
+        .join(BookCopy, BookCopy.id == Loan.book_copy_id)
+        .join(Book, Book.id == BookCopy.book_id)
+        .where(Loan.return_date.is_(None))
+        .order_by(Loan.due_date.asc(), Loan.id.asc())
+    )
+    if after is not None:
+        due_date, loan_id = after
+        statement = statement.where(or_(
+            Loan.due_date > due_date,
+            and_(Loan.due_date == due_date, Loan.id > loan_id)
+        ))
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def map_active_loan_row(row) -> dict:
+    """Maps a row of `select_active_loans` to an `AdminLoanView`-shaped dict."""
+    # Dates are formatted the way Flask's JSON provider formats datetimes.
+    return {
+        "id": row.id,
+        "loan_date": http_date(row.loan_date),
+        "due_date": http_date(row.due_date),
+        "user": {"id": row.user_id, "username": row.username, "email": row.email},
+        "book_copy": {
+            "id": row.book_copy_id,
+            "book": {"id": row.book_id, "title": row.title, "author": row.author}
+        }
+    }
+
+
+def fetch_active_loans() -> list:
+    """Returns the admin view of all active loans."""
+    return [map_active_loan_row(row) for row in db.session.execute(select_active_loans())]
+
+
+def fetch_active_loans_after(after, limit: int):
+    """
+    Returns the admin view of up to `limit` active loans following `after`,
+    and the `(due_date, id)` to continue from, or None on the last page.
+    """
+    rows = db.session.execute(select_active_loans(after, limit + 1)).all()
+    next_position = (rows[limit - 1].due_date, rows[limit - 1].id) if len(rows) > limit else None
+    return [map_active_loan_row(row) for row in rows[:limit]], next_position
+
+
+def stream_active_loans(batch_size: int):
+    """
+    Yields the admin view of every active loan in batches (lists) of up to
+    `batch_size`, reading them through a server-side cursor where supported.
+    """
+    result = db.session.execute(select_active_loans(), execution_options={'yield_per': batch_size})
+    for rows in result.partitions():
+        yield [map_active_loan_row(row) for row in rows]
+
+
+def select_loan_notifications(loan_ids: list):
+    """Builds the statement selecting what loan notifications need about the given loans."""
+    return (
+        select(
+            Loan.id,
+            Loan.due_date,
+            Loan.return_date,
+            User.username,
+            User.email,
+            Book.title
+        )
+        .join(User, User.id == Loan.user_id)
+        .join(BookCopy, BookCopy.id == Loan.book_copy_id)
+        .join(Book, Book.id == BookCopy.book_id)
+        .where(Loan.id.in_(loan_ids))
+    )
+
+
+def fetch_loan_notifications(loan_ids: list) -> dict:
+    """Returns `loan_id -> row` for the given loans."""
+    if not loan_ids:
+        return {}
+    return {row.id: row for row in db.session.execute(select_loan_notifications(loan_ids))}
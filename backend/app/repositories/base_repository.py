@@ -13,6 +13,9 @@ class BaseRepository:
     def add(self, entity):
         db.session.add(entity)
 
+    def flush(self):
+        db.session.flush()
+
     def commit(self):
         db.session.commit()
 
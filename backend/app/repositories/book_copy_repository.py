@@ -1,26 +1,69 @@
 from .base_repository import BaseRepository
 from app.models import BookCopy
 from app.extensions import db
+from app.core.db_routing import read_only
+from sqlalchemy import insert
 import datetime
 
 class BookCopyRepository(BaseRepository):
     def __init__(self):
         super().__init__(BookCopy)
 
-    def find_available_for_book(self, book_id):
+    def claim_available_for_book(self, book_id):
+        # Picks and locks any available copy in one statement; rows locked by
+        # concurrent claims are skipped instead of waited on.
         return db.session.query(self.model).filter_by(
             book_id=book_id,
             status='available',
             deleted_at=None
-        ).first()
+        ).order_by(self.model.id).limit(1).with_for_update(skip_locked=True).first()
 
     def get_and_lock(self, copy_id):
         return db.session.query(self.model).filter(
             self.model.id == copy_id
         ).with_for_update(nowait=True).first()
 
+    def lock_active_by_ids(self, copy_ids: list):
+        """Locks the given non-deleted copies; returns their `(id, book_id, status)` rows."""
+        return db.session.query(self.model.id, self.model.book_id, self.model.status).filter(
+            self.model.id.in_(copy_ids),
+            self.model.deleted_at.is_(None)
+        ).order_by(self.model.id).with_for_update(nowait=True).all()
+
+    def soft_delete_by_ids(self, copy_ids: list):
+        db.session.query(self.model).filter(self.model.id.in_(copy_ids)).update(
+            {'deleted_at': datetime.datetime.utcnow()}, synchronize_session=False
+        )
+
+    def set_status_by_ids(self, copy_ids: list, status: str):
+        db.session.query(self.model).filter(self.model.id.in_(copy_ids)).update({
+            self.model.status: status,
+            self.model.version: self.model.version + 1
+        }, synchronize_session=False)
+
     def soft_delete_by_book_id(self, book_id):
         self.model.query.filter(
             self.model.book_id == book_id,
             self.model.deleted_at.is_(None)
-        ).update({'deleted_at': datetime.datetime.utcnow()})
\ No newline at end of file
+        ).update({'deleted_at': datetime.datetime.utcnow()})
+
+    @read_only
+    def paginate_for_book(self, book_id, page, per_page):
+        paginated_copies = db.session.query(self.model).filter(
+            self.model.book_id == book_id,
+            self.model.deleted_at.is_(None)
+        ).order_by(self.model.id).paginate(page=page, per_page=per_page, error_out=False)
+        return paginated_copies.items, paginated_copies.pages, paginated_copies.total
+
+    def bulk_insert_for_books(self, copy_counts: dict) -> list:
+        """Inserts `count` available copies for each `book_id -> count` entry; returns their ids."""
+        rows = [
+            {'book_id': book_id, 'status': 'available', 'version': 1}
+            for book_id, count in copy_counts.items() for _ in range(count)
+        ]
+        if not rows:
+            return []
+        result = db.session.execute(
+            insert(self.model).returning(self.model.id, sort_by_parameter_order=True), rows
+        )
+        return list(result.scalars())
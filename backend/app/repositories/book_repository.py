@@ -1,29 +1,241 @@
+import math
+from bisect import bisect_right
+from sqlalchemy import case, exists, func, insert, or_, select
 from .base_repository import BaseRepository
-from app.models import Book, Category
+from app.models import Book, BookCopy, Category
+from app.models.book import book_category_link
 from app.extensions import db
+from app.core.db_routing import read_only
+from app.config import settings
+from app.core.search_index import InvertedIndex, tokenize
+
+
+def _load_search_documents():
+    rows = db.session.query(Book.id, Book.title, Book.author).filter(Book.deleted_at.is_(None))
+    for book_id, title, author in rows.yield_per(1000):
+        yield book_id, {'title': title, 'author': author}
+
+
+# In-process fallback index for databases without native full-text search.
+catalog_index = InvertedIndex(_load_search_documents, max_age=settings.SEARCH_INDEX_MAX_AGE)
+
+
+def _search_document():
+    # Must match the expression of the `ix_books_search_document` GIN index.
+    return func.setweight(func.to_tsvector('simple', func.coalesce(Book.title, '')), 'A').op('||')(
+        func.setweight(func.to_tsvector('simple', func.coalesce(Book.author, '')), 'B')
+    )
+
+
+def _copy_count_subquery(available_only=False):
+    query = select(func.count(BookCopy.id)).where(
+        BookCopy.book_id == Book.id,
+        BookCopy.deleted_at.is_(None)
+    )
+    if available_only:
+        query = query.where(BookCopy.status == 'available')
+    return query.scalar_subquery()
+
+
+def _search_tsquery(terms):
+    return func.to_tsquery('simple', ' & '.join(f"{term}:*" for term in terms))
+
 
 class BookRepository(BaseRepository):
     def __init__(self):
         super().__init__(Book)
 
-    def get_active_by_id(self, book_id: int):
-            # This method finds a book only if it has not been soft-deleted.
-        return db.session.query(self.model).filter(
+    def exists_active(self, book_id: int) -> bool:
+        return db.session.query(exists().where(
             self.model.id == book_id,
             self.model.deleted_at.is_(None)
-        ).first()
+        )).scalar()
 
-    def search_and_filter(self, page, per_page, search_query, category_name):
-        query = db.session.query(self.model).filter(self.model.deleted_at.is_(None))
+    @staticmethod
+    def uses_search_index(terms, dialect_name: str) -> bool:
+        """Whether a search must use the in-process index, as the database has no full-text search."""
+        return bool(terms) and dialect_name != 'postgresql'
+
+    @staticmethod
+    def page_bounds(page, per_page):
+        """Mirrors Flask-SQLAlchemy's `paginate(error_out=False)` argument handling."""
+        return max(page, 1), per_page if per_page >= 1 else 20
+
+    def select_matching_ids(self, terms, category_name):
+        """Builds the statement selecting the ids of the active books matching the terms and category."""
+        # Searches select ids only; the matching books are hydrated by the read model.
+        query = select(self.model.id).where(self.model.deleted_at.is_(None))
 
         if category_name:
-            query = query.join(Book.categories).filter(Category.name == category_name)
+            query = query.join(Book.categories).where(Category.name == category_name)
+
+        if terms:
+            # Every term must match a word prefix of the title or author.
+            query = query.where(_search_document().op('@@')(_search_tsquery(terms)))
+
+        return query
+
+    def select_page_ids(self, terms, category_name, page, per_page):
+        """Builds the statement selecting one page of matching ids, ranked by relevance when searching."""
+        query = self.select_matching_ids(terms, category_name)
+        if terms:
+            rank = func.ts_rank(_search_document(), _search_tsquery(terms))
+            query = query.order_by(rank.desc(), self.model.id)
+        else:
+            query = query.order_by(self.model.id)
+        return query.limit(per_page).offset((page - 1) * per_page)
+
+    def select_ids_after(self, terms, category_name, after_id, limit):
+        """Builds the statement selecting up to `limit` + 1 matching ids greater than `after_id`."""
+        query = self.select_matching_ids(terms, category_name)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        # One extra row tells whether another page follows.
+        return query.order_by(self.model.id).limit(limit + 1)
+
+    @staticmethod
+    def select_count(query):
+        """Builds the statement counting the rows of a statement."""
+        return select(func.count()).select_from(query.order_by(None).subquery())
+
+    @read_only
+    def search_and_filter(self, page, per_page, search_query, category_name):
+        """Returns the ids of one page of matching books, the page count and the total."""
+        terms = tokenize(search_query)
+        if self.uses_search_index(terms, db.engine.dialect.name):
+            return self._search_with_index(page, per_page, search_query, category_name)
+
+        page, per_page = self.page_bounds(page, per_page)
+        total_items = db.session.scalar(self.select_count(self.select_matching_ids(terms, category_name)))
+        book_ids = db.session.scalars(self.select_page_ids(terms, category_name, page, per_page)).all()
+        return book_ids, math.ceil(total_items / per_page), total_items
+
+    @read_only
+    def search_after(self, after_id, limit, search_query, category_name, include_total=False):
+        """
+        Keyset pagination ordered by primary key: returns the ids of up to `limit` books
+        with an id greater than `after_id`, whether more rows follow, and the total
+        number of matches (only when `include_total` is set, otherwise None).
+        """
+        terms = tokenize(search_query)
+        if self.uses_search_index(terms, db.engine.dialect.name):
+            return self._search_after_with_index(after_id, limit, search_query, category_name, include_total)
+
+        total_items = None
+        if include_total:
+            total_items = db.session.scalar(self.select_count(self.select_matching_ids(terms, category_name)))
+
+        book_ids = db.session.scalars(self.select_ids_after(terms, category_name, after_id, limit)).all()
+        return book_ids[:limit], len(book_ids) > limit, total_items
+
+    def _ranked_index_matches(self, search_query, category_name):
+        ranked_ids = catalog_index.search(search_query)
+
+        if category_name and ranked_ids:
+            category_book_ids = {
+                book_id for (book_id,) in db.session.query(book_category_link.c.book_id)
+                .join(Category, Category.id == book_category_link.c.category_id)
+                .filter(Category.name == category_name)
+            }
+            ranked_ids = [book_id for book_id in ranked_ids if book_id in category_book_ids]
+
+        return ranked_ids
+
+    def _search_with_index(self, page, per_page, search_query, category_name):
+        page, per_page = self.page_bounds(page, per_page)
+        ranked_ids = self._ranked_index_matches(search_query, category_name)
+
+        total_items = len(ranked_ids)
+        total_pages = math.ceil(total_items / per_page)
+        page_ids = ranked_ids[(page - 1) * per_page:page * per_page]
+        return page_ids, total_pages, total_items
+
+    def _search_after_with_index(self, after_id, limit, search_query, category_name, include_total):
+        matching_ids = sorted(self._ranked_index_matches(search_query, category_name))
+        start = bisect_right(matching_ids, after_id) if after_id is not None else 0
+        page_ids = matching_ids[start:start + limit + 1]
+
+        total_items = len(matching_ids) if include_total else None
+        return page_ids[:limit], len(page_ids) > limit, total_items
+
+    def index_book(self, book):
+        """Adds or refreshes a book in the in-process search index."""
+        if book.deleted_at is not None:
+            catalog_index.remove(book.id)
+            return
+        catalog_index.upsert(book.id, {'title': book.title, 'author': book.author})
+
+    def index_documents(self, documents):
+        """Adds `(id, title, author)` tuples to the in-process search index."""
+        for book_id, title, author in documents:
+            catalog_index.upsert(book_id, {'title': title, 'author': author})
+
+    def unindex_book(self, book_id: int):
+        """Removes a book from the in-process search index."""
+        catalog_index.remove(book_id)
+
+    def adjust_copy_counts(self, book_id: int, total_delta: int = 0, available_delta: int = 0):
+        # Applied as a single UPDATE so concurrent adjustments never lose increments.
+        db.session.query(self.model).filter(self.model.id == book_id).update({
+            self.model.total_copies: self.model.total_copies + total_delta,
+            self.model.available_copies: self.model.available_copies + available_delta
+        }, synchronize_session=False)
+
+    def adjust_copy_counts_bulk(self, deltas: dict):
+        """Applies `book_id -> (total_delta, available_delta)` adjustments in a single UPDATE."""
+        if not deltas:
+            return
+        total_delta = case({book_id: delta[0] for book_id, delta in deltas.items()}, value=self.model.id, else_=0)
+        available_delta = case({book_id: delta[1] for book_id, delta in deltas.items()}, value=self.model.id, else_=0)
+        db.session.query(self.model).filter(self.model.id.in_(list(deltas))).update({
+            self.model.total_copies: self.model.total_copies + total_delta,
+            self.model.available_copies: self.model.available_copies + available_delta
+        }, synchronize_session=False)
+
+    def find_ids_with_copy_count_drift(self):
+        return [
+            book_id for (book_id,) in db.session.query(self.model.id).filter(or_(
+                self.model.total_copies != _copy_count_subquery(),
+                self.model.available_copies != _copy_count_subquery(available_only=True)
+            ))
+        ]
+
+    def recount_copies(self, book_ids: list):
+        db.session.query(self.model).filter(self.model.id.in_(book_ids)).update({
+            self.model.total_copies: _copy_count_subquery(),
+            self.model.available_copies: _copy_count_subquery(available_only=True)
+        }, synchronize_session=False)
+
+    def get_category_names(self, book_ids: list) -> list:
+        """Returns the names of the categories of any of the given books."""
+        return [
+            name for (name,) in db.session.query(Category.name).distinct()
+            .join(book_category_link, book_category_link.c.category_id == Category.id)
+            .filter(book_category_link.c.book_id.in_(book_ids))
+        ]
+
+    def set_image_variants(self, book_id: int, image_url: str, image_variants: dict) -> bool:
+        """Records the variants of a book's image, unless the image has been replaced since."""
+        updated = db.session.query(self.model).filter(
+            self.model.id == book_id,
+            self.model.image_url == image_url
+        ).update({self.model.image_variants: image_variants}, synchronize_session=False)
+        return updated > 0
+
+    def find_existing_isbns(self, isbns: list) -> set:
+        # Soft-deleted books still hold their ISBN, so they are included.
+        return {
+            isbn for (isbn,) in db.session.query(self.model.isbn).filter(self.model.isbn.in_(isbns))
+        }
 
-        if search_query:
-            search_filter = f"%{search_query}%"
-            query = query.filter(
-                (Book.title.ilike(search_filter)) | (Book.author.ilike(search_filter))
-            )
+    def bulk_insert(self, rows: list) -> list:
+        """Inserts book rows in one multi-row INSERT; returns their ids in the order given."""
+        result = db.session.execute(
+            insert(self.model).returning(self.model.id, sort_by_parameter_order=True), rows
+        )
+        return list(result.scalars())
 
-        paginated_books = query.paginate(page=page, per_page=per_page, error_out=False)
-        return paginated_books.items, paginated_books.pages, paginated_books.total
\ No newline at end of file
+    def bulk_link_categories(self, links: list):
+        """Inserts `{'book_id', 'category_id'}` rows into the book/category link table."""
+        if links:
+            db.session.execute(insert(book_category_link), links)
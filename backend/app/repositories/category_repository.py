@@ -1,5 +1,6 @@
 from .base_repository import BaseRepository
 from app.models import Category
+from app.models.book import book_category_link
 from app.extensions import db
 
 class CategoryRepository(BaseRepository):
@@ -9,5 +10,14 @@ class CategoryRepository(BaseRepository):
     def get_by_ids(self, category_ids: list):
         return db.session.query(self.model).filter(self.model.id.in_(category_ids)).all()
 
-    def get_all_active(self): 
-        return db.session.query(self.model).filter(self.model.deleted_at.is_(None)).all()
\ No newline at end of file
+    def get_book_ids(self, category_id: int):
+        return [
+            book_id for (book_id,) in db.session.query(book_category_link.c.book_id)
+            .filter(book_category_link.c.category_id == category_id)
+        ]
+
+    def get_active_ids_by_names(self, names: list) -> dict:
+        return {
+            name: category_id for category_id, name in db.session.query(self.model.id, self.model.name)
+            .filter(self.model.name.in_(names), self.model.deleted_at.is_(None))
+        }
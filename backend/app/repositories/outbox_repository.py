@@ -0,0 +1,25 @@
+from .base_repository import BaseRepository
+from app.models import OutboxMessage
+from app.extensions import db
+from sqlalchemy import func
+
+class OutboxRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(OutboxMessage)
+
+    def add_message(self, task_name: str, args: list):
+        # Only staged in the session: it commits, or rolls back, with the caller's transaction.
+        self.add(self.model(task_name=task_name, args=args))
+
+    def claim_batch(self, limit: int):
+        # Rows locked by a concurrent relay are skipped, so relays never hand off the same message.
+        return db.session.query(self.model).order_by(self.model.id).limit(limit).with_for_update(
+            skip_locked=True
+        ).all()
+
+    def delete_by_ids(self, message_ids: list):
+        db.session.query(self.model).filter(self.model.id.in_(message_ids)).delete(synchronize_session=False)
+
+    def get_backlog(self):
+        """Returns the number of pending messages and the creation time of the oldest."""
+        return db.session.query(func.count(self.model.id), func.min(self.model.created_at)).one()
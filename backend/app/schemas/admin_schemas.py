@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Literal
 
 class BookCreate(BaseModel):
     title: str
@@ -16,3 +16,35 @@ class BookUpdate(BaseModel):
     publication_year: Optional[int] = None
     description: Optional[str] = None
     category_ids: Optional[List[int]] = None
+
+class BookImportRow(BaseModel):
+    # Bounded like the `books` columns, so an oversized value rejects its row instead of its batch.
+    title: str = Field(min_length=1, max_length=200)
+    author: str = Field(min_length=1, max_length=150)
+    isbn: str = Field(min_length=1, max_length=13)
+    publication_year: Optional[int] = None
+    description: Optional[str] = None
+    categories: List[str] = []
+    copies: int = Field(0, ge=0, le=1000)
+
+    @field_validator('categories', mode='before')
+    @classmethod
+    def split_categories(cls, value):
+        # CSV cells hold category names separated by '|'.
+        if isinstance(value, str):
+            return [name.strip() for name in value.split('|') if name.strip()]
+        return value
+
+# Batch inventory operations are capped per request.
+MAX_COPY_BATCH = 1000
+
+class CopyBatchCreate(BaseModel):
+    count: int = Field(gt=0, le=MAX_COPY_BATCH)
+
+class CopyBatchDelete(BaseModel):
+    copy_ids: List[int] = Field(min_length=1, max_length=MAX_COPY_BATCH)
+
+class CopyStatusUpdate(BaseModel):
+    copy_ids: List[int] = Field(min_length=1, max_length=MAX_COPY_BATCH)
+    # 'loaned' is set and cleared only by the loan workflow.
+    status: Literal['available', 'maintenance']
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 # These schemas prevent accidentally exposing private data
 # and ensure a consistent API response structure.
@@ -26,8 +26,10 @@ class BookPublic(BaseModel):
     publication_year: Optional[int] = None
     description: Optional[str] = None
     image_url: Optional[str] = None
+    image_variants: Optional[Dict[str, str]] = None
     categories: List[CategoryPublic] = []
-    copies: List[BookCopyPublic] = []
+    total_copies: int = 0
+    available_copies: int = 0
 
     class Config:
         from_attributes = True
\ No newline at end of file
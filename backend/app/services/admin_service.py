@@ -2,11 +2,13 @@
 Contains administrative logic for managing the book catalog.
 """
 from app.models import Book, BookCopy, Category
-from app.schemas.admin_schemas import BookCreate, BookUpdate
-from app.core.redis_client import redis_client
-from sqlalchemy.exc import IntegrityError
+from app.schemas.admin_schemas import BookCreate, BookUpdate, CopyBatchCreate, CopyBatchDelete, CopyStatusUpdate
+from app.core.cache import invalidate_catalog
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app.core.exceptions import ConcurrencyException
 import datetime
 from app.core import file_handler
+from app.services import outbox_service
 
 from app.repositories.book_repository import BookRepository
 from app.repositories.book_copy_repository import BookCopyRepository
@@ -16,6 +18,10 @@ book_repo = BookRepository()
 book_copy_repo = BookCopyRepository()
 category_repo = CategoryRepository()
 
+def _enqueue_image_processing(book: Book):
+    # Variants are generated by a worker once the book's transaction commits.
+    outbox_service.enqueue_task('app.tasks.generate_book_image_variants', book.id, book.image_url)
+
 def create_book(book_data: BookCreate, image_file=None):
     """Creates a new book."""
     new_book = Book(
@@ -29,17 +35,23 @@ def create_book(book_data: BookCreate, image_file=None):
         categories = category_repo.get_by_ids(book_data.category_ids)
         new_book.categories.extend(categories)
 
+    if image_file:
+        # The original is durable on disk before the book referencing it commits.
+        new_book.image_url = file_handler.save_book_image(image_file)
+
     book_repo.add(new_book)
     try:
+        book_repo.flush()
+        if new_book.image_url:
+            _enqueue_image_processing(new_book)
         book_repo.commit()
     except IntegrityError:
         book_repo.rollback()
         raise ValueError(f"A book with ISBN {book_data.isbn} already exists.")
 
-    if image_file:
-        image_url = file_handler.save_book_image(image_file)
-        new_book.image_url = image_url
-        book_repo.commit()
+    book_repo.index_book(new_book)
+    # Also drops any "no such book" entry cached for the new id.
+    invalidate_catalog(book_ids=[new_book.id], category_names=[category.name for category in new_book.categories])
 
     return new_book
 
@@ -49,6 +61,9 @@ def update_book(book_id: int, book_data: BookUpdate, image_file=None):
     if not book:
         return None
 
+    # Listings of the categories the book leaves are affected as well.
+    previous_category_names = [category.name for category in book.categories]
+
     for key, value in book_data.model_dump(exclude_unset=True).items():
         if key == "category_ids":
             categories = category_repo.get_by_ids(value)
@@ -57,8 +72,9 @@ def update_book(book_id: int, book_data: BookUpdate, image_file=None):
             setattr(book, key, value)
 
     if image_file:
-        image_url = file_handler.save_book_image(image_file)
-        book.image_url = image_url
+        book.image_url = file_handler.save_book_image(image_file)
+        book.image_variants = None
+        _enqueue_image_processing(book)
 
     try:
         book_repo.commit()
@@ -66,9 +82,13 @@ def update_book(book_id: int, book_data: BookUpdate, image_file=None):
         book_repo.rollback()
         raise ValueError(f"A book with the provided ISBN already exists.")
 
+    book_repo.index_book(book)
+
     # Must remove the old data from cache to avoid serving stale information.
-    cache_key = f"book:{book_id}"
-    redis_client.delete(cache_key)
+    invalidate_catalog(
+        book_ids=[book_id],
+        category_names=previous_category_names + [category.name for category in book.categories]
+    )
 
     return book
 
@@ -80,11 +100,13 @@ def delete_book(book_id: int):
 
     book.deleted_at = datetime.datetime.utcnow()
     book_copy_repo.soft_delete_by_book_id(book_id)
+    book.total_copies = 0
+    book.available_copies = 0
     book_repo.commit()
+    book_repo.unindex_book(book_id)
 
-    # Invalidate cache for the deleted book.
-    cache_key = f"book:{book_id}"
-    redis_client.delete(cache_key)
+    # Invalidate cache for the deleted book and every listing that contained it.
+    invalidate_catalog(book_ids=[book_id], category_names=[category.name for category in book.categories])
 
     return book
 
@@ -96,20 +118,110 @@ def add_book_copy(book_id: int):
 
     new_copy = BookCopy(book_id=book.id)
     book_copy_repo.add(new_copy)
+    book_repo.adjust_copy_counts(book.id, total_delta=1, available_delta=1)
     book_copy_repo.commit()
+
+    # The book's copy counts have changed, so cached entries are now stale.
+    invalidate_catalog(book_ids=[book.id], category_names=[category.name for category in book.categories])
+
     return new_copy
 
 def delete_book_copy(copy_id: int):
     """Soft deletes a book copy and invalidates the parent book's cache."""
-    copy = book_copy_repo.get_by_id(copy_id)
+    try:
+        # Lock the copy so a concurrent loan cannot change its status under us.
+        copy = book_copy_repo.get_and_lock(copy_id)
+    except OperationalError:
+        book_copy_repo.rollback()
+        raise ConcurrencyException("This book copy is currently being processed. Please try again in a moment.")
+
     if not copy or copy.deleted_at is not None:
+        book_copy_repo.rollback()
         return None
 
     copy.deleted_at = datetime.datetime.utcnow()
+    book_repo.adjust_copy_counts(
+        copy.book_id, total_delta=-1, available_delta=-1 if copy.status == 'available' else 0
+    )
     book_copy_repo.commit()
 
     # The book's available copy count has changed, so its cache is now invalid.
-    cache_key = f"book:{copy.book_id}"
-    redis_client.delete(cache_key)
+    # (`copy.book` no longer resolves: the relationship only joins non-deleted copies.)
+    book = book_repo.get_by_id(copy.book_id)
+    invalidate_catalog(book_ids=[book.id], category_names=[category.name for category in book.categories])
+
+    return copy
+
+def _lock_copies(copy_ids: list):
+    try:
+        # Lock the copies so concurrent loans cannot change their statuses under us.
+        return book_copy_repo.lock_active_by_ids(sorted(set(copy_ids)))
+    except OperationalError:
+        book_copy_repo.rollback()
+        raise ConcurrencyException("Some of these book copies are currently being processed. Please try again in a moment.")
+
+def _invalidate_books(book_ids: list):
+    # One invalidation covers every affected book and the listings of their categories.
+    invalidate_catalog(book_ids=book_ids, category_names=book_repo.get_category_names(book_ids))
+
+def add_book_copies(book_id: int, batch: CopyBatchCreate):
+    """Adds a batch of new copies for an existing book; returns their ids."""
+    if not book_repo.exists_active(book_id):
+        return None
+
+    copy_ids = book_copy_repo.bulk_insert_for_books({book_id: batch.count})
+    book_repo.adjust_copy_counts(book_id, total_delta=batch.count, available_delta=batch.count)
+    book_copy_repo.commit()
+
+    _invalidate_books([book_id])
+    return copy_ids
+
+def delete_book_copies(batch: CopyBatchDelete):
+    """
+    Soft deletes a batch of book copies in one transaction.
+    Returns the ids of the deleted copies; unknown or already deleted ids are skipped.
+    """
+    copies = _lock_copies(batch.copy_ids)
+    if not copies:
+        book_copy_repo.rollback()
+        return []
+
+    deltas = {}
+    for copy in copies:
+        total_delta, available_delta = deltas.get(copy.book_id, (0, 0))
+        deltas[copy.book_id] = (total_delta - 1, available_delta - (copy.status == 'available'))
+
+    deleted_ids = [copy.id for copy in copies]
+    book_copy_repo.soft_delete_by_ids(deleted_ids)
+    book_repo.adjust_copy_counts_bulk(deltas)
+    book_copy_repo.commit()
+
+    _invalidate_books(list(deltas))
+    return deleted_ids
+
+def update_copy_status(batch: CopyStatusUpdate):
+    """
+    Moves a batch of book copies to a new status in one transaction.
+    Returns the ids of the updated copies; unknown, deleted and loaned copies are skipped.
+    """
+    copies = [copy for copy in _lock_copies(batch.copy_ids) if copy.status != 'loaned']
+
+    deltas = {}
+    for copy in copies:
+        if copy.status == batch.status:
+            continue
+        available_delta = 1 if batch.status == 'available' else -1 if copy.status == 'available' else 0
+        deltas[copy.book_id] = (0, deltas.get(copy.book_id, (0, 0))[1] + available_delta)
+
+    if not copies:
+        book_copy_repo.rollback()
+        return []
+
+    updated_ids = [copy.id for copy in copies]
+    book_copy_repo.set_status_by_ids(updated_ids, batch.status)
+    book_repo.adjust_copy_counts_bulk(deltas)
+    book_copy_repo.commit()
 
-    return copy
\ No newline at end of file
+    if deltas:
+        _invalidate_books(list(deltas))
+    return updated_ids
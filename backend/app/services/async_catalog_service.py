@@ -0,0 +1,147 @@
+"""
+Provides the async read path for the public catalog (book listings, book
+details and categories), for serving on asyncio.
+
+It mirrors `book_service` and `category_service`: the same repository and
+read-model statements run on async SQLAlchemy sessions, and the same cache
+keys, packed payloads and ETags are read through `redis.asyncio`, so the sync
+and async processes share cache entries and validators.
+"""
+import math
+from app.core import compression, serialization
+from app.core.async_db import async_session, get_async_engine, run_sync
+from app.core.db_routing import async_written_recently
+from app.core.cache import (
+    CATEGORIES_SCOPE, async_book_cache, async_book_version, async_catalog_namespace, async_categories_version,
+    book_key, book_scope, listing_scope
+)
+from app.core.http_cache import make_etag
+from app.core.pagination import encode_cursor
+from app.core.search_index import tokenize
+from app.read_models import book_read_model, category_read_model
+from app.repositories.book_repository import BookRepository
+from app.services.book_service import CACHE_TTL, decode_book_cursor, listing_cache_key, listing_etag
+
+book_repo = BookRepository()
+
+
+async def _catalog_session(scope):
+    return async_session(replica=not await async_written_recently(scope))
+
+
+async def _fetch_books(session, book_ids: list) -> list:
+    if not book_ids:
+        return []
+    rows = await session.execute(book_read_model.select_books(book_ids, get_async_engine().dialect.name))
+    return book_read_model.order_books(rows, book_ids)
+
+
+async def _search_and_filter(session, page, per_page, search_query, category_name):
+    terms = tokenize(search_query)
+    if book_repo.uses_search_index(terms, get_async_engine().dialect.name):
+        return await run_sync(book_repo.search_and_filter, page, per_page, search_query, category_name)
+
+    page, per_page = book_repo.page_bounds(page, per_page)
+    total_items = await session.scalar(book_repo.select_count(book_repo.select_matching_ids(terms, category_name)))
+    book_ids = (await session.scalars(book_repo.select_page_ids(terms, category_name, page, per_page))).all()
+    return book_ids, math.ceil(total_items / per_page), total_items
+
+
+async def _search_after(session, after_id, limit, search_query, category_name, include_total):
+    terms = tokenize(search_query)
+    if book_repo.uses_search_index(terms, get_async_engine().dialect.name):
+        return await run_sync(book_repo.search_after, after_id, limit, search_query, category_name, include_total)
+
+    total_items = None
+    if include_total:
+        total_items = await session.scalar(book_repo.select_count(book_repo.select_matching_ids(terms, category_name)))
+    book_ids = (await session.scalars(book_repo.select_ids_after(terms, category_name, after_id, limit))).all()
+    return book_ids[:limit], len(book_ids) > limit, total_items
+
+
+async def get_books_etag(page: int, per_page: int, search_query: str | None, category_name: str | None,
+                         cursor: str | None = None, include_total: bool = False):
+    """Returns the ETag of a book listing, without loading it."""
+    if cursor is not None:
+        per_page = per_page if per_page >= 1 else 20
+    return listing_etag(listing_cache_key(
+        await async_catalog_namespace(category_name), page, per_page, search_query, cursor, include_total
+    ))
+
+
+async def get_book_etag(book_id: int):
+    """Returns the ETag of a book's details, without loading them."""
+    return make_etag(book_key(book_id), await async_book_version(book_id))
+
+
+async def get_all_books(page: int, per_page: int, search_query: str | None, category_name: str | None,
+                        cursor: str | None = None, include_total: bool = False):
+    """Retrieves a paginated list of books as packed JSON bytes, using the cache."""
+    if cursor is not None:
+        return await _get_books_after_cursor(cursor, per_page, search_query, category_name, include_total)
+
+    cache_key = listing_cache_key(
+        await async_catalog_namespace(category_name), page, per_page, search_query, None, False
+    )
+
+    async def load_page():
+        async with await _catalog_session(listing_scope(category_name)) as session:
+            book_ids, total_pages, total_items = await _search_and_filter(
+                session, page, per_page, search_query, category_name
+            )
+            books = await _fetch_books(session, book_ids)
+        return compression.pack_variants(serialization.dumps({
+            "books": books,
+            "page": page,
+            "total_pages": total_pages,
+            "total_items": total_items
+        }))
+
+    return await async_book_cache.get_or_compute(cache_key, load_page, ttl=CACHE_TTL)
+
+
+async def _get_books_after_cursor(cursor: str, per_page: int, search_query: str | None,
+                                  category_name: str | None, include_total: bool):
+    after_id = decode_book_cursor(cursor)
+    per_page = per_page if per_page >= 1 else 20
+    cache_key = listing_cache_key(
+        await async_catalog_namespace(category_name), None, per_page, search_query, cursor, include_total
+    )
+
+    async def load_page():
+        async with await _catalog_session(listing_scope(category_name)) as session:
+            book_ids, has_more, total_items = await _search_after(
+                session, after_id, per_page, search_query, category_name, include_total
+            )
+            books = await _fetch_books(session, book_ids)
+        return compression.pack_variants(serialization.dumps({
+            "books": books,
+            "per_page": per_page,
+            "next_cursor": encode_cursor({"id": book_ids[-1]}) if has_more else None,
+            "total_items": total_items
+        }))
+
+    return await async_book_cache.get_or_compute(cache_key, load_page, ttl=CACHE_TTL)
+
+
+async def get_book_by_id(book_id: int):
+    """Retrieves a single book as packed JSON bytes, using the cache. Returns None if not found."""
+
+    async def load_book():
+        async with await _catalog_session(book_scope(book_id)) as session:
+            books = await _fetch_books(session, [book_id])
+        return compression.pack_variants(serialization.dumps(books[0])) if books else None
+
+    return await async_book_cache.get_or_compute(book_key(book_id), load_book, ttl=CACHE_TTL)
+
+
+async def get_categories_etag():
+    """Returns the ETag of the category list, without loading it."""
+    return make_etag("categories", await async_categories_version())
+
+
+async def get_all_categories():
+    """Retrieves the public payloads of all active categories."""
+    async with await _catalog_session(CATEGORIES_SCOPE) as session:
+        rows = await session.execute(category_read_model.select_active_categories())
+        return [category_read_model.map_category_row(row) for row in rows]
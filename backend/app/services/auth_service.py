@@ -1,7 +1,8 @@
 """
 Handles user registration and authentication logic.
 """
-from app.extensions import bcrypt
+from app.core.hashing import password_hasher
+from app.core.security import invalidate_principal
 from app.models.user import User
 from app.schemas.auth_schemas import UserCreate
 from app.repositories.user_repository import UserRepository
@@ -14,7 +15,7 @@ def register_user(user_data: UserCreate):
     if existing_user:
         raise ValueError("Username or email already exists.")
 
-    hashed_password = bcrypt.generate_password_hash(user_data.password).decode('utf-8')
+    hashed_password = password_hasher.generate_password_hash(user_data.password)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -22,12 +23,14 @@ def register_user(user_data: UserCreate):
     )
     user_repo.add(new_user)
     user_repo.commit()
+    # Drops a "no such user" entry cached for the id, should the database have reused it.
+    invalidate_principal(new_user.id)
     return new_user
 
 def authenticate_user(email: str, password: str) -> User | None:
     """Authenticates a user by email and password."""
     user = user_repo.find_by_email(email)
 
-    if user and bcrypt.check_password_hash(user.password_hash, password):
+    if user and password_hasher.check_password_hash(user.password_hash, password):
         return user
     return None
\ No newline at end of file
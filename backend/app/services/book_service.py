@@ -1,61 +1,143 @@
 """
-Provides public logic for querying books, with a Redis caching layer.
+Provides public logic for querying books, with a two-tier (in-process + Redis) caching layer.
+
+Results are returned as pre-serialized JSON bytes, exactly as they are cached,
+so that routes can send them without decoding and re-encoding. Each entry is
+packed with its compressed variants (see `app.core.compression`), so cache
+hits are never recompressed.
 """
-import json
-from app.core.redis_client import redis_client
-from app.schemas.book_schemas import BookPublic
+import time
+from app.core import compression, serialization
+from app.core.db_routing import use_primary_if_written
+from app.core.cache import book_cache, book_key, book_scope, book_version, catalog_namespace, listing_scope
+from app.core.http_cache import make_etag
+from app.schemas.book_schemas import BookCopyPublic
+from app.read_models import book_read_model
 from app.repositories.book_repository import BookRepository
+from app.repositories.book_copy_repository import BookCopyRepository
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.exceptions import InvalidCursorException
 
 book_repo = BookRepository()
-
-def get_all_books(page: int, per_page: int, search_query: str | None, category_name: str | None):
-    """Retrieves a paginated list of books, using a cache."""
-    cache_key = f"books:page={page}:per_page={per_page}:q={search_query}:cat={category_name}"
-
-    # Try to get the data from Redis.
-    cached_books = redis_client.get(cache_key)
-
-    if cached_books:
-        return json.loads(cached_books)
-
-    # If cache miss, query the database.
-    books, total_pages, total_items = book_repo.search_and_filter(
-        page, per_page, search_query, category_name
+book_copy_repo = BookCopyRepository()
+
+# Cached entries are considered fresh for 5 minutes.
+CACHE_TTL = 300
+
+def listing_cache_key(namespace, page, per_page, search_query, cursor, include_total):
+    """Returns the cache key of a book listing under a namespace from `catalog_namespace`."""
+    if cursor is not None:
+        return f"{namespace}:cursor={cursor}:per_page={per_page}:q={search_query}:total={include_total}"
+    return f"{namespace}:page={page}:per_page={per_page}:q={search_query}"
+
+
+def listing_etag(cache_key):
+    """
+    Listings change with their generation. Loans do not bump generations, so
+    the tag also rolls over every `CACHE_TTL` seconds, bounding how long a
+    revalidated listing can show stale availability as the cache itself does.
+    """
+    return make_etag(cache_key, int(time.time() // CACHE_TTL))
+
+
+def get_books_etag(page: int, per_page: int, search_query: str | None, category_name: str | None,
+                   cursor: str | None = None, include_total: bool = False):
+    """Returns the ETag of a book listing, without loading it."""
+    if cursor is not None:
+        per_page = per_page if per_page >= 1 else 20
+    return listing_etag(listing_cache_key(
+        catalog_namespace(category_name), page, per_page, search_query, cursor, include_total
+    ))
+
+
+def get_book_etag(book_id: int):
+    """Returns the ETag of a book's details, without loading them."""
+    return make_etag(book_key(book_id), book_version(book_id))
+
+
+def get_all_books(page: int, per_page: int, search_query: str | None, category_name: str | None,
+                  cursor: str | None = None, include_total: bool = False):
+    """
+    Retrieves a paginated list of books, using a cache.
+    Passing a `cursor` (an empty string for the first page) switches from
+    offset to keyset pagination.
+    """
+    if cursor is not None:
+        return _get_books_after_cursor(cursor, per_page, search_query, category_name, include_total)
+
+    cache_key = listing_cache_key(catalog_namespace(category_name), page, per_page, search_query, None, False)
+
+    def load_page():
+        use_primary_if_written(listing_scope(category_name))
+        book_ids, total_pages, total_items = book_repo.search_and_filter(
+            page, per_page, search_query, category_name
+        )
+        return compression.pack_variants(serialization.dumps({
+            "books": book_read_model.fetch_books(book_ids),
+            "page": page,
+            "total_pages": total_pages,
+            "total_items": total_items
+        }))
+
+    return book_cache.get_or_compute(cache_key, load_page, ttl=CACHE_TTL)
+
+
+def decode_book_cursor(cursor: str):
+    """Returns the id a listing cursor resumes after (None for the first page)."""
+    after_id = decode_cursor(cursor).get('id')
+    # bool is a subclass of int, but `true` is not a book id.
+    if after_id is not None and (not isinstance(after_id, int) or isinstance(after_id, bool)):
+        raise InvalidCursorException('Invalid pagination cursor.')
+    return after_id
+
+
+def _get_books_after_cursor(cursor: str, per_page: int, search_query: str | None,
+                            category_name: str | None, include_total: bool):
+    """Retrieves the page of books following a cursor, using a cache."""
+    after_id = decode_book_cursor(cursor)
+    per_page = per_page if per_page >= 1 else 20
+    cache_key = listing_cache_key(
+        catalog_namespace(category_name), None, per_page, search_query, cursor, include_total
     )
 
-    books_data = [BookPublic.model_validate(book).model_dump() for book in books]
-    response_data = {
-        "books": books_data,
-        "page": page,
-        "total_pages": total_pages,
-        "total_items": total_items
-    }
-
-    # Store the result in Redis for 5 minutes.
-    redis_client.set(cache_key, json.dumps(response_data), ex=300)
+    def load_page():
+        use_primary_if_written(listing_scope(category_name))
+        book_ids, has_more, total_items = book_repo.search_after(
+            after_id, per_page, search_query, category_name, include_total
+        )
+        return compression.pack_variants(serialization.dumps({
+            "books": book_read_model.fetch_books(book_ids),
+            "per_page": per_page,
+            "next_cursor": encode_cursor({"id": book_ids[-1]}) if has_more else None,
+            "total_items": total_items
+        }))
 
-    return response_data
+    return book_cache.get_or_compute(cache_key, load_page, ttl=CACHE_TTL)
 
 
 def get_book_by_id(book_id: int):
     """Retrieves a single book by ID, using a cache."""
-    cache_key = f"book:{book_id}"
 
-    # Try to get the data from Redis.
-    cached_book = redis_client.get(cache_key)
+    def load_book():
+        use_primary_if_written(book_scope(book_id))
+        book = book_read_model.fetch_book(book_id)
+        return compression.pack_variants(serialization.dumps(book)) if book else None
 
-    if cached_book:
-        return json.loads(cached_book)
+    return book_cache.get_or_compute(book_key(book_id), load_book, ttl=CACHE_TTL)
 
-    # If cache miss, query the database.
-    book = book_repo.get_active_by_id(book_id)
 
-    if not book:
+def get_book_copies(book_id: int, page: int, per_page: int):
+    """
+    Retrieves a paginated list of a book's copies and their statuses.
+    Copy statuses change with every loan, so this is not cached.
+    """
+    if not book_repo.exists_active(book_id):
         return None
 
-    book_data = BookPublic.model_validate(book).model_dump()
-
-    # Store the result in Redis for 5 minutes.
-    redis_client.set(cache_key, json.dumps(book_data), ex=300)
-
-    return book_data
\ No newline at end of file
+    copies, total_pages, total_items = book_copy_repo.paginate_for_book(book_id, page, per_page)
+    return {
+        "copies": [BookCopyPublic.model_validate(copy).model_dump() for copy in copies],
+        "page": page,
+        "total_pages": total_pages,
+        "total_items": total_items
+    }
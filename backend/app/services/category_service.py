@@ -6,12 +6,22 @@ from sqlalchemy.exc import IntegrityError
 from app.repositories.category_repository import CategoryRepository
 from app.schemas.category_schemas import CategoryCreate, CategoryUpdate
 from app.models import Category
+from app.core.cache import CATEGORIES_SCOPE, invalidate_catalog, categories_version
+from app.core.db_routing import use_primary_if_written
+from app.core.http_cache import make_etag
+from app.read_models import category_read_model
 
 category_repo = CategoryRepository()
 
+def get_categories_etag():
+    """Returns the ETag of the category list, without loading it."""
+    return make_etag("categories", categories_version())
+
 def get_all_categories():
-    """Retrieves all active categories."""
-    return category_repo.get_all_active()
+    """Retrieves the public payloads of all active categories."""
+    # The list is sent under the current version's ETag, so it must not predate the version.
+    use_primary_if_written(CATEGORIES_SCOPE)
+    return category_read_model.fetch_active_categories()
 
 def create_category(category_data: CategoryCreate):
     """Creates a new category."""
@@ -25,6 +35,8 @@ def create_category(category_data: CategoryCreate):
     except IntegrityError:
         category_repo.rollback()
         raise ValueError(f"A category with the name '{category_data.name}' already exists.")
+
+    invalidate_catalog(category_names=[new_category.name], bump_catalog=False, bump_categories=True)
     return new_category
 
 def update_category(category_id: int, category_data: CategoryUpdate):
@@ -33,6 +45,7 @@ def update_category(category_id: int, category_data: CategoryUpdate):
     if not category or category.deleted_at:
         return None
 
+    previous_name = category.name
     for key, value in category_data.model_dump(exclude_unset=True).items():
         setattr(category, key, value)
 
@@ -41,6 +54,16 @@ def update_category(category_id: int, category_data: CategoryUpdate):
     except IntegrityError:
         category_repo.rollback()
         raise ValueError(f"A category with the name '{category_data.name}' already exists.")
+
+    # Book payloads embed category names, so a rename affects every book in the category.
+    if category.name != previous_name:
+        invalidate_catalog(
+            book_ids=category_repo.get_book_ids(category.id),
+            category_names=[previous_name, category.name],
+            bump_categories=True
+        )
+    else:
+        invalidate_catalog(bump_catalog=False, bump_categories=True)
     return category
 
 def delete_category(category_id: int):
@@ -51,4 +74,6 @@ def delete_category(category_id: int):
 
     category.deleted_at = datetime.datetime.utcnow()
     category_repo.commit()
+
+    invalidate_catalog(category_names=[category.name], bump_catalog=False, bump_categories=True)
     return category
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Handles bulk imports of the book catalog from CSV or JSON Lines streams.
+
+Rows are read lazily and written in batches: each batch inserts its books,
+category links and copies with multi-row INSERTs in a single transaction.
+Rows that fail validation or whose ISBN already exists are reported without
+aborting their batch, and the cache is invalidated once, after the import.
+"""
+import csv
+import io
+import json
+import logging
+from itertools import islice
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.schemas.admin_schemas import BookImportRow
+from app.core.cache import invalidate_catalog
+from app.core.exceptions import InvalidImportException
+from app.repositories.book_repository import BookRepository
+from app.repositories.book_copy_repository import BookCopyRepository
+from app.repositories.category_repository import CategoryRepository
+
+book_repo = BookRepository()
+book_copy_repo = BookCopyRepository()
+category_repo = CategoryRepository()
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_SIZE = 1000
+
+# The report lists individual failures up to this many; the counts are always complete.
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename: str | None, content_type: str | None = None):
+    """Infers the import format from a file name or content type, or returns None."""
+    if filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension == 'csv':
+            return 'csv'
+        if extension in ('jsonl', 'ndjson'):
+            return 'jsonl'
+    if content_type:
+        if 'csv' in content_type:
+            return 'csv'
+        if 'ndjson' in content_type or 'jsonl' in content_type:
+            return 'jsonl'
+    return None
+
+
+def _read_rows(stream, import_format: str):
+    """Yields `(line_number, raw_row)` pairs from a binary stream, decoding it incrementally."""
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if import_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Empty cells mean "not provided", so optional columns fall back to their defaults.
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+    else:
+        for line_number, line in enumerate(lines, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, None
+
+
+class ImportReport:
+    """Accumulates the outcome of an import."""
+
+    def __init__(self):
+        self.imported = 0
+        self.copies = 0
+        self.conflict_count = 0
+        self.error_count = 0
+        self.errors = []
+        self.category_names = set()
+
+    def reject(self, line_number, isbn, error, conflict=False):
+        if conflict:
+            self.conflict_count += 1
+        else:
+            self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": line_number, "isbn": isbn, "error": error})
+
+    def to_dict(self):
+        return {
+            "imported": self.imported,
+            "copies": self.copies,
+            "conflicts": self.conflict_count,
+            "invalid": self.error_count,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.conflict_count + self.error_count > len(self.errors)
+        }
+
+
+def _validate_batch(raw_rows, report, seen_isbns):
+    """Validates a batch of raw rows; returns the `(line_number, row)` pairs that can be inserted."""
+    valid_rows = []
+    for line_number, raw_row in raw_rows:
+        if not isinstance(raw_row, dict):
+            report.reject(line_number, None, "Row is not a valid JSON object.")
+            continue
+        try:
+            row = BookImportRow(**raw_row)
+        except ValidationError as error:
+            message = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+            report.reject(line_number, raw_row.get('isbn'), message)
+            continue
+        valid_rows.append((line_number, row))
+
+    existing_isbns = book_repo.find_existing_isbns([row.isbn for _, row in valid_rows])
+    category_ids = category_repo.get_active_ids_by_names(
+        list({name for _, row in valid_rows for name in row.categories})
+    )
+
+    insertable_rows = []
+    for line_number, row in valid_rows:
+        if row.isbn in seen_isbns:
+            report.reject(line_number, row.isbn, f"Duplicate ISBN {row.isbn} earlier in the import.", conflict=True)
+            continue
+        if row.isbn in existing_isbns:
+            report.reject(line_number, row.isbn, f"A book with ISBN {row.isbn} already exists.", conflict=True)
+            continue
+        unknown_names = [name for name in row.categories if name not in category_ids]
+        if unknown_names:
+            report.reject(line_number, row.isbn, f"Unknown categories: {', '.join(unknown_names)}.")
+            continue
+        seen_isbns.add(row.isbn)
+        insertable_rows.append((line_number, row))
+    return insertable_rows, category_ids
+
+
+def _insert_rows(rows, category_ids):
+    """Inserts books with their category links and copies; returns the new book ids."""
+    book_ids = book_repo.bulk_insert([
+        {
+            "title": row.title,
+            "author": row.author,
+            "isbn": row.isbn,
+            "publication_year": row.publication_year,
+            "description": row.description,
+            # New copies are all available, so the counters are known up front.
+            "total_copies": row.copies,
+            "available_copies": row.copies
+        }
+        for _, row in rows
+    ])
+    book_repo.bulk_link_categories([
+        {"book_id": book_id, "category_id": category_id}
+        for book_id, (_, row) in zip(book_ids, rows)
+        for category_id in {category_ids[name] for name in row.categories}
+    ])
+    book_copy_repo.bulk_insert_for_books({
+        book_id: row.copies for book_id, (_, row) in zip(book_ids, rows) if row.copies
+    })
+    return book_ids
+
+
+def _import_batch(raw_rows, report, seen_isbns):
+    rows, category_ids = _validate_batch(raw_rows, report, seen_isbns)
+    if not rows:
+        book_repo.rollback()
+        return
+
+    try:
+        book_ids = _insert_rows(rows, category_ids)
+        book_repo.commit()
+        imported_rows = rows
+    except IntegrityError:
+        # An ISBN was taken concurrently: retry the rows one by one to isolate the conflicts.
+        book_repo.rollback()
+        book_ids, imported_rows = [], []
+        for line_number, row in rows:
+            try:
+                with db.session.begin_nested():
+                    book_ids.extend(_insert_rows([(line_number, row)], category_ids))
+                imported_rows.append((line_number, row))
+            except IntegrityError:
+                report.reject(line_number, row.isbn, f"A book with ISBN {row.isbn} already exists.", conflict=True)
+        book_repo.commit()
+
+    book_repo.index_documents(
+        (book_id, row.title, row.author) for book_id, (_, row) in zip(book_ids, imported_rows)
+    )
+    report.imported += len(imported_rows)
+    report.copies += sum(row.copies for _, row in imported_rows)
+    report.category_names.update(name for _, row in imported_rows for name in row.categories)
+
+
+def import_catalog(stream, import_format: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Imports books from a binary CSV or JSON Lines stream.
+
+    Each row holds a book's `title`, `author`, `isbn`, and optionally its
+    `publication_year`, `description`, `categories` (names of existing
+    categories; '|'-separated in CSV) and the number of `copies` to create.
+    Returns a report of the imported rows and of every rejected row.
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format '{import_format}'; expected one of: {', '.join(IMPORT_FORMATS)}.")
+
+    report = ImportReport()
+    seen_isbns = set()
+    rows = _read_rows(stream, import_format)
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            _import_batch(batch, report, seen_isbns)
+            logger.info(f"Catalog import: {report.imported} books imported so far")
+    except UnicodeDecodeError:
+        raise InvalidImportException(
+            f"The import is not valid UTF-8; {report.imported} books were imported before the invalid data."
+        )
+    finally:
+        # Invalidate once for everything committed, even if a later batch failed.
+        if report.imported:
+            invalidate_catalog(category_names=report.category_names)
+
+    return report.to_dict()
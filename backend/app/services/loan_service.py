@@ -3,71 +3,122 @@ Handles business logic for creating and managing book loans,
 including concurrency control to prevent race conditions.
 """
 import datetime
+import time
 from app.models import Loan, BookCopy, User, Book
-from app.core.exceptions import ConcurrencyException, BookNotAvailableException
-from app.tasks import send_loan_confirmation_email
+from app.core.exceptions import ConcurrencyException, BookNotAvailableException, InvalidCursorException
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core import serialization
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import joinedload
 from app.schemas.loan_schemas import LoanCreate
 
+from app.core.cache import invalidate_catalog
+from app.services import outbox_service
+from app.read_models import loan_read_model
+from app.repositories.book_repository import BookRepository
 from app.repositories.book_copy_repository import BookCopyRepository
 from app.repositories.loan_repository import LoanRepository
 
+book_repo = BookRepository()
 book_copy_repo = BookCopyRepository()
 loan_repo = LoanRepository()
 
-def _lock_and_create_loan(user: User, book_copy_id: int, loan_days: int):
+# A claim is retried on transient database errors (e.g. deadlocks) before giving up.
+MAX_CLAIM_ATTEMPTS = 3
+CLAIM_RETRY_DELAY = 0.05
+
+# Rows fetched per round trip when streaming the active-loan listing.
+LOAN_STREAM_BATCH_SIZE = 1000
+# Upper bound on one page of the active-loan listing; larger requests are clamped.
+MAX_ACTIVE_LOANS_PER_PAGE = 500
+
+def _claim_and_create_loan(user: User, book_id: int, loan_days: int):
     """
-    Locks a book copy row using 'SELECT...FOR UPDATE' to prevent race
-    conditions, then creates a loan record.
+    Claims any available copy of a book using 'SELECT...FOR UPDATE SKIP LOCKED',
+    then creates a loan record. Concurrent borrowers each claim a different
+    copy instead of contending for the same row.
 
     Raises:
-        BookNotAvailableException: If the book copy is already loaned or gone.
-        ConcurrencyException: If the database row is locked by another transaction.
+        BookNotAvailableException: If no copy of the book is free.
+        OperationalError: On a transient database error; the transaction is rolled back.
     """
     try:
-        # This pessimistic lock is crucial for handling concurrent loan requests.
-        book_copy = book_copy_repo.get_and_lock(book_copy_id)
+        book_copy = book_copy_repo.claim_available_for_book(book_id)
 
         if not book_copy:
-            raise BookNotAvailableException("This book copy does not exist.")
-
-        if book_copy.status != 'available':
-            raise BookNotAvailableException("This book copy is not available for loan.")
+            raise BookNotAvailableException("No available copies of this book were found.")
 
         book_copy.status = 'loaned'
 
         due_date = datetime.datetime.utcnow() + datetime.timedelta(days=loan_days)
-        new_loan = Loan(user_id=user.id, book_copy_id=book_copy_id, due_date=due_date)
+        new_loan = Loan(user_id=user.id, book_copy_id=book_copy.id, due_date=due_date)
 
         loan_repo.add(new_loan)
+        loan_repo.flush()
+
+        # Follow-up work is recorded in the outbox and commits atomically with the loan.
+        due_timestamp = due_date.replace(tzinfo=datetime.timezone.utc).timestamp()
+        outbox_service.enqueue_task('app.tasks.send_loan_confirmation_email', new_loan.id)
+        outbox_service.enqueue_task('app.tasks.schedule_loan_due_events', new_loan.id, due_timestamp)
+
+        # The counter is decremented last, so the book's row lock is held only until the commit.
+        book_repo.adjust_copy_counts(book_id, available_delta=-1)
         loan_repo.commit()
 
-        send_loan_confirmation_email.delay(new_loan.id)
+        # The book's availability changed. Listings keep their generation and may
+        # show the previous count until their entries expire.
+        invalidate_catalog(book_ids=[book_id], bump_catalog=False)
 
         return new_loan
 
-    except OperationalError:
-        loan_repo.rollback()
-        raise ConcurrencyException("This book copy is currently being processed. Please try again in a moment.")
-
     except Exception as e:
         loan_repo.rollback()
         raise e
 
 def create_loan(user: User, loan_data: LoanCreate):
-    """Finds an available copy and loans it to the user."""
-    available_copy = book_copy_repo.find_available_for_book(loan_data.book_id)
-
-    if not available_copy:
-        raise BookNotAvailableException("No available copies of this book were found.")
+    """Claims an available copy and loans it to the user."""
+    for attempt in range(1, MAX_CLAIM_ATTEMPTS + 1):
+        try:
+            return _claim_and_create_loan(user, loan_data.book_id, loan_data.loan_days)
+        except OperationalError:
+            if attempt == MAX_CLAIM_ATTEMPTS:
+                break
+            time.sleep(CLAIM_RETRY_DELAY * attempt)
 
-    return _lock_and_create_loan(user, available_copy.id, loan_data.loan_days)
+    raise ConcurrencyException("This book is currently being processed. Please try again in a moment.")
 
 def get_user_loans(user_id: int):
     """Fetches all loans for a specific user."""
     return loan_repo.find_by_user_id_with_details(user_id)
 
 def get_all_active_loans():
-    """Fetches all active loans across the system."""
-    return loan_repo.find_all_active_with_details()
\ No newline at end of file
+    """Fetches the admin view of all active loans across the system."""
+    return loan_read_model.fetch_active_loans()
+
+def get_active_loans_page(cursor: str, per_page: int):
+    """
+    Fetches a page of the admin view of active loans, keyset-paginated by
+    (due_date, id). An empty `cursor` denotes the first page.
+    """
+    position = decode_cursor(cursor)
+    after = None
+    if position:
+        try:
+            after = (datetime.datetime.fromisoformat(position['due']), int(position['id']))
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCursorException('Invalid pagination cursor.')
+
+    per_page = min(per_page, MAX_ACTIVE_LOANS_PER_PAGE) if per_page >= 1 else 20
+    loans, next_position = loan_read_model.fetch_active_loans_after(after, per_page)
+    return {
+        "loans": loans,
+        "per_page": per_page,
+        "next_cursor": encode_cursor({
+            "due": next_position[0].isoformat(), "id": next_position[1]
+        }) if next_position else None
+    }
+
+def stream_active_loans():
+    """Yields the admin view of all active loans as NDJSON chunks, one batch of lines at a time."""
+    for loans in loan_read_model.stream_active_loans(LOAN_STREAM_BATCH_SIZE):
+        yield b''.join(serialization.dumps(loan) + b'\n' for loan in loans)
@@ -0,0 +1,77 @@
+"""
+Delivers queued loan notifications by email, in batches over pooled SMTP connections.
+"""
+import logging
+import time
+from app.config import settings
+from app.core.mailer import build_message, mail_pool
+from app.core.notifications import notification_queue
+from app.read_models import loan_read_model
+
+logger = logging.getLogger(__name__)
+
+# Notification kinds, with their subject and body templates.
+TEMPLATES = {
+    'confirmation': (
+        "Loan confirmed: {title}",
+        "Hello {username},\n\nYou have borrowed '{title}'. Please return it by {due_date:%Y-%m-%d}.\n"
+    ),
+    'reminder': (
+        "Reminder: {title} is due soon",
+        "Hello {username},\n\n'{title}' is due back on {due_date:%Y-%m-%d}.\n"
+    ),
+    'overdue': (
+        "Overdue: {title}",
+        "Hello {username},\n\n'{title}' was due back on {due_date:%Y-%m-%d} and is now overdue.\n"
+    ),
+}
+
+
+def _render(kind: str, loan):
+    subject, body = TEMPLATES[kind]
+    fields = {'title': loan.title, 'username': loan.username, 'due_date': loan.due_date}
+    return build_message(loan.email, subject.format(**fields), body.format(**fields))
+
+
+def _deliver_batch(records: list):
+    """Sends one batch of records; returns the number of messages sent and failed."""
+    loans = loan_read_model.fetch_loan_notifications(list({record['loan_id'] for record in records}))
+
+    messages, sendable = [], []
+    for record in records:
+        loan = loans.get(record['loan_id'])
+        # Reminders and overdue notices are moot once a loan has been returned.
+        if loan is None or (record['kind'] != 'confirmation' and loan.return_date is not None):
+            continue
+        messages.append(_render(record['kind'], loan))
+        sendable.append(record)
+
+    started = time.monotonic()
+    failed = mail_pool.send_batch(messages) if messages else []
+    elapsed = time.monotonic() - started
+
+    notification_queue.requeue([
+        sendable[index] for index in failed
+        if sendable[index]['attempts'] + 1 < settings.NOTIFICATION_MAX_ATTEMPTS
+    ])
+    notification_queue.record_batch(len(messages) - len(failed), len(failed), elapsed)
+    return len(messages) - len(failed), len(failed)
+
+
+def flush_notifications():
+    """Drains pending notifications in batches; returns the total number sent and failed."""
+    total_sent = total_failed = 0
+    for _ in range(settings.NOTIFICATION_MAX_BATCHES):
+        records = notification_queue.take(settings.NOTIFICATION_BATCH_SIZE)
+        if not records:
+            break
+
+        sent, failed = _deliver_batch(records)
+        total_sent += sent
+        total_failed += failed
+        if len(records) < settings.NOTIFICATION_BATCH_SIZE:
+            break
+
+    if total_failed:
+        logger.warning(f"{total_failed} notifications failed to send")
+    return total_sent, total_failed
@@ -0,0 +1,60 @@
+"""
+Implements the transactional outbox for Celery tasks.
+
+Writers record the tasks they trigger as outbox rows in their own database
+transaction, so a task is enqueued if and only if its write commits, and the
+request never waits on the broker. The relay then hands pending rows to
+Celery in batches and deletes them; a row is only deleted once its task has
+been handed off, so delivery is at-least-once.
+"""
+import datetime
+import logging
+from app.celery_app import celery_app
+from app.config import settings
+from app.repositories.outbox_repository import OutboxRepository
+
+outbox_repo = OutboxRepository()
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_task(task_name: str, *args):
+    """Records a task to run once the current transaction commits. The caller commits."""
+    outbox_repo.add_message(task_name, list(args))
+
+
+def _relay_batch(batch_size: int) -> int:
+    messages = outbox_repo.claim_batch(batch_size)
+    if not messages:
+        outbox_repo.rollback()
+        return 0
+
+    try:
+        for message in messages:
+            celery_app.send_task(message.task_name, args=message.args)
+    except Exception:
+        # Nothing is deleted, so the whole batch is retried on the next run.
+        outbox_repo.rollback()
+        raise
+
+    outbox_repo.delete_by_ids([message.id for message in messages])
+    outbox_repo.commit()
+    return len(messages)
+
+
+def relay_outbox(batch_size: int = settings.OUTBOX_BATCH_SIZE, max_batches: int = settings.OUTBOX_MAX_BATCHES) -> int:
+    """Hands pending outbox messages to Celery in batches; returns how many were relayed."""
+    relayed = 0
+    for _ in range(max_batches):
+        count = _relay_batch(batch_size)
+        relayed += count
+        if count < batch_size:
+            break
+    return relayed
+
+
+def get_backlog():
+    """Returns the number of pending outbox messages and the age in seconds of the oldest."""
+    pending, oldest = outbox_repo.get_backlog()
+    age = (datetime.datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+    return {"pending": pending, "oldest_age": max(age, 0.0)}
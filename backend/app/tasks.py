@@ -1,13 +1,108 @@
 import time
+from flask import current_app
 from app.celery_app import celery_app
+from app.core import file_handler
+from app.core.cache import invalidate_catalog
+from app.config import settings
+from app.core import delay_queue
+from app.core.delay_queue import loan_event_queue, parse_loan_event
+from app.core.notifications import notification_queue
+from app.services import notification_service, outbox_service
+from app.repositories.book_repository import BookRepository
+from app.repositories.loan_repository import LoanRepository
+
+book_repo = BookRepository()
+loan_repo = LoanRepository()
 
 @celery_app.task
 def send_loan_confirmation_email(loan_id: int):
-    
-    # A mock task that simulates sending an email.
-    # In a real app, this would contain email sending logic.
-    
-    print(f"Starting task to send confirmation for loan ID: {loan_id}")
-    time.sleep(5) # Simulate a slow network operation
-    print(f"Email sent successfully for loan ID: {loan_id}")
-    return f"Email sent for loan {loan_id}"
\ No newline at end of file
+    # Emails are delivered in batches by `flush_notifications`; this only queues one.
+    notification_queue.enqueue('confirmation', loan_id)
+    return f"Confirmation queued for loan {loan_id}"
+
+@celery_app.task
+def schedule_loan_due_events(loan_id: int, due_timestamp: float):
+    """Schedules a new loan's due-date reminder and overdue notice."""
+    delay_queue.schedule_loan_due_events(loan_id, due_timestamp)
+    return f"Due events scheduled for loan {loan_id}"
+
+@celery_app.task
+def relay_outbox():
+    """Hands the tasks recorded in the transactional outbox to the broker."""
+    return f"Relayed {outbox_service.relay_outbox()} outbox messages"
+
+@celery_app.task
+def generate_book_image_variants(book_id: int, image_url: str):
+    """Generates the resized and WebP variants of a book's image and records their URLs on the book."""
+    filename = image_url.rsplit('/', 1)[-1]
+    image_variants = file_handler.generate_image_variants(current_app.config['UPLOAD_FOLDER'], filename)
+    if image_variants is None:
+        return f"Skipped image variants for book {book_id}"
+
+    if not book_repo.set_image_variants(book_id, image_url, image_variants):
+        # The book's image was replaced meanwhile; its own task records its variants.
+        book_repo.rollback()
+        return f"Image of book {book_id} has changed"
+    book_repo.commit()
+
+    invalidate_catalog(book_ids=[book_id], category_names=book_repo.get_category_names([book_id]))
+    return f"Generated {len(image_variants)} image variants for book {book_id}"
+
+@celery_app.task
+def flush_notifications():
+    """Sends pending notifications in batches over pooled SMTP connections."""
+    sent, failed = notification_service.flush_notifications()
+    return f"Sent {sent} notifications ({failed} failed)"
+
+@celery_app.task
+def reconcile_book_copy_counts():
+    """Repairs drift between the denormalized copy counters on books and their copies."""
+    drifted_ids = book_repo.find_ids_with_copy_count_drift()
+    if not drifted_ids:
+        return "Copy counters are consistent"
+
+    book_repo.recount_copies(drifted_ids)
+    book_repo.commit()
+    invalidate_catalog(book_ids=drifted_ids, category_names=book_repo.get_category_names(drifted_ids))
+
+    current_app.logger.info(f"Repaired copy counters for book IDs: {drifted_ids}")
+    return f"Repaired copy counters for {len(drifted_ids)} books"
+
+@celery_app.task
+def dispatch_due_loan_events():
+    """
+    Pops the loan events that have come due from the delay queue, in batches,
+    and queues their notifications. Events of returned loans are dropped.
+    """
+    dispatched = 0
+    for _ in range(settings.DUE_EVENT_MAX_BATCHES):
+        events = loan_event_queue.pop_due(time.time(), settings.DUE_EVENT_BATCH_SIZE)
+        if not events:
+            break
+
+        # Events not yet handed off; only these are put back if the batch fails.
+        pending = dict(events)
+        try:
+            parsed = []
+            for event, _ in events:
+                try:
+                    parsed.append(parse_loan_event(event))
+                except ValueError:
+                    # A malformed event would fail every retry, so it is dropped instead.
+                    current_app.logger.warning(f"Dropping malformed loan event {event!r}")
+                    del pending[event]
+            active_ids = loan_repo.find_active_ids([loan_id for _, loan_id in parsed])
+            # Event kinds ('reminder', 'overdue') double as notification kinds.
+            notifications = [(kind, loan_id) for kind, loan_id in parsed if loan_id in active_ids]
+            notification_queue.enqueue_many(notifications)
+            pending.clear()
+            dispatched += len(notifications)
+        except Exception:
+            # Retried on the next run rather than lost; dispatched events are never put back.
+            loan_event_queue.schedule(pending)
+            raise
+
+        if len(events) < settings.DUE_EVENT_BATCH_SIZE:
+            break
+
+    return f"Dispatched {dispatched} loan events"
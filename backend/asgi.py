@@ -0,0 +1,33 @@
+# asgi.py
+"""
+ASGI entry point. The public catalog reads (`/api/books`, `/api/books/<id>`
+and `/api/categories`) are served by async handlers; every other request is
+passed through to the Flask application.
+
+    uvicorn asgi:app --workers 4
+"""
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from app import create_app
+from app.api.async_catalog_routes import async_catalog_routes, exception_handlers
+from app.core.async_db import dispose_async_engines, init_async_db
+from app.core.redis_client import async_redis_client
+
+flask_app = create_app()
+init_async_db(flask_app)
+
+
+@asynccontextmanager
+async def lifespan(_):
+    yield
+    await dispose_async_engines()
+    await async_redis_client.aclose()
+
+
+app = Starlette(
+    routes=[*async_catalog_routes, Mount('/', app=WSGIMiddleware(flask_app))],
+    exception_handlers=exception_handlers,
+    lifespan=lifespan
+)
@@ -0,0 +1,122 @@
+# benchmark.py
+"""
+Measures requests/sec and latency of the public catalog reads at high
+concurrency, to compare the sync (WSGI) and async (ASGI) servers.
+
+Start both servers against the same database and Redis, e.g.
+
+    gunicorn -w 4 --threads 8 -b 127.0.0.1:8000 run:app
+    uvicorn asgi:app --workers 4 --port 8001 --no-access-log
+
+then run
+
+    python benchmark.py http://127.0.0.1:8000 http://127.0.0.1:8001 -c 512 -d 20
+
+Each client keeps an HTTP/1.1 connection open and issues requests back to
+back, cycling through the paths given with `--path`.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ['/api/books/?per_page=20', '/api/books/1', '/api/categories']
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by the server.")
+    status = int(status_line.split()[1])
+
+    length = 0
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'connection' and value.strip().lower() == 'close':
+            keep_alive = False
+    await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def _client(host, port, paths, deadline, latencies, errors):
+    reader = writer = None
+    index = 0
+    while time.monotonic() < deadline:
+        request = (
+            f"GET {paths[index % len(paths)]} HTTP/1.1\r\nHost: {host}\r\n"
+            f"Accept-Encoding: gzip, br\r\n\r\n"
+        ).encode('latin-1')
+        index += 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            writer.write(request)
+            status, keep_alive = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(status)
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError) as error:
+            errors.append(type(error).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run(base_url, paths, concurrency, duration):
+    """Returns the completed request count, the latencies (seconds) and the errors."""
+    url = urlsplit(base_url)
+    prefix = url.path.rstrip('/')
+    paths = [prefix + path for path in paths]
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(
+        _client(url.hostname, url.port or 80, paths, deadline, latencies, errors) for _ in range(concurrency)
+    ))
+    return latencies, errors
+
+
+def _report(base_url, latencies, errors, duration):
+    if not latencies:
+        print(f"{base_url}: no successful requests ({len(errors)} errors)")
+        return
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{base_url}: {len(latencies) / duration:,.0f} req/s, "
+        f"p50 {quantiles[49] * 1000:.1f} ms, p99 {quantiles[98] * 1000:.1f} ms, "
+        f"{len(errors)} errors"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('base_urls', nargs='+', help="server base URLs, benchmarked one after another")
+    parser.add_argument('-c', '--concurrency', type=int, default=256, help="concurrent connections")
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help="seconds per server")
+    parser.add_argument('-w', '--warmup', type=float, default=2.0, help="unmeasured seconds per server")
+    parser.add_argument('--path', action='append', dest='paths', help="path to request (repeatable)")
+    args = parser.parse_args()
+
+    paths = args.paths or DEFAULT_PATHS
+    for base_url in args.base_urls:
+        if args.warmup > 0:
+            asyncio.run(run(base_url, paths, args.concurrency, args.warmup))
+        latencies, errors = asyncio.run(run(base_url, paths, args.concurrency, args.duration))
+        _report(base_url, latencies, errors, args.duration)
+
+
+if __name__ == '__main__':
+    main()
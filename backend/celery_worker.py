@@ -1,9 +1,19 @@
 # celery_worker.py
 from app import create_app
 from app.celery_app import celery_app
+from app.extensions import db
+from celery.signals import task_postrun
 
 # Create the Flask app
 flask_app = create_app()
 
 # Update the Celery app's configuration with the Flask app's config
-celery_app.conf.update(flask_app.config)
\ No newline at end of file
+celery_app.conf.update(flask_app.config)
+
+# Tasks use the database through Flask-SQLAlchemy, which needs an application context.
+flask_app.app_context().push()
+
+@task_postrun.connect
+def close_db_session(*args, **kwargs):
+    # Every task starts with a fresh session rather than one left over from the previous task.
+    db.session.remove()
@@ -0,0 +1,37 @@
+"""Add full-text search index on books
+
+Revision ID: b7d2c4e9f1a3
+Revises: aca01f3bcd67
+Create Date: 2026-10-18 09:12:04.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2c4e9f1a3'
+down_revision = 'aca01f3bcd67'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only PostgreSQL has a native full-text engine; other databases use the
+    # application's in-process inverted index instead.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # The expression must match `_search_document()` in the book repository.
+    op.execute(
+        "CREATE INDEX ix_books_search_document ON books USING gin ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(author, '')), 'B'))"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_books_search_document")
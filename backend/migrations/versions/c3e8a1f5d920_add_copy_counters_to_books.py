@@ -0,0 +1,38 @@
+"""Add copy counters to books
+
+Revision ID: c3e8a1f5d920
+Revises: b7d2c4e9f1a3
+Create Date: 2026-10-18 11:40:27.903114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a1f5d920'
+down_revision = 'b7d2c4e9f1a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_copies', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('available_copies', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill the counters from the existing copies.
+    op.execute(
+        "UPDATE books SET "
+        "total_copies = (SELECT COUNT(*) FROM book_copies "
+        "WHERE book_copies.book_id = books.id AND book_copies.deleted_at IS NULL), "
+        "available_copies = (SELECT COUNT(*) FROM book_copies "
+        "WHERE book_copies.book_id = books.id AND book_copies.deleted_at IS NULL "
+        "AND book_copies.status = 'available')"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_column('available_copies')
+        batch_op.drop_column('total_copies')
@@ -0,0 +1,31 @@
+"""Add partial index for active loans by due date
+
+Revision ID: d4f9b2a6c718
+Revises: c3e8a1f5d920
+Create Date: 2026-10-18 14:05:51.276804
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f9b2a6c718'
+down_revision = 'c3e8a1f5d920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves the admin active-loan listing, which is keyset-paginated by (due_date, id).
+    with op.batch_alter_table('loans', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_loans_active_due_date', ['due_date', 'id'], unique=False,
+            postgresql_where=sa.text('return_date IS NULL'),
+            sqlite_where=sa.text('return_date IS NULL')
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('loans', schema=None) as batch_op:
+        batch_op.drop_index('ix_loans_active_due_date')
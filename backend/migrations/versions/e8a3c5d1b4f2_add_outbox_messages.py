@@ -0,0 +1,30 @@
+"""Add outbox messages
+
+Revision ID: e8a3c5d1b4f2
+Revises: d4f9b2a6c718
+Create Date: 2026-10-18 16:22:38.640157
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a3c5d1b4f2'
+down_revision = 'd4f9b2a6c718'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outbox_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_name', sa.String(length=200), nullable=False),
+    sa.Column('args', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('outbox_messages')
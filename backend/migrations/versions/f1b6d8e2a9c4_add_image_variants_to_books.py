@@ -0,0 +1,26 @@
+"""Add image variants to books
+
+Revision ID: f1b6d8e2a9c4
+Revises: e8a3c5d1b4f2
+Create Date: 2026-10-18 17:48:12.093516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b6d8e2a9c4'
+down_revision = 'e8a3c5d1b4f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_column('image_variants')
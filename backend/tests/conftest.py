@@ -0,0 +1,129 @@
+"""
+Test configuration: the app runs against a local SQLite file and an
+in-memory Redis. Routing tests add a second SQLite file as the read replica
+(see `replica_app`).
+
+The environment is set before the app is imported, since settings and the
+Redis clients are created at import time.
+"""
+import datetime
+import os
+import tempfile
+import uuid
+import fakeredis
+import jwt
+import pytest
+import redis
+import redis.asyncio
+
+_DB_DIR = tempfile.mkdtemp(prefix='library-tests-')
+os.environ.update({
+    'SECRET_KEY': 'test-secret-key-that-is-long-enough-for-hs256',
+    'DATABASE_URL': f"sqlite:///{os.path.join(_DB_DIR, 'primary.db')}",
+})
+REPLICA_URL = f"sqlite:///{os.path.join(_DB_DIR, 'replica.db')}"
+
+_redis_server = fakeredis.FakeServer()
+redis.from_url = lambda *args, **kwargs: fakeredis.FakeRedis(server=_redis_server)
+redis.asyncio.from_url = lambda *args, **kwargs: fakeredis.FakeAsyncRedis(server=_redis_server)
+
+from app import create_app  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.core.cache import book_cache  # noqa: E402
+from app.core.routing_session import REPLICA_BIND_KEY  # noqa: E402
+from app.core.security import principal_cache  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Book, BookCopy, Category, User  # noqa: E402
+from app.repositories.book_repository import catalog_index  # noqa: E402
+
+
+def _create_app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all(bind_key=None)
+    return app
+
+
+@pytest.fixture(scope='session')
+def app():
+    return _create_app()
+
+
+@pytest.fixture(scope='session')
+def _replica_app():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, 'READ_REPLICA_URL', REPLICA_URL)
+        app = _create_app()
+        with app.app_context():
+            db.metadata.create_all(db.engines[REPLICA_BIND_KEY])
+    return app
+
+
+@pytest.fixture
+def replica_app(_replica_app, monkeypatch):
+    """An app that routes reads to a second SQLite file, its read replica, for the duration of a test."""
+    monkeypatch.setattr(settings, 'READ_REPLICA_URL', REPLICA_URL)
+    return _replica_app
+
+
+@pytest.fixture(autouse=True)
+def clean_state(app):
+    """Empties the databases, Redis and the in-process caches and search index before each test."""
+    with app.app_context():
+        for engine in db.engines.values():
+            with engine.begin() as connection:
+                for table in reversed(db.metadata.sorted_tables):
+                    connection.execute(table.delete())
+    fakeredis.FakeRedis(server=_redis_server).flushall()
+    for cache in (book_cache, principal_cache):
+        cache._local.clear()
+    # An unbuilt index is loaded from the database by the next search.
+    catalog_index._built_at = None
+    yield
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Creates a user and returns the Authorization headers of a token for them."""
+    def make_user(role='patron'):
+        with app.app_context():
+            user = User(username=f'user-{uuid.uuid4().hex[:8]}', email=f'{uuid.uuid4().hex[:8]}@example.com',
+                        password_hash='x', role=role)
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+        token = jwt.encode({
+            'sub': user_id,
+            'role': role,
+            'jti': str(uuid.uuid4()),
+            'exp': datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5),
+        }, settings.SECRET_KEY, algorithm='HS256')
+        return {'Authorization': f'Bearer {token}'}
+    return make_user
+
+
+@pytest.fixture
+def admin_headers(make_user):
+    return make_user('admin')
+
+
+@pytest.fixture
+def make_book(app):
+    """Creates a book with available copies (and optional categories) and returns its id."""
+    def make_book(title='Dune', copies=0, isbn=None, category_names=(), author='Frank Herbert'):
+        with app.app_context():
+            categories = [Category.query.filter_by(name=name).first() or Category(name=name)
+                          for name in category_names]
+            book = Book(title=title, author=author, isbn=isbn or uuid.uuid4().hex[:13],
+                        total_copies=copies, available_copies=copies, categories=categories,
+                        copies=[BookCopy() for _ in range(copies)])
+            db.session.add(book)
+            db.session.commit()
+            return book.id
+    return make_book
@@ -0,0 +1,60 @@
+"""
+Tests the async (ASGI) catalog read path against the Flask endpoints it mirrors.
+"""
+import gzip
+import pytest
+from starlette.testclient import TestClient
+import asgi
+
+PUBLIC_URLS = (
+    '/api/books/', '/api/books/?q=dune', '/api/books/?category=Fiction',
+    '/api/books/?cursor=&per_page=1&include_total=true', '/api/books/?per_page=30', '/api/categories',
+)
+
+
+@pytest.fixture
+def async_client():
+    with TestClient(asgi.app) as client:
+        yield client
+
+
+@pytest.fixture
+def catalog(make_book):
+    book_ids = [make_book(title='Dune', copies=2, category_names=['Fiction']), make_book(title='Emma')]
+    # Enough books for the longest listing to be compressed.
+    for index in range(20):
+        make_book(title=f'Book {index}')
+    return book_ids
+
+
+def test_async_reads_answer_like_the_flask_endpoints(client, async_client, catalog):
+    for url in PUBLIC_URLS + tuple(f'/api/books/{book_id}' for book_id in catalog):
+        for encoding in ('identity', 'gzip'):
+            expected = client.get(url, headers={'Accept-Encoding': encoding})
+            response = async_client.get(url, headers={'Accept-Encoding': encoding})
+            assert response.status_code == 200, url
+            assert response.headers['ETag'] == expected.headers['ETag'], url
+            assert response.headers.get('Content-Encoding') == expected.headers.get('Content-Encoding'), url
+            # The async client decodes compressed bodies as it receives them.
+            expected_body = gzip.decompress(expected.data) if 'Content-Encoding' in expected.headers else expected.data
+            assert response.content == expected_body, url
+
+
+def test_async_reads_revalidate_with_the_same_etags(client, async_client, catalog):
+    for url in PUBLIC_URLS:
+        etag = client.get(url).headers['ETag']
+        assert async_client.get(url, headers={'If-None-Match': etag}).status_code == 304, url
+
+
+def test_async_errors_match_the_flask_endpoints(client, async_client, catalog):
+    for url in ('/api/books/999', '/api/books/?cursor=not-a-cursor!'):
+        expected = client.get(url)
+        response = async_client.get(url)
+        assert (response.status_code, response.json()) == (expected.status_code, expected.get_json())
+
+
+def test_other_requests_pass_through_to_flask(async_client, catalog, make_user):
+    response = async_client.post('/api/loans/', json={'book_id': catalog[0]}, headers=make_user())
+
+    assert response.status_code == 201
+    assert async_client.get(f'/api/books/{catalog[0]}').json()['available_copies'] == 1
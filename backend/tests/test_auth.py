@@ -0,0 +1,120 @@
+"""
+Tests authentication: principal resolution, the token denylist and password hashing.
+"""
+import time
+import fakeredis
+import pytest
+from app.config import settings
+from app.core import security
+from app.core.denylist import RevocationList
+from app.core.hashing import PasswordHasher
+from app.core.security import invalidate_principal
+from app.extensions import db
+from app.models import User
+from app.services import auth_service
+
+
+@pytest.fixture
+def user_repo_calls(monkeypatch):
+    """Counts the user lookups made to resolve principals."""
+    calls = []
+    get_by_id = security.user_repo.get_by_id
+
+    def counting_get_by_id(user_id):
+        calls.append(user_id)
+        return get_by_id(user_id)
+    monkeypatch.setattr(security.user_repo, 'get_by_id', counting_get_by_id)
+    return calls
+
+
+def test_principal_is_resolved_once_across_requests(client, make_user, user_repo_calls):
+    headers = make_user()
+
+    for _ in range(3):
+        assert client.get('/api/loans/my-loans', headers=headers).status_code == 200
+
+    assert len(user_repo_calls) == 1
+
+
+def test_invalidated_principal_is_reloaded(app, client, make_user, user_repo_calls):
+    headers = make_user()
+    client.get('/api/loans/my-loans', headers=headers)
+    user_id = user_repo_calls[0]
+
+    with app.app_context():
+        db.session.get(User, user_id).role = 'admin'
+        db.session.commit()
+        invalidate_principal(user_id)
+        principal = security._load_principal(user_id)
+
+    assert principal.role == 'admin'
+    assert len(user_repo_calls) == 2
+
+
+def test_deleted_user_is_rejected(app, client, make_user):
+    headers = make_user()
+    with app.app_context():
+        user = User.query.one()
+        db.session.delete(user)
+        db.session.commit()
+        invalidate_principal(user.id)
+
+    assert client.get('/api/loans/my-loans', headers=headers).status_code == 401
+
+
+def test_logged_out_token_is_rejected(client, make_user):
+    headers = make_user()
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+
+    assert client.get('/api/loans/my-loans', headers=headers).status_code == 401
+    assert client.get('/api/loans/my-loans', headers=make_user()).status_code == 200
+
+
+def test_bloom_filter_answers_valid_tokens_without_redis():
+    revocations = RevocationList(fakeredis.FakeRedis(), capacity=1000, error_rate=0.01, rebuild_interval=60)
+    revocations.revoke('revoked', time.time() + 60)
+    revocations.is_revoked('warm-up')
+    deadline = time.monotonic() + 2
+    while not revocations.stats()['healthy'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    before = revocations.stats()
+
+    assert not revocations.is_revoked('valid')
+    assert revocations.is_revoked('revoked')
+
+    after = revocations.stats()
+    assert after['filter_negatives'] - before['filter_negatives'] == 1
+    assert after['redis_checks'] - before['redis_checks'] == 1
+    assert after['entries'] == 1
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    """A single-worker hashing pool at bcrypt's minimum cost, with no queue."""
+    hasher = PasswordHasher(workers=1, queue_limit=0, timeout=10.0, rounds=4)
+    monkeypatch.setattr(auth_service, 'password_hasher', hasher)
+    return hasher
+
+
+def test_register_and_login_hash_off_thread(client, hasher):
+    credentials = {'email': 'reader@example.com', 'password': 'correct horse'}
+
+    assert client.post('/api/auth/register', json={'username': 'reader', **credentials}).status_code == 201
+    assert client.post('/api/auth/login', json=credentials).status_code == 200
+    assert client.post('/api/auth/login', json={**credentials, 'password': 'wrong'}).status_code == 401
+
+    stats = hasher.stats()
+    assert (stats['completed'], stats['in_flight'], stats['rejected']) == (3, 0, 0)
+
+
+def test_saturated_pool_sheds_registrations(client, hasher):
+    # Stands in for a hash already occupying the only worker.
+    hasher._slots.acquire()
+
+    response = client.post('/api/auth/register',
+                           json={'username': 'reader', 'email': 'reader@example.com', 'password': 'secret'})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(settings.HASH_POOL_RETRY_AFTER)
+    assert hasher.stats()['rejected'] == 1
@@ -0,0 +1,113 @@
+"""
+Tests the public book listing: search, pagination and its cache.
+"""
+import datetime
+import pytest
+from sqlalchemy import event
+from app.extensions import db
+from app.models import Book, Category
+from app.schemas.book_schemas import BookPublic
+from app.schemas.category_schemas import CategoryPublic
+
+
+def _titles(response):
+    return [book['title'] for book in response.get_json()['books']]
+
+
+def test_search_ranks_title_matches_above_author_matches(client, make_book):
+    make_book(title='Dune', author='Frank Herbert')
+    make_book(title='Children of Dune', author='Frank Herbert')
+    make_book(title='Herbert West', author='H. P. Lovecraft')
+
+    assert _titles(client.get('/api/books/?q=herbert')) == ['Herbert West', 'Dune', 'Children of Dune']
+
+
+def test_search_matches_word_prefixes_of_every_term(client, make_book):
+    make_book(title='Dune Messiah', author='Frank Herbert')
+    make_book(title='Dune', author='Brian Herbert')
+    make_book(title='Foundation', author='Isaac Asimov')
+
+    assert _titles(client.get('/api/books/?q=dun+fra')) == ['Dune Messiah']
+    assert _titles(client.get('/api/books/?q=une')) == []
+
+
+def test_search_sees_books_added_after_the_index_was_built(client, make_book, admin_headers):
+    make_book(title='Dune')
+    assert _titles(client.get('/api/books/?q=hyperion')) == []
+
+    client.post('/api/admin/books', data={'title': 'Hyperion', 'author': 'Dan Simmons', 'isbn': '9780553283686'},
+                headers=admin_headers)
+
+    assert _titles(client.get('/api/books/?q=hyperion')) == ['Hyperion']
+
+
+def test_cursor_pages_cover_the_listing_once(client, make_book):
+    book_ids = [make_book(title=f'Book {index}') for index in range(5)]
+
+    seen, cursor = [], ''
+    while cursor is not None:
+        page = client.get(f'/api/books/?cursor={cursor}&per_page=2&include_total=true').get_json()
+        assert page['total_items'] == 5
+        seen += [book['id'] for book in page['books']]
+        cursor = page['next_cursor']
+
+    assert seen == book_ids
+
+
+def test_cursor_listing_omits_the_total_unless_asked(client, make_book):
+    make_book()
+
+    assert client.get('/api/books/?cursor=').get_json()['total_items'] is None
+
+
+def test_invalid_cursor_is_rejected(client, make_book):
+    make_book()
+
+    # Undecodable, not an object, and an object whose id is not an integer.
+    for cursor in ('not-a-cursor!', 'WzFd', 'eyJpZCI6dHJ1ZX0', 'eyJpZCI6MS41fQ'):
+        response = client.get(f'/api/books/?cursor={cursor}')
+        assert response.status_code == 400, cursor
+        assert 'error' in response.get_json()
+
+
+@pytest.fixture
+def statements(app):
+    """Records the SQL statements run against the primary database."""
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+    with app.app_context():
+        engine = db.engines[None]
+    event.listen(engine, 'before_cursor_execute', record)
+    yield recorded
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+def test_listing_query_count_does_not_grow_with_the_page(client, make_book, statements):
+    def count_listing_statements(books):
+        for index in range(books):
+            make_book(title=f'Book {index}', copies=2, category_names=['Fiction', f'Series {index}'])
+        statements.clear()
+        # A page size of its own keeps the listing from being served by the cache.
+        assert len(client.get(f'/api/books/?per_page={50 + books}').get_json()['books']) >= books
+        return len(statements)
+
+    assert count_listing_statements(1) == count_listing_statements(5)
+
+
+def test_read_models_match_the_public_schemas(app, client, make_book):
+    book_id = make_book(title='Dune', copies=2, category_names=['Fiction', 'Classics'])
+    make_book(title='Removed')
+
+    with app.app_context():
+        book = db.session.get(Book, book_id)
+        expected_book = BookPublic.model_validate(book).model_dump()
+        expected_categories = [CategoryPublic.model_validate(category).model_dump()
+                               for category in Category.query.order_by(Category.id)]
+        Book.query.filter_by(title='Removed').one().deleted_at = datetime.datetime.utcnow()
+        db.session.commit()
+
+    assert client.get(f'/api/books/{book_id}').get_json() == expected_book
+    assert client.get('/api/books/?per_page=5').get_json()['books'] == [expected_book]
+    assert client.get('/api/categories').get_json() == expected_categories
@@ -0,0 +1,142 @@
+"""
+Tests the two-tier book cache: generations, L1/L2 tiers, stampede protection
+and the cached payloads.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+import fakeredis
+import pytest
+from app.core import serialization
+from app.core.cache import (
+    _MISSING, NEGATIVE_CACHE_TTL, STALE_GRACE_SECONDS, CacheEntry, LocalCache, TwoTierCache, _pack_entry,
+    catalog_namespace, invalidate_catalog
+)
+from app.read_models import book_read_model
+
+CHANNEL = 'test:invalidate'
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeRedis()
+
+
+def _make_cache(redis):
+    return TwoTierCache(redis, LocalCache(max_entries=100, ttl=60), channel=CHANNEL)
+
+
+def _titles(response):
+    return [book['title'] for book in response.get_json()['books']]
+
+
+def test_category_write_rolls_over_only_its_own_listings(app):
+    with app.app_context():
+        before = {name: catalog_namespace(name) for name in (None, 'Fiction', 'History')}
+        invalidate_catalog(category_names=['Fiction'], bump_catalog=False)
+        after = {name: catalog_namespace(name) for name in (None, 'Fiction', 'History')}
+
+    assert after['Fiction'] != before['Fiction']
+    assert (after[None], after['History']) == (before[None], before['History'])
+
+
+def test_listings_reflect_catalog_writes(client, make_book, admin_headers):
+    book_id = make_book(title='Dune', category_names=['Fiction'])
+    assert _titles(client.get('/api/books/')) == ['Dune']
+    assert _titles(client.get('/api/books/?category=Fiction')) == ['Dune']
+
+    client.put(f'/api/admin/books/{book_id}', data={'title': 'Dune Messiah'}, headers=admin_headers)
+
+    assert _titles(client.get('/api/books/')) == ['Dune Messiah']
+    assert _titles(client.get('/api/books/?category=Fiction')) == ['Dune Messiah']
+
+
+def test_reads_fall_through_l1_then_l2(redis):
+    cache = _make_cache(redis)
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return b'payload'
+
+    assert cache.get_or_compute('key', compute, ttl=60) == b'payload'
+    assert cache.get_or_compute('key', compute, ttl=60) == b'payload'
+    # Another worker shares L2 but starts with an empty L1.
+    assert _make_cache(redis).get_or_compute('key', compute, ttl=60) == b'payload'
+
+    assert len(computed) == 1
+    stats = cache.stats()
+    assert (stats['l1']['hits'], stats['l1']['misses'], stats['l2']['misses']) == (1, 1, 1)
+
+
+def test_invalidation_drops_l1_copies_in_other_workers(redis):
+    reader, writer = _make_cache(redis), _make_cache(redis)
+    reader.get_or_compute('key', lambda: b'old', ttl=60)
+    deadline = time.monotonic() + 2
+    while not redis.pubsub_numsub(CHANNEL)[0][1] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    writer.invalidate(delete_keys=['key'])
+
+    while reader.read_local('key', count=False) is not _MISSING and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert reader.read_local('key', count=False) is _MISSING
+    assert reader.get_or_compute('key', lambda: b'new', ttl=60) == b'new'
+
+
+def test_absent_values_are_cached_briefly(redis):
+    cache = _make_cache(redis)
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return None
+
+    assert cache.get_or_compute('key', compute, ttl=60) is None
+    assert _make_cache(redis).get_or_compute('key', compute, ttl=60) is None
+
+    assert len(computed) == 1
+    assert 0 < redis.ttl('key') <= NEGATIVE_CACHE_TTL + STALE_GRACE_SECONDS
+
+
+def test_stale_entry_is_served_while_another_worker_rebuilds(redis):
+    cache = _make_cache(redis)
+    redis.set('key', _pack_entry(CacheEntry(b'stale', 0.1, time.time() - 1)), ex=60)
+    lock = redis.lock('lock:key', timeout=10)
+    assert lock.acquire(blocking=False)
+
+    assert cache.get_or_compute('key', lambda: pytest.fail('rebuilt twice'), ttl=60) == b'stale'
+    assert cache.stats()['stale_served'] == 1
+
+    lock.release()
+    assert cache.get_or_compute('key', lambda: b'fresh', ttl=60) == b'fresh'
+
+
+def test_concurrent_misses_rebuild_once(redis):
+    cache = _make_cache(redis)
+    computed = []
+
+    def compute():
+        computed.append(1)
+        time.sleep(0.2)
+        return b'payload'
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: cache.get_or_compute('key', compute, ttl=60), range(4)))
+
+    assert results == [b'payload'] * 4
+    assert len(computed) == 1
+
+
+def test_cache_hits_send_the_stored_bytes(client, make_book, monkeypatch):
+    book_id = make_book(title='Dune', copies=2)
+    first = client.get(f'/api/books/{book_id}')
+
+    def fail(*args):
+        raise AssertionError('cache hit went to the database')
+    monkeypatch.setattr(book_read_model, 'fetch_book', fail)
+    monkeypatch.setattr(serialization, 'dumps', fail)
+    second = client.get(f'/api/books/{book_id}')
+
+    assert second.data == first.data
+    assert second.mimetype == 'application/json'
+    assert second.get_json()['available_copies'] == 2
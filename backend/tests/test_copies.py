@@ -0,0 +1,69 @@
+"""
+Tests the batch inventory operations on book copies.
+"""
+from app.schemas.admin_schemas import MAX_COPY_BATCH
+
+
+def _counts(client, book_id):
+    book = client.get(f'/api/books/{book_id}').get_json()
+    return book['total_copies'], book['available_copies']
+
+
+def _copy_statuses(client, book_id):
+    copies = client.get(f'/api/books/{book_id}/copies?per_page=100').get_json()['copies']
+    return {copy['id']: copy['status'] for copy in copies}
+
+
+def test_batch_add_creates_available_copies(client, make_book, admin_headers):
+    book_id = make_book(copies=1)
+
+    response = client.post(f'/api/admin/books/{book_id}/copies/batch', json={'count': 3}, headers=admin_headers)
+
+    assert response.status_code == 201
+    assert len(response.get_json()['copy_ids']) == 3
+    assert _counts(client, book_id) == (4, 4)
+    assert client.post('/api/admin/books/999/copies/batch', json={'count': 1},
+                       headers=admin_headers).status_code == 404
+
+
+def test_batch_status_update_skips_loaned_and_unknown_copies(client, make_book, make_user, admin_headers):
+    book_id = make_book(copies=3)
+    loaned_id = client.post('/api/loans/', json={'book_id': book_id}, headers=make_user()).get_json()['book_copy_id']
+    copy_ids = sorted(_copy_statuses(client, book_id))
+
+    response = client.patch('/api/admin/copies/status', json={'copy_ids': copy_ids + [999], 'status': 'maintenance'},
+                            headers=admin_headers)
+
+    updated_ids = sorted(set(copy_ids) - {loaned_id})
+    assert response.get_json() == {'updated_ids': updated_ids, 'skipped_ids': sorted([loaned_id, 999])}
+    assert _counts(client, book_id) == (3, 0)
+    assert _copy_statuses(client, book_id)[updated_ids[0]] == 'maintenance'
+
+    client.patch('/api/admin/copies/status', json={'copy_ids': updated_ids[:1], 'status': 'available'},
+                 headers=admin_headers)
+    assert _counts(client, book_id) == (3, 1)
+
+
+def test_batch_delete_skips_unknown_and_deleted_copies(client, make_book, admin_headers):
+    first_book, second_book = make_book(copies=2), make_book(title='Emma', copies=1)
+    first_ids, second_ids = sorted(_copy_statuses(client, first_book)), sorted(_copy_statuses(client, second_book))
+    client.delete(f'/api/admin/copies/{first_ids[0]}', headers=admin_headers)
+
+    response = client.post('/api/admin/copies/batch-delete', json={'copy_ids': first_ids + second_ids + [999]},
+                           headers=admin_headers)
+
+    assert response.get_json() == {'deleted_ids': [first_ids[1]] + second_ids,
+                                    'skipped_ids': [first_ids[0], 999]}
+    assert _counts(client, first_book) == (0, 0)
+    assert _counts(client, second_book) == (0, 0)
+
+
+def test_batches_are_capped(client, make_book, admin_headers):
+    book_id = make_book()
+
+    assert client.post(f'/api/admin/books/{book_id}/copies/batch', json={'count': MAX_COPY_BATCH + 1},
+                       headers=admin_headers).status_code == 422
+    assert client.post('/api/admin/copies/batch-delete', json={'copy_ids': list(range(MAX_COPY_BATCH + 1))},
+                       headers=admin_headers).status_code == 422
+    assert client.patch('/api/admin/copies/status', json={'copy_ids': [1], 'status': 'loaned'},
+                        headers=admin_headers).status_code == 422
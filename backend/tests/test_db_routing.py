@@ -0,0 +1,202 @@
+"""
+Tests read/write routing between the primary and the read replica, using two
+SQLite files that hold different titles for the same book.
+"""
+import datetime
+import uuid
+import jwt
+import pytest
+from flask import g
+from sqlalchemy import insert, select
+from app.config import settings
+from app.core.cache import book_scope, invalidate_catalog
+from app.core.db_routing import mark_written, replica_reads
+from app.core.redis_client import redis_client
+from app.core.routing_session import REPLICA_BIND_KEY
+from app.core.security import _get_current_user_from_token
+from app.extensions import db
+from app.models import Book, Category, User
+
+PRIMARY_TITLE = 'Primary title'
+REPLICA_TITLE = 'Replica title'
+
+
+@pytest.fixture
+def app(replica_app):
+    return replica_app
+
+
+@pytest.fixture
+def primary(app):
+    with app.app_context():
+        return db.engines[None]
+
+
+@pytest.fixture
+def replica(app):
+    with app.app_context():
+        return db.engines[REPLICA_BIND_KEY]
+
+
+def _seed_book(engine, book_id, title):
+    with engine.begin() as connection:
+        connection.execute(insert(Book).values(id=book_id, title=title, author='Author', isbn=f'isbn-{book_id}'))
+
+
+def _seed_user(engine, user_id, role):
+    with engine.begin() as connection:
+        connection.execute(insert(User).values(
+            id=user_id, username=f'user{user_id}', email=f'user{user_id}@example.com', password_hash='x', role=role
+        ))
+
+
+def _title(book_id=1, for_update=False):
+    statement = select(Book.title).where(Book.id == book_id)
+    if for_update:
+        statement = statement.with_for_update()
+    return db.session.scalar(statement)
+
+
+def _token(user_id):
+    payload = {
+        'sub': user_id,
+        'jti': str(uuid.uuid4()),
+        'exp': datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5),
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
+
+
+def test_get_request_reads_from_replica(client, primary, replica):
+    _seed_book(primary, 1, PRIMARY_TITLE)
+    _seed_book(replica, 1, REPLICA_TITLE)
+
+    response = client.get('/api/books/1')
+
+    assert response.status_code == 200
+    assert response.get_json()['title'] == REPLICA_TITLE
+
+
+def test_other_methods_read_from_primary(app, primary, replica):
+    _seed_book(primary, 1, PRIMARY_TITLE)
+    _seed_book(replica, 1, REPLICA_TITLE)
+
+    with app.test_request_context('/', method='POST'):
+        app.preprocess_request()
+        assert _title() == PRIMARY_TITLE
+
+
+def test_flush_pins_session_to_primary(app, primary, replica):
+    _seed_book(primary, 1, PRIMARY_TITLE)
+    _seed_book(replica, 1, REPLICA_TITLE)
+
+    with app.test_request_context('/', method='GET'):
+        app.preprocess_request()
+        assert _title() == REPLICA_TITLE
+
+        db.session.add(Category(name='Fiction'))
+        db.session.flush()
+
+        assert _title() == PRIMARY_TITLE
+        assert g.db_wrote
+        db.session.rollback()
+
+
+def test_select_for_update_goes_to_primary(app, primary, replica):
+    _seed_book(primary, 1, PRIMARY_TITLE)
+    _seed_book(replica, 1, REPLICA_TITLE)
+
+    with app.test_request_context('/', method='GET'):
+        app.preprocess_request()
+        assert _title(for_update=True) == PRIMARY_TITLE
+        # Once rows are locked, later reads of the session stay on the primary too.
+        assert _title() == PRIMARY_TITLE
+        db.session.rollback()
+
+
+def test_read_only_block_uses_replica_outside_requests(app, primary, replica):
+    _seed_book(primary, 1, PRIMARY_TITLE)
+    _seed_book(replica, 1, REPLICA_TITLE)
+
+    with app.app_context():
+        assert _title() == PRIMARY_TITLE
+        with replica_reads():
+            assert _title() == REPLICA_TITLE
+
+        db.session.add(Category(name='Fiction'))
+        db.session.flush()
+        with replica_reads():
+            assert _title() == PRIMARY_TITLE
+
+        # The pin is released with the transaction, as workers reuse their session.
+        db.session.rollback()
+        with replica_reads():
+            assert _title() == REPLICA_TITLE
+
+
+def test_sticky_window_reads_written_scope_from_primary(client, primary, replica):
+    for book_id in (1, 2):
+        _seed_book(primary, book_id, PRIMARY_TITLE)
+        _seed_book(replica, book_id, REPLICA_TITLE)
+
+    mark_written(book_scope(1))
+
+    assert client.get('/api/books/1').get_json()['title'] == PRIMARY_TITLE
+    assert client.get('/api/books/2').get_json()['title'] == REPLICA_TITLE
+
+
+def test_catalog_write_only_pins_what_it_invalidated(app, client, primary, replica):
+    for book_id in (1, 2):
+        _seed_book(primary, book_id, PRIMARY_TITLE)
+        _seed_book(replica, book_id, REPLICA_TITLE)
+    assert client.get('/api/books/1').get_json()['title'] == REPLICA_TITLE
+
+    with app.app_context():
+        invalidate_catalog(book_ids=[1])
+
+    assert client.get('/api/books/1').get_json()['title'] == PRIMARY_TITLE
+    assert client.get('/api/books/2').get_json()['title'] == REPLICA_TITLE
+
+
+def test_sticky_window_expires(client, primary, replica):
+    _seed_book(primary, 1, PRIMARY_TITLE)
+    _seed_book(replica, 1, REPLICA_TITLE)
+    sticky_key = f"db:sticky:{book_scope(1)}"
+
+    mark_written(book_scope(1))
+    assert 0 < redis_client.ttl(sticky_key) <= settings.READ_REPLICA_STICKY_SECONDS
+    # Stands in for waiting out the window.
+    redis_client.delete(sticky_key)
+
+    assert client.get('/api/books/1').get_json()['title'] == REPLICA_TITLE
+
+
+def test_user_reads_own_writes_from_primary(app, primary, replica):
+    _seed_user(primary, 1, 'patron')
+    _seed_user(replica, 1, 'patron')
+    _seed_book(primary, 1, PRIMARY_TITLE)
+    _seed_book(replica, 1, REPLICA_TITLE)
+    headers = {'Authorization': f'Bearer {_token(1)}'}
+
+    with app.test_request_context('/', method='GET', headers=headers):
+        app.preprocess_request()
+        _get_current_user_from_token()
+        assert _title() == REPLICA_TITLE
+
+    mark_written(1)
+    with app.test_request_context('/', method='GET', headers=headers):
+        app.preprocess_request()
+        _get_current_user_from_token()
+        assert _title() == PRIMARY_TITLE
+
+
+def test_principals_load_from_primary(app, primary, replica):
+    # The replica still holds the role from before the user was promoted, and not the new user at all.
+    _seed_user(primary, 1, 'admin')
+    _seed_user(replica, 1, 'patron')
+    _seed_user(primary, 2, 'patron')
+
+    for user_id, role in ((1, 'admin'), (2, 'patron')):
+        with app.test_request_context('/', method='GET', headers={'Authorization': f'Bearer {_token(user_id)}'}):
+            app.preprocess_request()
+            user, _ = _get_current_user_from_token()
+            assert user.role == role
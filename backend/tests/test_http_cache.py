@@ -0,0 +1,123 @@
+"""
+Tests conditional GETs (ETag/304) and negotiated compression of catalog responses.
+"""
+import gzip
+import brotli
+from app.config import settings
+from app.services import book_service
+
+
+def _revalidate(client, url, response, **headers):
+    return client.get(url, headers={'If-None-Match': response.headers['ETag'], **headers})
+
+
+def test_book_details_revalidate_until_the_book_changes(client, make_book, admin_headers):
+    book_id = make_book(title='Dune')
+    url = f'/api/books/{book_id}'
+    first = client.get(url)
+
+    assert first.cache_control.public and first.cache_control.no_cache
+    assert _revalidate(client, url, first).status_code == 304
+
+    client.put(f'/api/admin/books/{book_id}', data={'title': 'Dune Messiah'}, headers=admin_headers)
+
+    changed = _revalidate(client, url, first)
+    assert changed.status_code == 200
+    assert changed.get_json()['title'] == 'Dune Messiah'
+    assert changed.headers['ETag'] != first.headers['ETag']
+
+
+def test_removed_book_is_not_reported_unmodified(client, make_book, admin_headers):
+    book_id = make_book()
+    first = client.get(f'/api/books/{book_id}')
+
+    client.delete(f'/api/admin/books/{book_id}', headers=admin_headers)
+
+    assert _revalidate(client, f'/api/books/{book_id}', first).status_code == 404
+
+
+def test_listing_304_is_answered_without_loading_the_listing(client, make_book, monkeypatch):
+    make_book()
+    for url in ('/api/books/?page=1', '/api/books/?cursor='):
+        first = client.get(url)
+
+        monkeypatch.setattr(book_service.book_repo, 'search_and_filter', lambda *args: 1 / 0)
+        monkeypatch.setattr(book_service.book_repo, 'search_after', lambda *args: 1 / 0)
+        assert _revalidate(client, url, first).status_code == 304
+        monkeypatch.undo()
+
+
+def test_listing_etag_changes_with_the_catalog(client, make_book, admin_headers):
+    make_book(title='Dune')
+    first = client.get('/api/books/')
+
+    client.post('/api/admin/books', data={'title': 'Emma', 'author': 'Jane Austen', 'isbn': '9780141439587'},
+                headers=admin_headers)
+
+    assert _revalidate(client, '/api/books/', first).status_code == 200
+
+
+def test_categories_revalidate_until_the_list_changes(client, admin_headers):
+    first = client.get('/api/categories')
+    assert _revalidate(client, '/api/categories', first).status_code == 304
+
+    client.post('/api/admin/categories', json={'name': 'Fiction'}, headers=admin_headers)
+
+    changed = _revalidate(client, '/api/categories', first)
+    assert changed.status_code == 200
+    assert [category['name'] for category in changed.get_json()] == ['Fiction']
+
+
+def _large_listing(make_book):
+    # Enough books for the listing to pass the compression threshold.
+    for index in range(20):
+        make_book(title=f'Book {index}', category_names=['Fiction'])
+
+
+def test_cached_listing_is_sent_in_the_accepted_encoding(client, make_book):
+    _large_listing(make_book)
+    plain = client.get('/api/books/?per_page=20')
+    assert len(plain.data) >= settings.COMPRESSION_MIN_SIZE
+    assert 'Content-Encoding' not in plain.headers
+
+    decompressors = {'gzip': gzip.decompress, 'br': brotli.decompress}
+    for accept, encoding in (('gzip', 'gzip'), ('gzip, br', 'br'), ('gzip;q=1.0, br;q=0.5', 'gzip')):
+        response = client.get('/api/books/?per_page=20', headers={'Accept-Encoding': accept})
+        assert response.headers['Content-Encoding'] == encoding
+        assert decompressors[encoding](response.data) == plain.data
+        assert 'Accept-Encoding' in response.vary
+
+
+def test_small_bodies_are_not_compressed(client, make_book):
+    book_id = make_book()
+
+    response = client.get(f'/api/books/{book_id}', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_etag_is_weak_whenever_an_encoding_is_accepted(client, make_book):
+    book_id = make_book()
+    url = f'/api/books/{book_id}'
+
+    strong = client.get(url)
+    weak = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    not_modified = _revalidate(client, url, weak, **{'Accept-Encoding': 'gzip'})
+
+    assert strong.get_etag() == (weak.get_etag()[0], False)
+    assert weak.get_etag()[1] and not_modified.get_etag() == weak.get_etag()
+    assert not_modified.status_code == 304
+
+
+def test_uncached_responses_are_compressed_on_the_fly(client, make_book, make_user, admin_headers):
+    book_id = make_book(copies=30)
+    headers = make_user()
+    for _ in range(30):
+        client.post('/api/loans/', json={'book_id': book_id}, headers=headers)
+
+    for url in ('/api/admin/loans', '/api/admin/loans?format=ndjson'):
+        plain = client.get(url, headers=admin_headers)
+        response = client.get(url, headers={**admin_headers, 'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data) == plain.data
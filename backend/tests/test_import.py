@@ -0,0 +1,89 @@
+"""
+Tests the bulk catalog import endpoint and CLI command.
+"""
+import io
+import json
+from app.extensions import db
+from app.models import Book, BookCopy, Category
+
+CSV_IMPORT = (
+    "title,author,isbn,categories,copies\n"
+    "Dune,Frank Herbert,9780441013593,Fiction|Classics,2\n"
+    "Emma,Jane Austen,9780141439587,,\n"
+    ",Nobody,9780000000001,,\n"
+    "Dune again,Frank Herbert,9780441013593,,\n"
+    "Persuasion,Jane Austen,9780141439686,Poetry,\n"
+)
+
+
+def _import(client, headers, body, filename, **params):
+    data = {'file': (io.BytesIO(body), filename)}
+    return client.post('/api/admin/books/import', data=data, headers=headers, query_string=params)
+
+
+def test_csv_import_reports_rejected_rows(app, client, admin_headers):
+    with app.app_context():
+        db.session.add_all([Category(name='Fiction'), Category(name='Classics')])
+        db.session.commit()
+
+    report = _import(client, admin_headers, CSV_IMPORT.encode('utf-8'), 'books.csv', batch_size=2).get_json()
+
+    assert (report['imported'], report['copies'], report['conflicts'], report['invalid']) == (2, 2, 1, 2)
+    assert [(error['row'], error['isbn']) for error in report['errors']] == [
+        (4, '9780000000001'), (5, '9780441013593'), (6, '9780141439686')
+    ]
+    assert 'title' in report['errors'][0]['error']
+    assert 'Unknown categories: Poetry' in report['errors'][2]['error']
+    assert not report['errors_truncated']
+    with app.app_context():
+        dune = Book.query.filter_by(isbn='9780441013593').one()
+        assert sorted(category.name for category in dune.categories) == ['Classics', 'Fiction']
+        assert (dune.total_copies, dune.available_copies, BookCopy.query.count()) == (2, 2, 2)
+
+
+def test_jsonl_import_rejects_malformed_and_oversized_rows(client, admin_headers):
+    lines = [
+        json.dumps({'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '9780441013593', 'copies': 1}),
+        '{not json',
+        json.dumps(['a', 'list']),
+        json.dumps({'title': 'Long', 'author': 'Frank Herbert', 'isbn': '97804410135931234'}),
+        '',
+    ]
+
+    report = _import(client, admin_headers, '\n'.join(lines).encode('utf-8'), 'books.jsonl').get_json()
+
+    assert (report['imported'], report['invalid']) == (1, 3)
+    assert [error['row'] for error in report['errors']] == [2, 3, 4]
+    assert 'isbn' in report['errors'][2]['error']
+
+
+def test_imported_books_are_listed_and_searchable(client, admin_headers, make_book):
+    make_book(title='Emma', author='Jane Austen')
+    assert len(client.get('/api/books/').get_json()['books']) == 1
+    client.get('/api/books/?q=dune')
+
+    _import(client, admin_headers, b"title,author,isbn\nDune,Frank Herbert,9780441013593\n", 'books.csv')
+
+    assert len(client.get('/api/books/').get_json()['books']) == 2
+    assert [book['title'] for book in client.get('/api/books/?q=dune').get_json()['books']] == ['Dune']
+
+
+def test_invalid_utf8_is_rejected(client, admin_headers):
+    response = _import(client, admin_headers, CSV_IMPORT.encode('utf-16'), 'books.csv')
+
+    assert response.status_code == 400
+    assert 'UTF-8' in response.get_json()['error']
+
+
+def test_unknown_format_is_rejected(client, admin_headers):
+    assert _import(client, admin_headers, b'<books/>', 'books.xml').status_code == 400
+
+
+def test_cli_import_prints_the_report(app, tmp_path):
+    path = tmp_path / 'books.csv'
+    path.write_text("title,author,isbn\nDune,Frank Herbert,9780441013593\n", encoding='utf-8')
+
+    result = app.test_cli_runner().invoke(args=['import-catalog', str(path)])
+
+    assert result.exit_code == 0
+    assert json.loads(result.output)['imported'] == 1
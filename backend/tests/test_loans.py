@@ -0,0 +1,123 @@
+"""
+Tests the loan path: copy claims and the book's availability counters.
+"""
+import json
+from sqlalchemy.exc import OperationalError
+from app.extensions import db
+from app.models import Book, BookCopy, OutboxMessage
+from app.services import loan_service
+
+
+def test_loans_decrement_availability_in_their_transaction(app, client, make_user, make_book):
+    book_id = make_book(copies=2)
+    headers = make_user()
+
+    for _ in range(2):
+        assert client.post('/api/loans/', json={'book_id': book_id}, headers=headers).status_code == 201
+
+    with app.app_context():
+        book = db.session.get(Book, book_id)
+        assert (book.total_copies, book.available_copies) == (2, 0)
+    assert client.get(f'/api/books/{book_id}').get_json()['available_copies'] == 0
+    assert client.post('/api/loans/', json={'book_id': book_id}, headers=headers).status_code == 404
+
+
+def test_loan_records_follow_up_tasks_in_the_outbox(app, client, make_user, make_book):
+    book_id = make_book(copies=1)
+
+    response = client.post('/api/loans/', json={'book_id': book_id}, headers=make_user())
+
+    with app.app_context():
+        task_names = sorted(message.task_name for message in OutboxMessage.query.all())
+    assert task_names == ['app.tasks.schedule_loan_due_events', 'app.tasks.send_loan_confirmation_email']
+    assert response.get_json()['id']
+
+
+def test_active_loan_pages_follow_the_cursor_and_clamp_per_page(client, make_user, make_book, admin_headers,
+                                                               monkeypatch):
+    monkeypatch.setattr(loan_service, 'MAX_ACTIVE_LOANS_PER_PAGE', 2)
+    book_id = make_book(copies=3)
+    headers = make_user()
+    for _ in range(3):
+        client.post('/api/loans/', json={'book_id': book_id}, headers=headers)
+
+    first = client.get('/api/admin/loans?cursor=&per_page=10000', headers=admin_headers).get_json()
+    second = client.get(f"/api/admin/loans?cursor={first['next_cursor']}&per_page=10000",
+                        headers=admin_headers).get_json()
+
+    assert (first['per_page'], len(first['loans']), len(second['loans'])) == (2, 2, 1)
+    assert second['next_cursor'] is None
+    assert client.get('/api/admin/loans?cursor=bogus', headers=admin_headers).status_code == 400
+
+
+def test_each_loan_claims_a_different_available_copy(app, client, make_user, make_book):
+    book_id = make_book(copies=3)
+    with app.app_context():
+        copies = BookCopy.query.order_by(BookCopy.id).all()
+        copies[0].status = 'maintenance'
+        db.session.commit()
+        copy_ids = [copy.id for copy in copies]
+
+    headers = make_user()
+    claimed = [client.post('/api/loans/', json={'book_id': book_id}, headers=headers).get_json()['book_copy_id']
+               for _ in range(2)]
+
+    assert claimed == copy_ids[1:]
+
+
+def test_transient_claim_errors_are_retried(client, make_user, make_book, monkeypatch):
+    book_id = make_book(copies=1)
+    claim = loan_service.book_copy_repo.claim_available_for_book
+    attempts = []
+
+    def flaky_claim(book_id):
+        attempts.append(book_id)
+        if len(attempts) == 1:
+            raise OperationalError('SELECT', {}, Exception('deadlock detected'))
+        return claim(book_id)
+    monkeypatch.setattr(loan_service.book_copy_repo, 'claim_available_for_book', flaky_claim)
+    monkeypatch.setattr(loan_service, 'CLAIM_RETRY_DELAY', 0)
+
+    assert client.post('/api/loans/', json={'book_id': book_id}, headers=make_user()).status_code == 201
+    assert len(attempts) == 2
+
+
+def test_persistent_claim_errors_answer_conflict(client, make_user, make_book, monkeypatch):
+    book_id = make_book(copies=1)
+
+    def failing_claim(book_id):
+        raise OperationalError('SELECT', {}, Exception('could not obtain lock'))
+    monkeypatch.setattr(loan_service.book_copy_repo, 'claim_available_for_book', failing_claim)
+    monkeypatch.setattr(loan_service, 'CLAIM_RETRY_DELAY', 0)
+
+    assert client.post('/api/loans/', json={'book_id': book_id}, headers=make_user()).status_code == 409
+
+
+def test_copy_changes_keep_the_counters_current(client, make_book, admin_headers):
+    book_id = make_book(copies=1)
+
+    copy_id = client.post(f'/api/admin/books/{book_id}/copies', headers=admin_headers).get_json()['copy_id']
+    book = client.get(f'/api/books/{book_id}').get_json()
+    assert (book['total_copies'], book['available_copies']) == (2, 2)
+    assert 'copies' not in book
+
+    client.delete(f'/api/admin/copies/{copy_id}', headers=admin_headers)
+    book = client.get(f'/api/books/{book_id}').get_json()
+    assert (book['total_copies'], book['available_copies']) == (1, 1)
+
+
+def test_active_loans_stream_as_ndjson_in_due_order(client, make_user, make_book, admin_headers, monkeypatch):
+    monkeypatch.setattr(loan_service, 'LOAN_STREAM_BATCH_SIZE', 2)
+    book_id = make_book(copies=3)
+    headers = make_user()
+    loan_ids = [
+        client.post('/api/loans/', json={'book_id': book_id, 'loan_days': loan_days}, headers=headers).get_json()['id']
+        for loan_days in (14, 3, 7)
+    ]
+
+    response = client.get('/api/admin/loans?format=ndjson', headers=admin_headers)
+
+    assert response.mimetype == 'application/x-ndjson'
+    streamed = [json.loads(line) for line in response.data.splitlines()]
+    assert streamed == client.get('/api/admin/loans', headers=admin_headers).get_json()
+    assert [loan['id'] for loan in streamed] == [loan_ids[1], loan_ids[2], loan_ids[0]]
@@ -0,0 +1,105 @@
+"""
+Tests batched notification delivery against a local aiosmtpd server.
+"""
+import socket
+import pytest
+from aiosmtpd.controller import Controller
+from app.config import settings
+from app.core.mailer import SMTPConnectionPool
+from app.core.notifications import notification_queue
+from app.services import notification_service
+
+
+class _RecordingHandler:
+    """Records each message received with the client address of its SMTP connection."""
+
+    def __init__(self):
+        self.deliveries = []
+        self.rejecting = False
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.rejecting:
+            return '451 Try again later'
+        self.deliveries.append((session.peer, envelope.rcpt_tos[0]))
+        return '250 OK'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = _RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    yield handler, controller
+    controller.stop()
+
+
+@pytest.fixture
+def mail_pool(smtp_server, monkeypatch):
+    _, controller = smtp_server
+    pool = SMTPConnectionPool(controller.hostname, controller.port, size=1)
+    monkeypatch.setattr(notification_service, 'mail_pool', pool)
+    yield pool
+    pool.close()
+
+
+def _borrow(client, make_user, make_book, count):
+    loan_ids = []
+    for index in range(count):
+        book_id = make_book(title=f'Book {index}', copies=1)
+        response = client.post('/api/loans/', json={'book_id': book_id}, headers=make_user())
+        loan_ids.append(response.get_json()['id'])
+    return loan_ids
+
+
+def test_flush_sends_batches_over_one_pooled_connection(app, client, make_user, make_book, smtp_server, mail_pool):
+    handler, _ = smtp_server
+    loan_ids = _borrow(client, make_user, make_book, 5)
+
+    with app.app_context():
+        notification_queue.enqueue_many([('confirmation', loan_id) for loan_id in loan_ids[:3]])
+        assert notification_service.flush_notifications() == (3, 0)
+        notification_queue.enqueue_many([('reminder', loan_id) for loan_id in loan_ids[3:]])
+        assert notification_service.flush_notifications() == (2, 0)
+
+    assert len(handler.deliveries) == 5
+    # Both batches reused the single pooled connection rather than opening one per message.
+    assert len({peer for peer, _ in handler.deliveries}) == 1
+
+
+def test_flush_reports_throughput_and_queue_lag(app, client, make_user, make_book, mail_pool):
+    loan_ids = _borrow(client, make_user, make_book, 2)
+
+    with app.app_context():
+        notification_queue.enqueue_many([('confirmation', loan_id) for loan_id in loan_ids])
+        assert notification_queue.stats()['lag'] >= 0.0
+        notification_service.flush_notifications()
+        stats = notification_queue.stats()
+
+    assert stats['sent_total'] == 2
+    assert stats['failed_total'] == 0
+    assert stats['last_batch_size'] == 2
+    assert stats['last_sent_per_second'] > 0
+    assert stats['pending'] == 0
+    assert stats['lag'] == 0.0
+
+
+def test_failed_sends_are_requeued_until_their_attempts_run_out(app, client, make_user, make_book, smtp_server,
+                                                                mail_pool, monkeypatch):
+    handler, _ = smtp_server
+    handler.rejecting = True
+    monkeypatch.setattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 2)
+    loan_id, = _borrow(client, make_user, make_book, 1)
+
+    with app.app_context():
+        notification_queue.enqueue('confirmation', loan_id)
+        assert notification_service.flush_notifications() == (0, 1)
+        assert notification_queue.stats()['pending'] == 1
+        # The second failure is the last attempt.
+        assert notification_service.flush_notifications() == (0, 1)
+        assert notification_queue.stats()['pending'] == 0
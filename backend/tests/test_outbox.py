@@ -0,0 +1,55 @@
+"""
+Tests the transactional outbox and its relay to Celery.
+"""
+import pytest
+from app.celery_app import celery_app
+from app.models import OutboxMessage
+from app.services import outbox_service
+
+
+@pytest.fixture
+def sent_tasks(monkeypatch):
+    """Records the tasks handed to the broker."""
+    sent = []
+    monkeypatch.setattr(celery_app, 'send_task', lambda name, args: sent.append((name, args)))
+    return sent
+
+
+def _borrow(client, make_user, make_book, copies=1):
+    book_id = make_book(copies=copies)
+    headers = make_user()
+    return [client.post('/api/loans/', json={'book_id': book_id}, headers=headers) for _ in range(copies + 1)]
+
+
+def test_failed_loans_record_no_tasks(app, client, make_user, make_book):
+    responses = _borrow(client, make_user, make_book)
+
+    assert [response.status_code for response in responses] == [201, 404]
+    with app.app_context():
+        assert OutboxMessage.query.count() == 2
+
+
+def test_relay_hands_off_tasks_in_batches_and_deletes_them(app, client, make_user, make_book, sent_tasks):
+    loan_ids = [response.get_json()['id'] for response in _borrow(client, make_user, make_book, copies=3)[:3]]
+
+    with app.app_context():
+        assert outbox_service.get_backlog()['pending'] == 6
+        assert outbox_service.relay_outbox(batch_size=4) == 6
+        assert outbox_service.get_backlog() == {'pending': 0, 'oldest_age': 0.0}
+
+    confirmations = [args[0] for name, args in sent_tasks if name == 'app.tasks.send_loan_confirmation_email']
+    assert sorted(confirmations) == loan_ids
+    assert len(sent_tasks) == 6
+
+
+def test_relay_keeps_tasks_the_broker_did_not_take(app, client, make_user, make_book, monkeypatch):
+    _borrow(client, make_user, make_book)
+
+    def unavailable(name, args):
+        raise ConnectionError('broker unavailable')
+    monkeypatch.setattr(celery_app, 'send_task', unavailable)
+
+    with app.app_context():
+        with pytest.raises(ConnectionError):
+            outbox_service.relay_outbox()
+        assert outbox_service.get_backlog()['pending'] == 2
@@ -0,0 +1,94 @@
+"""
+Tests the Celery tasks, run eagerly in the test process.
+"""
+import datetime
+import os
+import subprocess
+import sys
+import time
+import fakeredis
+import pytest
+from app import tasks
+from app.celery_app import celery_app
+from app.core.delay_queue import DelayQueue, loan_event_queue
+from app.core.notifications import notification_queue
+from app.extensions import db
+from app.models import Book, Loan
+
+
+def test_reconcile_repairs_drifted_copy_counters(app, make_book):
+    book_id = make_book(copies=3)
+    with app.app_context():
+        db.session.get(Book, book_id).available_copies = 0
+        db.session.commit()
+
+        assert tasks.reconcile_book_copy_counts() == "Repaired copy counters for 1 books"
+        assert db.session.get(Book, book_id).available_copies == 3
+        assert tasks.reconcile_book_copy_counts() == "Copy counters are consistent"
+
+
+def test_worker_registers_every_scheduled_and_outbox_task():
+    # A fresh interpreter, so only what the worker itself imports is registered.
+    script = (
+        "from app.celery_app import celery_app\n"
+        "celery_app.loader.import_default_modules()\n"
+        "print('\\n'.join(celery_app.tasks))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    registered = set(result.stdout.split())
+
+    scheduled = {entry['task'] for entry in celery_app.conf.beat_schedule.values()}
+    outbox = {
+        'app.tasks.send_loan_confirmation_email',
+        'app.tasks.schedule_loan_due_events',
+        'app.tasks.generate_book_image_variants',
+    }
+    assert scheduled | outbox <= registered
+
+
+def test_delay_queue_pops_only_due_events_once():
+    queue = DelayQueue(fakeredis.FakeRedis(), 'test:events')
+    queue.schedule({'reminder:1': 100.0, 'overdue:1': 200.0, 'reminder:2': 150.0})
+
+    assert queue.pop_due(160.0, limit=10) == [('reminder:1', 100.0), ('reminder:2', 150.0)]
+    assert queue.pop_due(160.0, limit=10) == []
+    assert (queue.size(), queue.lag(260.0)) == (1, 60.0)
+
+
+def _loans(client, make_user, make_book, count):
+    book_id = make_book(copies=count)
+    headers = make_user()
+    return [client.post('/api/loans/', json={'book_id': book_id}, headers=headers).get_json()['id']
+            for _ in range(count)]
+
+
+def test_dispatch_queues_notifications_for_active_loans_only(app, client, make_user, make_book):
+    active_id, returned_id = _loans(client, make_user, make_book, 2)
+    with app.app_context():
+        db.session.get(Loan, returned_id).return_date = datetime.datetime.utcnow()
+        db.session.commit()
+        due = time.time() - 1
+        loan_event_queue.schedule({f'reminder:{active_id}': due, f'overdue:{returned_id}': due,
+                                   'malformed': due, f'overdue:{active_id}': time.time() + 3600})
+
+        assert tasks.dispatch_due_loan_events() == "Dispatched 1 loan events"
+
+        queued = [(record['kind'], record['loan_id']) for record in notification_queue.take(10)]
+        assert queued == [('reminder', active_id)]
+        assert loan_event_queue.size() == 1
+
+
+def test_dispatch_puts_events_back_when_a_batch_fails(app, client, make_user, make_book, monkeypatch):
+    loan_id, = _loans(client, make_user, make_book, 1)
+    monkeypatch.setattr(tasks.loan_repo, 'find_active_ids', lambda loan_ids: 1 / 0)
+    with app.app_context():
+        loan_event_queue.schedule({f'reminder:{loan_id}': time.time() - 1})
+
+        with pytest.raises(ZeroDivisionError):
+            tasks.dispatch_due_loan_events()
+
+        assert loan_event_queue.size() == 1
+        assert notification_queue.take(10) == []
@@ -0,0 +1,94 @@
+"""
+Tests book cover uploads, their image variants and how uploaded files are served.
+"""
+import hashlib
+import io
+import pytest
+from PIL import Image
+from app import tasks
+from app.config import settings
+from app.models import OutboxMessage
+
+
+@pytest.fixture
+def upload_folder(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+def _png(size=(800, 1200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _create_book(client, headers, image):
+    data = {'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '9780441013593',
+            'image': (io.BytesIO(image), 'Cover.PNG')}
+    return client.post('/api/admin/books', data=data, headers=headers).get_json()
+
+
+def test_cover_is_stored_under_its_hash_and_variants_are_deferred(app, client, admin_headers, upload_folder):
+    image = _png()
+
+    book = _create_book(client, admin_headers, image)
+
+    assert book['image_url'] == f"/uploads/{hashlib.sha256(image).hexdigest()}.png"
+    assert book['image_variants'] is None
+    assert [path.name for path in upload_folder.iterdir()] == [book['image_url'].rsplit('/', 1)[1]]
+    with app.app_context():
+        message = OutboxMessage.query.filter_by(task_name='app.tasks.generate_book_image_variants').one()
+        assert message.args == [book['id'], book['image_url']]
+
+
+def test_worker_generates_and_records_the_variants(app, client, admin_headers, upload_folder):
+    book = _create_book(client, admin_headers, _png())
+
+    with app.app_context():
+        tasks.generate_book_image_variants(book['id'], book['image_url'])
+
+    variants = client.get(f"/api/books/{book['id']}").get_json()['image_variants']
+    assert sorted(variants) == ['medium', 'thumbnail', 'webp']
+    with Image.open(upload_folder / variants['thumbnail'].rsplit('/', 1)[1]) as thumbnail:
+        assert (thumbnail.format, thumbnail.size) == ('WEBP', (200, 300))
+
+
+def test_variants_of_a_replaced_image_are_not_recorded(app, client, admin_headers, upload_folder):
+    book = _create_book(client, admin_headers, _png())
+    client.put(f"/api/admin/books/{book['id']}", data={'image': (io.BytesIO(_png((400, 600))), 'new.png')},
+               headers=admin_headers)
+
+    with app.app_context():
+        assert tasks.generate_book_image_variants(book['id'], book['image_url']) == \
+            f"Image of book {book['id']} has changed"
+
+
+def test_uploads_are_served_immutable_with_a_strong_etag(client, upload_folder):
+    image = _png()
+    digest = hashlib.sha256(image).hexdigest()
+    (upload_folder / f'{digest}.png').write_bytes(image)
+
+    response = client.get(f'/uploads/{digest}.png')
+
+    assert response.data == image
+    assert response.get_etag() == (digest, False)
+    assert response.cache_control.immutable and response.cache_control.max_age == settings.UPLOADS_CACHE_MAX_AGE
+    assert client.get(f'/uploads/{digest}.png', headers={'If-None-Match': f'"{digest}"'}).status_code == 304
+
+
+def test_uploads_answer_range_requests(client, upload_folder):
+    (upload_folder / 'cover.png').write_bytes(b'0123456789')
+
+    response = client.get('/uploads/cover.png', headers={'Range': 'bytes=2-5'})
+
+    assert response.status_code == 206
+    assert response.data == b'2345'
+    assert response.headers['Content-Range'] == 'bytes 2-5/10'
+
+
+@pytest.mark.parametrize('filename', ['.upload-abc123', 'cover-thumbnail.webp.tmp', '../conftest.py', 'missing.png'])
+def test_partial_and_outside_files_are_not_served(client, upload_folder, filename):
+    for name in ('.upload-abc123', 'cover-thumbnail.webp.tmp'):
+        (upload_folder / name).write_bytes(b'partial')
+
+    assert client.get(f'/uploads/{filename}').status_code == 404